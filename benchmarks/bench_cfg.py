@@ -0,0 +1,72 @@
+"""控制流图构建吞吐量基准测试
+
+运行: python -m benchmarks.bench_cfg
+"""
+import argparse
+import time
+
+from dissemble.cfg import EdgeKind, build_cfg
+from dissemble.tjs_const import TJSVMOpcode
+from dissemble.tjs_disassembler import TJSDisassembler
+from dissemble.tjs_entity import TJSDataArea
+
+from .bench_disassembler import build_context
+
+
+def check_jump_targets(obj) -> int:
+    """每条跳转/异常边的目标块起始地址必须和列表中显示的跳转目标一致，返回检查的边数"""
+    graph = build_cfg(obj)
+    disassembler = TJSDisassembler(obj, [obj], TJSDataArea())
+    instructions = {instr.address: instr for instr in disassembler.iter_instructions(0)}
+    checked = 0
+    for b in range(len(graph)):
+        for target, kind in graph.successors(b):
+            if kind is EdgeKind.FALLTHROUGH:
+                continue
+            if kind is EdgeKind.EXCEPTION and obj.code[graph.ends[b] - 3] != TJSVMOpcode.VM_ENTRY:
+                # try 区域内 throw 的异常边没有显示的目标
+                continue
+            last = max(addr for addr in instructions if graph.starts[b] <= addr < graph.ends[b])
+            instr = instructions[last]
+            text = instr.operands.split(',')[0]
+            shown = int(text, 10) if instr.opcode == 'entry' else int(text, 16)
+            assert shown == graph.starts[target], (f"0x{last:04X} {instr.opcode} {instr.operands}: "
+                                                   f"block starts at 0x{graph.starts[target]:04X}")
+            checked += 1
+    return checked
+
+
+def main():
+    parser = argparse.ArgumentParser(description='控制流图构建吞吐量基准测试')
+    parser.add_argument('--words', type=int, default=2_000_000, help='代码区字数')
+    parser.add_argument('--repeat', type=int, default=3, help='重复次数(取最好成绩)')
+    args = parser.parse_args()
+
+    # 向后跳转的偏移在代码区中是很大的 uint16，列表和控制流图都要按有符号数解释
+    loop = build_context(0)
+    op = TJSVMOpcode
+    loop.code = [op.VM_NOP, op.VM_ENTRY, 7, 1, op.VM_JF, 0xFFFC, op.VM_JMP, 0xFFFA,
+                 op.VM_EXTRY, op.VM_JNF, 0xFFF7, op.VM_RET]
+    checked = check_jump_targets(loop) + check_jump_targets(build_context(min(args.words, 50_000)))
+    print(f"jump targets: {checked} edges match the listing")
+
+    obj = build_context(args.words)
+
+    best = float('inf')
+    graph = None
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        graph = build_cfg(obj)
+        best = min(best, time.perf_counter() - start)
+
+    words = len(obj.code)
+    print(f"build_cfg: {words} words, {len(graph)} blocks, {graph.edge_count} edges in {best:.3f}s")
+    print(f"  {words / best / 1e6:.2f}M words/s")
+
+    start = time.perf_counter()
+    graph.predecessors(0)
+    print(f"predecessors index: {time.perf_counter() - start:.3f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""反编译吞吐量基准测试：各阶段用时和单进程、多进程的函数/秒
+
+运行: python -m benchmarks.bench_decompiler
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from dissemble.decompiler import Decompiler, decompile_file
+from dissemble.tjs_bytecode_loader import TJSByteCodeLoader
+
+from .synthetic import build_bytecode
+
+
+def bench_stages(path: str):
+    """单进程按阶段依次处理所有对象，每个阶段只计自己的用时"""
+    decompiler = Decompiler(*TJSByteCodeLoader.load_bytecode(path, lazy=True))
+    count = len(decompiler.objects)
+    total = 0.0
+    for stage in Decompiler.STAGES:
+        run = getattr(decompiler, stage)
+        start = time.perf_counter()
+        for index in range(count):
+            run(index)
+        elapsed = time.perf_counter() - start
+        total += elapsed
+        print(f"  {stage:<12} {elapsed * 1000:>9.1f}ms")
+    print(f"serial: {count} functions in {total:.2f}s ({count / total:.1f} functions/s)")
+
+
+def bench_parallel(path: str, jobs: int):
+    start = time.perf_counter()
+    count = sum(1 for _ in decompile_file(path, jobs))
+    elapsed = time.perf_counter() - start
+    print(f"{jobs} processes: {count} functions in {elapsed:.2f}s ({count / elapsed:.1f} functions/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='反编译吞吐量基准测试')
+    parser.add_argument('--objects', type=int, default=200, help='合成文件的对象个数')
+    parser.add_argument('--code-words', type=int, default=2000, help='每个对象的代码字数')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1, help='并行测试的进程数')
+    args = parser.parse_args()
+
+    data = build_bytecode(obj_count=args.objects, code_words=args.code_words)
+    fd, path = tempfile.mkstemp(suffix='.tjs')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        bench_stages(path)
+        bench_parallel(path, args.jobs)
+    finally:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""反汇编吞吐量基准测试
+
+运行: python -m benchmarks.bench_disassembler
+"""
+import argparse
+import random
+import time
+from typing import Optional
+
+from dissemble.tjs_const import INSTRUCTION_FORMATS, TJSContextType, TJSVMOpcode, instruction_size
+from dissemble.tjs_disassembler import TJSDisassembler
+from dissemble.tjs_entity import DisassembledInstruction, TJSDataArea, TJSInterCodeContext
+
+from .synthetic import build_code
+
+
+def _best_of(repeat: int, func) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+class ElifChainDisassembler(TJSDisassembler):
+    """改用分派表之前的解码方式：每条指令先构造 TJSVMOpcode，再按定义顺序逐个比较操作码，
+    和原来的 if/elif 链一样，越靠后的操作码比较次数越多"""
+    CHAIN = list(TJSVMOpcode)
+
+    def iter_instructions(self, obj_index: int = 0, start: int = 0, end: Optional[int] = None):
+        obj = self.objects[obj_index]
+        code_area = obj.code
+        end = len(code_area) if end is None else min(end, len(code_area))
+        i = start
+        while i < end:
+            opcode_val = code_area[i]
+            try:
+                opcode = TJSVMOpcode(opcode_val)
+            except ValueError:
+                yield DisassembledInstruction(i, f"unknown ({opcode_val})", 1, opcode_val)
+                i += 1
+                continue
+            for candidate in self.CHAIN:
+                if opcode == candidate:
+                    break
+            fmt = INSTRUCTION_FORMATS[candidate]
+            instr = self._disassemble_format(i, obj, code_area, candidate.name[3:].lower(), fmt)
+            yield instr
+            i += instr.size
+
+
+def bench_dispatch(obj: TJSInterCodeContext, repeat: int):
+    """同一个代码区分别用 if/elif 链和分派表解码，只生成指令记录，不生成文本"""
+    reference = ElifChainDisassembler(obj, [obj], TJSDataArea())
+    disassembler = TJSDisassembler(obj, [obj], TJSDataArea())
+    assert ([(x.address, x.opcode, x.size) for x in reference.disassemble(0)]
+            == [(x.address, x.opcode, x.size) for x in disassembler.disassemble(0)])
+    words = len(obj.code)
+    old = _best_of(repeat, lambda: reference.disassemble(0))
+    new = _best_of(repeat, lambda: disassembler.disassemble(0))
+    print(f"{'dispatch':<10} {'time':>10} {'words/s':>10}")
+    print(f"{'elif chain':<10} {old:>9.3f}s {words / old / 1e6:>9.2f}M")
+    print(f"{'table':<10} {new:>9.3f}s {words / new / 1e6:>9.2f}M")
+    print(f"  {old / new:.1f}x faster")
+
+
+def build_context(words: int, seed: int = 0) -> TJSInterCodeContext:
+    """构造一个包含 words 个代码字的合成对象"""
+    rng = random.Random(seed)
+    data = [f"member_{i}" for i in range(64)]
+    return TJSInterCodeContext(
+        name="synthetic",
+        context_type=TJSContextType.ctTopLevel,
+        code=build_code(words, len(data), rng),
+        data=data,
+        max_variable_count=32,
+        variable_reserve_count=0,
+        max_frame_count=32,
+        func_decl_arg_count=0,
+        func_decl_unnamed_arg_array_base=0,
+        func_decl_collapse_base=-1,
+        source_positions=[],
+        super_class_getters=[],
+    )
+
+
+def bench_large_constants(words: int, repeat: int):
+    """数据区全是大字符串时生成注释：每次重新格式化与按上下文缓存对比"""
+    obj = build_context(words)
+    obj.data = [f"line {i}\n" * 20000 for i in range(len(obj.data))]
+    disassembler = TJSDisassembler(obj, [obj], TJSDataArea())
+    instructions = [instr for instr in disassembler.disassemble(0) if instr.comment.startswith('*')]
+
+    def uncached():
+        # 旧的做法：每条指令都格式化一次完整的常量
+        texts = []
+        for instr in instructions:
+            word = instr.words[INSTRUCTION_FORMATS[instr.opcode_value].data_operand]
+            texts.append(f"*{word} = {obj.data[word]}")
+        return texts
+
+    def cached():
+        return [instr.comment for instr in instructions]
+
+    for name, func in (('uncached', uncached), ('cached', cached)):
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            texts = func()
+            best = min(best, time.perf_counter() - start)
+        size = sum(len(text) for text in {id(text): text for text in texts}.values())
+        print(f"large constants {name}: {len(texts)} comments in {best:.3f}s, {size / 1e3:.1f}K distinct chars")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='反汇编吞吐量基准测试')
+    parser.add_argument('--words', type=int, default=2_000_000, help='代码区字数')
+    parser.add_argument('--repeat', type=int, default=3, help='重复次数(取最好成绩)')
+    args = parser.parse_args()
+
+    obj = build_context(args.words)
+    disassembler = TJSDisassembler(obj, [obj], TJSDataArea())
+
+    best = float('inf')
+    render_best = float('inf')
+    count = 0
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        instructions = disassembler.disassemble(0)
+        best = min(best, time.perf_counter() - start)
+
+        # 生成界面显示需要的全部文本
+        start = time.perf_counter()
+        for instr in instructions:
+            instr.operands, instr.comment
+        render_best = min(render_best, time.perf_counter() - start)
+        count = len(instructions)
+
+    words = len(obj.code)
+    print(f"disassemble: {words} words, {count} instructions in {best:.3f}s")
+    print(f"  {words / best / 1e6:.2f}M words/s, {count / best / 1e6:.2f}M instructions/s")
+    print(f"render text: {render_best:.3f}s ({count / render_best / 1e6:.2f}M instructions/s)")
+
+    # 只计算指令长度，不生成任何文本
+    code = obj.code
+    best = float('inf')
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        i = 0
+        while i < words:
+            i += instruction_size(code, i)
+        best = min(best, time.perf_counter() - start)
+    print(f"size-only scan: {words / best / 1e6:.2f}M words/s")
+
+    bench_dispatch(obj, args.repeat)
+    bench_large_constants(min(words, 200_000), args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""字节码加载基准测试：逐元素读取与批量读取对比
+
+运行: python -m benchmarks.bench_loader
+"""
+import argparse
+import os
+import struct
+import tempfile
+import time
+
+from dissemble.file import BinaryStream
+from dissemble.tjs_bytecode_loader import TJSByteCodeLoader
+
+from .synthetic import build_bytecode
+
+
+def _best_of(repeat: int, func) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_arrays(count: int, repeat: int):
+    """对每种元素类型比较逐元素读取和批量读取"""
+    cases = [
+        ('uint16', 'H', 2, BinaryStream.read_uint16, BinaryStream.read_uint16_array),
+        ('int16', 'h', 2, BinaryStream.read_int16, BinaryStream.read_int16_array),
+        ('int32', 'i', 4, BinaryStream.read_int32, BinaryStream.read_int32_array),
+        ('uint64', 'Q', 8, BinaryStream.read_uint64, BinaryStream.read_uint64_array),
+        ('double', 'd', 8, BinaryStream.read_double, BinaryStream.read_double_array),
+    ]
+    print(f"{'type':<8} {'per-element':>12} {'bulk':>12} {'speedup':>8}")
+    for name, fmt, size, read_one, read_many in cases:
+        stream = BinaryStream(struct.pack(f'<{count}{fmt}', *([1] * count)))
+
+        def per_element():
+            stream.seek(0)
+            return [read_one(stream) for _ in range(count)]
+
+        def bulk():
+            stream.seek(0)
+            return read_many(stream, count)
+
+        assert per_element() == bulk().tolist()
+        old = _best_of(repeat, per_element)
+        new = _best_of(repeat, bulk)
+        print(f"{name:<8} {old * 1000:>10.2f}ms {new * 1000:>10.2f}ms {old / new:>7.1f}x")
+
+
+def bench_file(obj_count: int, code_words: int, repeat: int):
+    """加载完整的合成字节码文件"""
+    data = build_bytecode(obj_count=obj_count, code_words=code_words)
+    fd, path = tempfile.mkstemp(suffix='.tjs')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        elapsed = _best_of(repeat, lambda: TJSByteCodeLoader.load_bytecode(path))
+    finally:
+        os.remove(path)
+    size_mb = len(data) / (1024 * 1024)
+    print(f"load_bytecode: {size_mb:.1f} MB in {elapsed * 1000:.1f}ms ({size_mb / elapsed:.1f} MB/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='字节码加载基准测试')
+    parser.add_argument('--count', type=int, default=1_000_000, help='每种数组的元素个数')
+    parser.add_argument('--objects', type=int, default=400, help='合成文件的对象个数')
+    parser.add_argument('--code-words', type=int, default=20000, help='每个对象的代码字数')
+    parser.add_argument('--repeat', type=int, default=3, help='重复次数(取最好成绩)')
+    args = parser.parse_args()
+
+    bench_arrays(args.count, args.repeat)
+    bench_file(args.objects, args.code_words, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
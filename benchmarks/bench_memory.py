@@ -0,0 +1,122 @@
+"""对象模型内存占用基准测试：列表布局与 array/__slots__/变体表布局的每条指令字节数对比
+
+运行: python -m benchmarks.bench_memory
+"""
+import argparse
+import gc
+import os
+import tempfile
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from dissemble.tjs_bytecode_loader import TJSByteCodeLoader
+from dissemble.tjs_const import instruction_size
+from dissemble.tjs_entity import VariantTable
+
+from .synthetic import build_bytecode
+
+
+@dataclass
+class ListSourcePos:
+    code_pos: int
+    source_pos: int
+
+
+@dataclass
+class ListContext:
+    """改用 array 之前的对象布局：每个代码字一个 int 对象，每个源码位置一个实例，实例带 __dict__"""
+    name: str
+    context_type: Any
+    code: List[int]
+    data: List[Any]
+    max_variable_count: int
+    variable_reserve_count: int
+    max_frame_count: int
+    func_decl_arg_count: int
+    func_decl_unnamed_arg_array_base: int
+    func_decl_collapse_base: int
+    source_positions: Optional[List[ListSourcePos]]
+    super_class_getters: List[int]
+    properties: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class ListDataArea:
+    byte_array: Any
+    short_array: List[int]
+    long_array: List[int]
+    long_long_array: List[int]
+    double_array: List[float]
+    string_array: List[str]
+    octet_array: List[Any]
+
+
+def to_list_layout(result):
+    """把加载结果转换成列表布局，字符串与原结果共用，数据变体展开成引用常量池元素的列表"""
+    top_obj, objects, data_area = result
+    area = ListDataArea(data_area.byte_array, list(data_area.short_array), list(data_area.long_array),
+                        list(data_area.long_long_array), list(data_area.double_array),
+                        data_area.string_array, data_area.octet_array)
+    legacy = [ListContext(
+        obj.name, obj.context_type, list(obj.code), list(VariantTable(obj.data.tags, area, objects)),
+        obj.max_variable_count, obj.variable_reserve_count, obj.max_frame_count,
+        obj.func_decl_arg_count, obj.func_decl_unnamed_arg_array_base, obj.func_decl_collapse_base,
+        None if obj.source_positions is None else [ListSourcePos(p.code_pos, p.source_pos) for p in obj.source_positions],
+        list(obj.super_class_getters),
+    ) for obj in objects]
+    return legacy, area
+
+
+def count_instructions(objects) -> int:
+    count = 0
+    for obj in objects:
+        code = obj.code
+        i = 0
+        while i < len(code):
+            i += instruction_size(code, i)
+            count += 1
+    return count
+
+
+def measure(path: str, convert: bool) -> int:
+    """加载文件后仍被引用的内存字节数"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = TJSByteCodeLoader.load_bytecode(path)
+        if convert:
+            result = to_list_layout(result)
+        gc.collect()
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return current
+
+
+def main():
+    parser = argparse.ArgumentParser(description='对象模型内存占用基准测试')
+    parser.add_argument('--objects', type=int, default=200, help='合成文件的对象个数')
+    parser.add_argument('--code-words', type=int, default=20000, help='每个对象的代码字数')
+    args = parser.parse_args()
+
+    data = build_bytecode(obj_count=args.objects, code_words=args.code_words)
+    fd, path = tempfile.mkstemp(suffix='.tjs')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        instructions = count_instructions(TJSByteCodeLoader.load_bytecode(path)[1])
+        before = measure(path, convert=True)
+        after = measure(path, convert=False)
+    finally:
+        os.remove(path)
+
+    print(f"{len(data) / (1024 * 1024):.1f} MB file, {instructions} instructions")
+    print(f"list layout:  {before / (1024 * 1024):>8.1f} MB, {before / instructions:>6.1f} bytes/instruction")
+    print(f"array layout: {after / (1024 * 1024):>8.1f} MB, {after / instructions:>6.1f} bytes/instruction")
+    print(f"  {before / after:.1f}x smaller")
+
+
+if __name__ == '__main__':
+    main()
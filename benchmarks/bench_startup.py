@@ -0,0 +1,83 @@
+"""命令行启动时间基准测试
+
+运行: python -m benchmarks.bench_startup [--budget 毫秒]
+
+测量 python -m dissemble info 处理一个小文件的总耗时，减去空解释器的启动时间后
+超过预算时以非零状态退出，防止命令行路径重新引入 PyQt 等较重的导入
+
+两条命令交替运行、各取最短耗时，以抵消机器负载带来的抖动；
+另外用 -X importtime 直接检查命令行路径没有导入 PyQt5，这一项不受计时噪声影响
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from .synthetic import build_bytecode
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _run_ms(args) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, *args], cwd=ROOT, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return (time.perf_counter() - start) * 1000
+
+
+def _best_ms(commands, repeat: int) -> list[float]:
+    """交替运行各条命令，返回每条命令的最短耗时(毫秒)"""
+    samples = [[] for _ in commands]
+    for _ in range(repeat):
+        for i, args in enumerate(commands):
+            samples[i].append(_run_ms(args))
+    return [min(s) for s in samples]
+
+
+def _heavy_imports(args) -> list[str]:
+    """用 -X importtime 找出命令导入的 PyQt5 模块"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', *args], cwd=ROOT, check=True,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    return [line.rsplit('|', 1)[-1].strip() for line in result.stderr.splitlines()
+            if line.rsplit('|', 1)[-1].strip().startswith('PyQt5')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='命令行启动时间基准测试')
+    parser.add_argument('--repeat', type=int, default=15, help='重复次数(取最短耗时)')
+    parser.add_argument('--budget', type=float, default=150.0, help='相对空解释器的启动开销上限(毫秒)')
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix='.tjs')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(build_bytecode(obj_count=4, code_words=200))
+
+        cli_args = ['-m', 'dissemble', 'info', path]
+        bare, cli = _best_ms([['-c', 'pass'], cli_args], args.repeat)
+        print(f"python -c pass:          {bare:7.1f}ms")
+        print(f"python -m dissemble info: {cli:7.1f}ms (+{cli - bare:.1f}ms)")
+        try:
+            gui_bare, gui = _best_ms([['-c', 'pass'], ['-c', 'import PyQt5.QtWidgets, dissemble.ui']], args.repeat)
+            print(f"import PyQt5 + ui:        {gui:7.1f}ms (+{gui - gui_bare:.1f}ms)")
+        except subprocess.CalledProcessError:
+            pass
+        heavy = _heavy_imports(cli_args)
+    finally:
+        os.remove(path)
+
+    failed = False
+    if heavy:
+        print(f"命令行路径导入了 {', '.join(heavy)}")
+        failed = True
+    if cli - bare > args.budget:
+        print(f"超出启动预算 {args.budget:.0f}ms")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
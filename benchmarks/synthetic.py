@@ -0,0 +1,137 @@
+"""生成合成的TJS2字节码，供基准测试使用"""
+import random
+import struct
+from typing import List, Tuple
+
+from dissemble.tjs_const import *
+
+# (操作码, 寄存器操作数个数, 数据区操作数位置) 的指令模板
+_TEMPLATES: List[Tuple[int, int, Tuple[int, ...]]] = [
+    (TJSVMOpcode.VM_CP, 2, ()),
+    (TJSVMOpcode.VM_CONST, 2, (1,)),
+    (TJSVMOpcode.VM_CEQ, 2, ()),
+    (TJSVMOpcode.VM_ADD, 2, ()),
+    (TJSVMOpcode.VM_ADDPD, 4, (2,)),
+    (TJSVMOpcode.VM_SUBPI, 4, ()),
+    (TJSVMOpcode.VM_MULP, 3, ()),
+    (TJSVMOpcode.VM_INC, 1, ()),
+    (TJSVMOpcode.VM_INCPD, 3, (2,)),
+    (TJSVMOpcode.VM_TT, 1, ()),
+    (TJSVMOpcode.VM_NF, 0, ()),
+    (TJSVMOpcode.VM_LNOT, 1, ()),
+    (TJSVMOpcode.VM_TYPEOF, 1, ()),
+    (TJSVMOpcode.VM_GPD, 3, (2,)),
+    (TJSVMOpcode.VM_SPD, 3, (1,)),
+    (TJSVMOpcode.VM_GPI, 3, ()),
+    (TJSVMOpcode.VM_DELD, 3, (2,)),
+    (TJSVMOpcode.VM_SRV, 1, ()),
+    (TJSVMOpcode.VM_GLOBAL, 1, ()),
+    (TJSVMOpcode.VM_CHGTHIS, 2, ()),
+    (TJSVMOpcode.VM_REGMEMBER, 0, ()),
+]
+
+_JUMPS = (TJSVMOpcode.VM_JF, TJSVMOpcode.VM_JNF, TJSVMOpcode.VM_JMP)
+
+
+def build_code(words: int, data_count: int, rng: random.Random) -> List[int]:
+    """生成大约 words 个字的合法指令流，跳转目标均为指令起始位置"""
+    code: List[int] = []
+    starts: List[int] = []
+    pending: List[Tuple[int, int]] = []  # (跳转指令位置, 目标指令序号)
+
+    while len(code) < words:
+        starts.append(len(code))
+        roll = rng.random()
+        if roll < 0.08:
+            # 只生成向前跳转，目标在后续生成的指令中
+            pending.append((len(code), len(starts) + rng.randint(1, 16)))
+            code += [rng.choice(_JUMPS), 0]
+        elif roll < 0.13:
+            opcode = rng.choice((TJSVMOpcode.VM_CALL, TJSVMOpcode.VM_CALLD, TJSVMOpcode.VM_NEW))
+            argc = rng.randint(0, 4)
+            code += [opcode, rng.randint(0, 31), rng.randint(0, 31)]
+            if opcode == TJSVMOpcode.VM_CALLD:
+                code.append(rng.randrange(data_count))
+            code.append(argc)
+            code += [rng.randint(0, 31) for _ in range(argc)]
+        else:
+            opcode, nregs, data_ops = rng.choice(_TEMPLATES)
+            operands = [rng.randint(0, 31) for _ in range(nregs)]
+            for pos in data_ops:
+                operands[pos] = rng.randrange(data_count)
+            code.append(opcode)
+            code += operands
+
+    starts.append(len(code))
+    code.append(TJSVMOpcode.VM_RET)
+    for pos, target in pending:
+        target_addr = starts[min(target, len(starts) - 1)]
+        code[pos + 1] = target_addr - pos
+    return code
+
+
+def _align4(buf: bytearray):
+    buf += b'\0' * (-len(buf) & 3)
+
+
+def _build_data_area(strings: List[str], doubles: List[float], longs: List[int]) -> bytes:
+    buf = bytearray()
+    buf += struct.pack('<i', 0)  # byte
+    buf += struct.pack('<i', 0)  # short
+    buf += struct.pack(f'<i{len(longs)}i', len(longs), *longs)
+    buf += struct.pack('<i', 0)  # long long
+    buf += struct.pack(f'<i{len(doubles)}d', len(doubles), *doubles)
+    buf += struct.pack('<i', len(strings))
+    for s in strings:
+        data = s.encode('utf-16-le')
+        buf += struct.pack('<i', len(data) // 2)
+        buf += data
+        _align4(buf)
+    buf += struct.pack('<i', 1)  # octet
+    buf += struct.pack('<i', 5) + b'\x01\x02\x03\x04\x05'
+    _align4(buf)
+    return struct.pack('<ii', DATA_TAG_LE, len(buf) + 8) + bytes(buf)
+
+
+def _build_object(index: int, obj_count: int, code: List[int], variants: List[Tuple[int, int]],
+                  name_idx: int, context_type: int, rng: random.Random) -> bytes:
+    buf = bytearray()
+    parent = -1 if index == 0 else 0
+    buf += struct.pack('<12i', parent, name_idx, context_type, 32, 4, 16, 0, -1, -1, -1, -1, -1)
+    positions = list(range(0, len(code), 16))
+    buf += struct.pack(f'<i{len(positions)}i{len(positions)}i', len(positions),
+                       *positions, *(p * 3 for p in positions))
+    buf += struct.pack(f'<i{len(code)}H', len(code), *(w & 0xFFFF for w in code))
+    _align4(buf)
+    flat = [v for pair in variants for v in pair]
+    buf += struct.pack(f'<i{len(flat)}h', len(variants), *flat)
+    buf += struct.pack('<i', 0)  # super class getters
+    props = [(name_idx, rng.randrange(obj_count))] if index and index % 7 == 0 else []
+    flat = [v for pair in props for v in pair]
+    buf += struct.pack(f'<i{len(flat)}i', len(props), *flat)
+    return struct.pack('<ii', FILE_TAG_LE, len(buf)) + bytes(buf)
+
+
+def build_bytecode(obj_count: int = 200, code_words: int = 5000, seed: int = 0) -> bytes:
+    """生成一个完整的TJS2字节码文件"""
+    rng = random.Random(seed)
+    strings = [f"name_{i}" for i in range(obj_count)]
+    strings += [f"string constant {i} " * rng.randint(1, 8) for i in range(obj_count * 4)]
+    doubles = [rng.random() * 1000 for _ in range(256)]
+    longs = [rng.randint(-(1 << 31), (1 << 31) - 1) for _ in range(256)]
+    data_area = _build_data_area(strings, doubles, longs)
+
+    pools = [(TYPE_STRING, len(strings)), (TYPE_REAL, len(doubles)), (TYPE_INTEGER, len(longs))]
+    objs = bytearray()
+    for o in range(obj_count):
+        variants = []
+        for _ in range(64):
+            type_val, count = rng.choice(pools)
+            variants.append((type_val, rng.randrange(count)))
+        code = build_code(code_words, len(variants), rng)
+        context_type = TJSContextType.ctTopLevel.value if o == 0 else TJSContextType.ctFunction.value
+        objs += _build_object(o, obj_count, code, variants, o, context_type, rng)
+    objs_area = struct.pack('<iiii', OBJ_TAG_LE, len(objs) + 16, 0, obj_count) + bytes(objs)
+
+    body = data_area + objs_area
+    return struct.pack('<iii', FILE_TAG_LE, VER_TAG_LE, len(body) + 12) + body
@@ -0,0 +1,200 @@
+"""不依赖 PyQt 的命令行入口
+
+运行: python -m dissemble {info,dump,xref,cfg,decompile,index,query,batch} ...
+
+启动时只导入加载器和反汇编器，进程池、磁盘缓存等按子命令需要再导入
+"""
+from typing import List, Optional
+import argparse
+import os
+import sys
+
+from .batch import positive_int
+from .tjs_bytecode_loader import TJSByteCodeLoader
+from .tjs_entity import ObjectDecodeError
+
+def load(args: argparse.Namespace):
+    cache = None
+    if args.cache_dir:
+        from .disk_cache import DiskCache
+        cache = DiskCache(args.cache_dir)
+    result = TJSByteCodeLoader.load_bytecode(args.file, lazy=True, cache=cache)
+    if result is None:
+        print(f"无法加载: {args.file}", file=sys.stderr)
+    return result
+
+def cmd_info(args: argparse.Namespace) -> int:
+    """列出数据区大小和各对象的名称、类型"""
+    result = load(args)
+    if result is None:
+        return 1
+    top_obj, objects, data_area = result
+    print(f"strings: {len(data_area.string_array)}, octets: {len(data_area.octet_array)}, "
+          f"integers: {len(data_area.long_array)}, reals: {len(data_area.double_array)}")
+    for index, obj in enumerate(objects):
+        mark = '*' if obj is top_obj else ' '
+        print(f"{mark}[{index}] {obj.name} ({obj.context_type.name})")
+    return 0
+
+def cmd_dump(args: argparse.Namespace) -> int:
+    """把反汇编文本写到标准输出"""
+    from .batch import write_listing
+
+    result = load(args)
+    if result is None:
+        return 1
+    objects = result[1]
+    if args.object is not None and not 0 <= args.object < len(objects):
+        print(f"对象序号超出范围: {args.object}", file=sys.stderr)
+        return 1
+    write_listing(sys.stdout, *result, indices=None if args.object is None else [args.object])
+    return 0
+
+def cmd_xref(args: argparse.Namespace) -> int:
+    """列出以指定方式引用某个常量的所有位置"""
+    from .tjs_const import XRefKind
+    from .tjs_disassembler import TJSDisassembler
+
+    result = load(args)
+    if result is None:
+        return 1
+    disassembler = TJSDisassembler(*result)
+    objects = result[1]
+    for obj_index, address in disassembler.xrefs(args.value, XRefKind[args.kind.upper()]):
+        print(f"[{obj_index}] {objects[obj_index].name} 0x{address:04X}")
+    return 0
+
+def cmd_cfg(args: argparse.Namespace) -> int:
+    """列出对象的基本块和后继"""
+    from .cfg import build_cfg
+
+    result = load(args)
+    if result is None:
+        return 1
+    objects = result[1]
+    if not 0 <= args.object < len(objects):
+        print(f"对象序号超出范围: {args.object}", file=sys.stderr)
+        return 1
+    graph = build_cfg(objects[args.object])
+    print(f"[{args.object}] {objects[args.object].name}: {len(graph)} blocks, {graph.edge_count} edges")
+    for b in range(len(graph)):
+        successors = ', '.join(f"{target}({kind.name.lower()})" for target, kind in graph.successors(b))
+        print(f"  block {b}: 0x{graph.starts[b]:04X}-0x{graph.ends[b]:04X} -> {successors or '-'}")
+    return 0
+
+def cmd_decompile(args: argparse.Namespace) -> int:
+    """把对象反编译成 TJS 源代码"""
+    from .decompiler import Decompiler, decompile_file
+
+    result = load(args)
+    if result is None:
+        return 1
+    objects = result[1]
+    if args.object is None:
+        if args.jobs == 1:
+            decompiler = Decompiler(*result)
+            sources = (decompiler.decompile(index) for index in range(len(objects)))
+        else:
+            sources = (source for _, source in decompile_file(args.file, args.jobs, list(range(len(objects)))))
+        for source in sources:
+            print(source)
+        return 0
+    if not 0 <= args.object < len(objects):
+        print(f"对象序号超出范围: {args.object}", file=sys.stderr)
+        return 1
+    print(Decompiler(*result).decompile(args.object))
+    return 0
+
+def cmd_index(args: argparse.Namespace) -> int:
+    """增量建立或更新目录的符号索引"""
+    import time
+    from .symbol_index import SymbolIndex
+
+    start = time.perf_counter()
+    with SymbolIndex(args.db) as index:
+        changed, removed, failed = index.update(args.path, args.jobs)
+    print(f"解析 {changed} 个文件, 删除 {removed} 个, 失败 {failed} 个, 用时 {time.perf_counter() - start:.2f}s")
+    return 1 if failed else 0
+
+def cmd_query(args: argparse.Namespace) -> int:
+    """在符号索引中查找名称"""
+    from .symbol_index import SymbolIndex
+
+    with SymbolIndex(args.db) as index:
+        rows = index.query(args.name, args.kind, args.prefix)
+    for path, kind, name, obj_index, obj_name, address in rows:
+        location = f"[{obj_index}] {obj_name}" + (f" 0x{address:04X}" if address >= 0 else "")
+        print(f"{path}: {kind} {name} @ {location}")
+    return 0
+
+def main(argv: Optional[List[str]] = None) -> int:
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv[:1] == ['batch']:
+        # batch 的参数由它自己解析
+        from . import batch
+        return batch.main(argv[1:])
+
+    parser = argparse.ArgumentParser(prog='python -m dissemble', description='反汇编二进制格式tjs脚本(命令行)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    info = subparsers.add_parser('info', help='列出文件中的对象')
+    info.set_defaults(func=cmd_info)
+
+    dump = subparsers.add_parser('dump', help='反汇编一个文件到标准输出')
+    dump.add_argument('--object', type=int, default=None, help='只输出指定序号的对象')
+    dump.set_defaults(func=cmd_dump)
+
+    xref = subparsers.add_parser('xref', help='查询引用某个字符串常量的位置')
+    xref.add_argument('value', help='字符串常量或成员名')
+    xref.add_argument('--kind', default='const', choices=['const', 'read', 'write', 'call', 'delete', 'typeof'],
+                      help='引用类型(默认任意引用)')
+    xref.set_defaults(func=cmd_xref)
+
+    cfg = subparsers.add_parser('cfg', help='列出一个对象的控制流图')
+    cfg.add_argument('--object', type=int, default=0, help='对象序号(默认 0)')
+    cfg.set_defaults(func=cmd_cfg)
+
+    decompile = subparsers.add_parser('decompile', help='把对象反编译成 TJS 源代码')
+    decompile.add_argument('--object', type=int, default=None, help='只输出指定序号的对象')
+    decompile.add_argument('-j', '--jobs', type=positive_int, default=None, help='工作进程数(默认CPU核数，1 为单进程)')
+    decompile.set_defaults(func=cmd_decompile)
+
+    index = subparsers.add_parser('index', help='增量索引目录下所有字节码文件的符号')
+    index.add_argument('path', help='目录')
+    index.add_argument('-j', '--jobs', type=positive_int, default=None, help='工作进程数(默认CPU核数)')
+    index.set_defaults(func=cmd_index)
+
+    query = subparsers.add_parser('query', help='在符号索引中查找名称')
+    query.add_argument('name', help='符号名称')
+    query.add_argument('--kind', action='append', choices=['class', 'function', 'property', 'string', 'call'],
+                       help='只查找指定类型，可重复')
+    query.add_argument('--prefix', action='store_true', help='查找以 name 开头的符号')
+    query.set_defaults(func=cmd_query)
+
+    for sub in (index, query):
+        sub.add_argument('--db', default='tjs_symbols.db', help='索引数据库路径(默认 tjs_symbols.db)')
+
+    for sub in (info, dump, xref, cfg, decompile):
+        sub.add_argument('file', help='字节码文件')
+        sub.add_argument('--cache-dir', help='解析结果的磁盘缓存目录', default=None)
+
+    subparsers.add_parser('batch', help='批量反汇编目录，参数见 batch -h', add_help=False)
+
+    args = parser.parse_args(argv)
+    try:
+        status = args.func(args)
+        sys.stdout.flush()
+    except ObjectDecodeError as e:
+        # 按需解码的对象体损坏，和加载失败一样报告
+        sys.stdout.flush()
+        print(f"无法加载: {args.file}: {e}", file=sys.stderr)
+        status = 1
+    except BrokenPipeError:
+        # 下游命令 (如 head) 提前退出，避免解释器退出时再次写入报错
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        status = 0
+    return status
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""无界面批量反汇编：把目录下所有TJS2字节码文件输出为 .asm 文本
+
+运行: python -m dissemble batch <目录> [-o 输出目录] [--jobs N] [--resume]
+"""
+from typing import Iterable, Iterator, List, Optional, TextIO, Tuple
+import argparse
+import os
+import time
+
+from .file import BinaryStream
+from .tjs_bytecode_loader import TJSByteCodeLoader
+from .tjs_disassembler import TJSDisassembler
+from .tjs_entity import TJSDataArea, TJSInterCodeContext
+
+ASM_SUFFIX = '.asm'
+
+def positive_int(text: str) -> int:
+    """--jobs 等参数的 argparse 类型，0 和负数交给进程池会抛出 ValueError，在解析参数时就拒绝"""
+    try:
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"不是整数: {text}")
+    if value <= 0:
+        raise argparse.ArgumentTypeError(f"必须是正整数: {text}")
+    return value
+
+def is_bytecode_file(file_path: str) -> bool:
+    """只读取文件头判断是否为TJS2字节码"""
+    try:
+        with open(file_path, 'rb') as f:
+            head = f.read(8)
+    except OSError:
+        return False
+    return TJSByteCodeLoader.is_tjs2_bytecode(BinaryStream(head))
+
+def find_bytecode_files(root: str) -> Iterator[str]:
+    """按路径顺序遍历目录，产出其中的字节码文件"""
+    if os.path.isfile(root):
+        if is_bytecode_file(root):
+            yield root
+        return
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            file_path = os.path.join(dirpath, name)
+            if is_bytecode_file(file_path):
+                yield file_path
+
+def output_path(file_path: str, root: str, out_dir: str) -> str:
+    """输出文件保持输入文件相对于 root 的目录结构"""
+    if os.path.isfile(root):
+        root = os.path.dirname(root)
+    return os.path.join(out_dir, os.path.relpath(file_path, root)) + ASM_SUFFIX
+
+def is_up_to_date(file_path: str, out_path: str) -> bool:
+    try:
+        return os.stat(out_path).st_mtime_ns >= os.stat(file_path).st_mtime_ns
+    except OSError:
+        return False
+
+def write_listing(f: TextIO, top_obj: Optional[TJSInterCodeContext], objects: List[TJSInterCodeContext], data_area: TJSDataArea,
+                  indices: Optional[Iterable[int]] = None):
+    """逐条写出对象的反汇编文本，不保留指令列表，indices 缺省时写出全部对象"""
+    # 输出文件保留完整的常量文本
+    disassembler = TJSDisassembler(top_obj, objects, data_area, max_const_length=None)
+    for index in range(len(objects)) if indices is None else indices:
+        obj = objects[index]
+        f.write(f"; [{index}] {obj.name} ({obj.context_type.name})\n")
+        for instr in disassembler.iter_instructions(index):
+            comment = instr.comment
+            line = f"0x{instr.address:04X}  {instr.opcode:<10} {instr.operands}"
+            f.write(f"{line}  ; {comment}\n" if comment else f"{line}\n")
+        f.write("\n")
+
+def disassemble_file(file_path: str, out_path: str) -> Tuple[str, int, Optional[str]]:
+    """在工作进程中反汇编一个文件，返回 (文件路径, 文件大小, 错误信息)
+
+    任何异常都只记录为这个文件的错误，不影响其它文件
+    """
+    size = 0
+    tmp_path = out_path + '.tmp'
+    try:
+        size = os.path.getsize(file_path)
+        # 解析错误作为异常返回，不在工作进程中打印
+        result = TJSByteCodeLoader.load_bytecode(file_path, lazy=True, strict=True)
+        if result is None:
+            return file_path, size, "不是TJS2字节码"
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        # 先写临时文件，中断时不会留下看起来已完成的输出
+        with open(tmp_path, 'w', encoding='utf-8', newline='\n') as f:
+            write_listing(f, *result)
+        os.replace(tmp_path, out_path)
+    except Exception as e:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return file_path, size, f"{type(e).__name__}: {e}"
+    return file_path, size, None
+
+def main(argv: Optional[List[str]] = None) -> int:
+    # 进程池的导入较慢，只在批量模式下导入
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    parser = argparse.ArgumentParser(prog='python -m dissemble batch', description='批量反汇编目录下的TJS2字节码文件')
+    parser.add_argument('path', help='输入目录或文件')
+    parser.add_argument('-o', '--output', help='输出目录(默认写到输入文件旁边)', default=None)
+    parser.add_argument('-j', '--jobs', type=positive_int, default=None, help='工作进程数(默认CPU核数)')
+    parser.add_argument('--resume', action='store_true', help='跳过比输入文件新的输出文件')
+    args = parser.parse_args(argv)
+
+    root = os.path.abspath(args.path)
+    out_dir = os.path.abspath(args.output) if args.output else (root if os.path.isdir(root) else os.path.dirname(root))
+
+    start = time.perf_counter()
+    tasks = []
+    skipped = 0
+    for file_path in find_bytecode_files(root):
+        out_path = output_path(file_path, root, out_dir)
+        if args.resume and is_up_to_date(file_path, out_path):
+            skipped += 1
+            continue
+        tasks.append((file_path, out_path))
+
+    done = 0
+    failed = 0
+    total_bytes = 0
+    with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        futures = {executor.submit(disassemble_file, file_path, out_path): file_path for file_path, out_path in tasks}
+        for future in as_completed(futures):
+            try:
+                file_path, size, error = future.result()
+            except Exception as e:
+                # 工作进程异常退出
+                file_path, size, error = futures[future], 0, f"{type(e).__name__}: {e}"
+            total_bytes += size
+            if error is None:
+                done += 1
+            else:
+                failed += 1
+                print(f"失败: {file_path}: {error}")
+
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    size_mb = total_bytes / (1024 * 1024)
+    print(f"完成 {done} 个文件, 失败 {failed} 个, 跳过 {skipped} 个, 共 {size_mb:.1f} MB, 用时 {elapsed:.2f}s")
+    print(f"{(done + failed) / elapsed:.1f} files/s, {size_mb / elapsed:.1f} MB/s")
+    return 1 if failed else 0
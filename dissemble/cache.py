@@ -0,0 +1,76 @@
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+import os
+import sys
+
+# 已解析文件占用内存的估算倍数 (相对文件大小)
+PARSED_SIZE_FACTOR = 3
+# 单条 DisassembledInstruction 占用内存的估算值 (字节)
+INSTRUCTION_SIZE = 120
+
+class LRUCache:
+    """带内存预算的LRU缓存
+
+    每一项都带一个估算的字节数，总量超过 max_bytes 时从最久未使用的项开始淘汰，
+    单项超过预算时不缓存。因超出预算被淘汰的项会传给 on_evict
+    """
+
+    def __init__(self, max_bytes: int, sizeof: Optional[Callable[[Any], int]] = None,
+                 on_evict: Optional[Callable[[Hashable, Any], None]] = None):
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof or sys.getsizeof
+        self.on_evict = on_evict
+        self.total_bytes = 0
+        self._items: OrderedDict[Hashable, Tuple[Any, int]] = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """查找缓存项并标记为最近使用"""
+        item = self._items.get(key)
+        if item is None:
+            return default
+        self._items.move_to_end(key)
+        return item[0]
+
+    def put(self, key: Hashable, value: Any, size: Optional[int] = None):
+        """加入或更新缓存项，必要时淘汰旧项，size 缺省时用 sizeof 估算 (默认为 sys.getsizeof)"""
+        self.discard(key)
+        if size is None:
+            size = self.sizeof(value)
+        if size > self.max_bytes:
+            return
+        self._items[key] = (value, size)
+        self.total_bytes += size
+        while self.total_bytes > self.max_bytes:
+            evicted_key, (evicted, evicted_size) = self._items.popitem(last=False)
+            self.total_bytes -= evicted_size
+            if self.on_evict is not None:
+                self.on_evict(evicted_key, evicted)
+
+    def discard(self, key: Hashable):
+        item = self._items.pop(key, None)
+        if item is not None:
+            self.total_bytes -= item[1]
+
+    def discard_if(self, predicate: Callable[[Hashable], bool]):
+        """删除键满足 predicate 的所有项"""
+        for key in [key for key in self._items if predicate(key)]:
+            self.discard(key)
+
+    def clear(self):
+        self._items.clear()
+        self.total_bytes = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+def file_cache_key(file_path: str) -> Optional[Tuple[str, int, int]]:
+    """以 (绝对路径, 修改时间, 文件大小) 作为已解析文件的缓存键，文件不存在时返回 None"""
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        return None
+    return os.path.abspath(file_path), st.st_mtime_ns, st.st_size
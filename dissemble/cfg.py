@@ -0,0 +1,198 @@
+from array import array
+from bisect import bisect_right
+from enum import IntEnum
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from .tjs_const import TJSVMOpcode, INSTRUCTION_FORMATS, code_offset, instruction_size
+from .tjs_entity import TJSInterCodeContext
+
+class EdgeKind(IntEnum):
+    """控制流边的类型"""
+    FALLTHROUGH = 0  # 顺序执行到下一个块
+    JUMP = 1         # jmp
+    BRANCH = 2       # jf/jnf 条件成立时的跳转
+    EXCEPTION = 3    # entry 到 catch 块，或 try 区域内的 throw 到 catch 块
+
+_JUMPS = (TJSVMOpcode.VM_JF, TJSVMOpcode.VM_JNF, TJSVMOpcode.VM_JMP)
+# 之后的指令开始一个新块
+_BLOCK_ENDS = (TJSVMOpcode.VM_JF, TJSVMOpcode.VM_JNF, TJSVMOpcode.VM_JMP,
+               TJSVMOpcode.VM_RET, TJSVMOpcode.VM_THROW, TJSVMOpcode.VM_ENTRY, TJSVMOpcode.VM_EXTRY)
+
+# 按操作码值索引：定长指令的长度，变长或未知的指令为 0
+_FIXED_SIZES = bytes(0 if fmt is None or fmt.variable else fmt.size for fmt in INSTRUCTION_FORMATS)
+# 按操作码值索引：1 为结束基本块的指令，2 为同时带跳转目标的指令
+_BLOCK_END_FLAGS = bytes(
+    (2 if opcode in _JUMPS or opcode == TJSVMOpcode.VM_ENTRY else 1) if opcode in _BLOCK_ENDS else 0
+    for opcode in range(len(INSTRUCTION_FORMATS)))
+
+class ControlFlowGraph:
+    """一个代码上下文的基本块和控制流边
+
+    块按地址顺序编号，块 b 覆盖代码区 [starts[b], ends[b])，包含 instruction_counts[b] 条指令。
+    边按源块分组保存：块 b 的边是 edge_targets/edge_kinds 中 [edge_offsets[b], edge_offsets[b + 1]) 的部分
+    """
+
+    def __init__(self, starts: array, ends: array, instruction_counts: array,
+                 edge_offsets: array, edge_targets: array, edge_kinds: array):
+        self.starts = starts
+        self.ends = ends
+        self.instruction_counts = instruction_counts
+        self.edge_offsets = edge_offsets
+        self.edge_targets = edge_targets
+        self.edge_kinds = edge_kinds
+        self._pred_offsets: Optional[array] = None
+        self._pred_sources: Optional[array] = None
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.edge_targets)
+
+    def block_at(self, address: int) -> int:
+        """包含 address 的块，地址不在代码区内时返回 -1"""
+        b = bisect_right(self.starts, address) - 1
+        if b < 0 or address >= self.ends[b]:
+            return -1
+        return b
+
+    def successors(self, block: int) -> List[Tuple[int, EdgeKind]]:
+        """块的后继 (块, 边类型)"""
+        lo, hi = self.edge_offsets[block], self.edge_offsets[block + 1]
+        return [(self.edge_targets[e], EdgeKind(self.edge_kinds[e])) for e in range(lo, hi)]
+
+    def predecessors(self, block: int) -> List[int]:
+        """块的前驱，第一次调用时建立反向边表"""
+        if self._pred_offsets is None:
+            self._build_predecessors()
+        return list(self._pred_sources[self._pred_offsets[block]:self._pred_offsets[block + 1]])
+
+    def edges(self) -> Iterator[Tuple[int, int, EdgeKind]]:
+        """依次产生所有边 (源块, 目标块, 边类型)"""
+        offsets = self.edge_offsets
+        for b in range(len(self.starts)):
+            for e in range(offsets[b], offsets[b + 1]):
+                yield b, self.edge_targets[e], EdgeKind(self.edge_kinds[e])
+
+    def _build_predecessors(self):
+        count = len(self.starts)
+        offsets = array('l', [0]) * (count + 1)
+        for target in self.edge_targets:
+            offsets[target + 1] += 1
+        for b in range(count):
+            offsets[b + 1] += offsets[b]
+        sources = array('l', [0]) * len(self.edge_targets)
+        fill = array('l', offsets[:count])
+        for source, target, _ in self.edges():
+            sources[fill[target]] = source
+            fill[target] += 1
+        self._pred_offsets = offsets
+        self._pred_sources = sources
+
+
+def build_cfg(obj: TJSInterCodeContext) -> ControlFlowGraph:
+    """建立对象代码区的控制流图
+
+    只根据格式表计算指令长度，不生成任何文本，时间与代码长度成线性关系。
+    落在指令中间或代码区之外的跳转目标不产生边
+    """
+    return build_cfg_from_code(obj.code)
+
+def build_cfg_from_code(code: Sequence[int]) -> ControlFlowGraph:
+    end = len(code)
+    leader = bytearray(end + 1)
+    instr_starts = array('l')
+    if end:
+        leader[0] = 1
+
+    # 第一遍：记录指令起始位置，标记跳转目标、catch 块和块结束指令之后的位置
+    fixed_sizes = _FIXED_SIZES
+    flags = _BLOCK_END_FLAGS
+    table_size = len(fixed_sizes)
+    append = instr_starts.append
+    i = 0
+    while i < end:
+        append(i)
+        opcode = code[i]
+        if opcode >= table_size:
+            i += 1
+            continue
+        size = fixed_sizes[opcode]
+        if not size:
+            try:
+                size = instruction_size(code, i)
+            except IndexError:
+                # 代码区末尾被截断的指令
+                size = end - i
+        flag = flags[opcode]
+        if flag:
+            if flag == 2 and i + 1 < end:
+                target = i + code_offset(code[i + 1])
+                if 0 <= target < end:
+                    leader[target] = 1
+            leader[min(i + size, end)] = 1
+        i += size
+
+    # 第二遍：切分基本块，记录每个块的最后一条指令
+    starts = array('l')
+    lasts = array('l')
+    counts = array('l')
+    prev = -1
+    count = 0
+    for addr in instr_starts:
+        if leader[addr]:
+            if prev >= 0:
+                lasts.append(prev)
+                counts.append(count)
+            starts.append(addr)
+            count = 0
+        prev = addr
+        count += 1
+    if prev >= 0:
+        lasts.append(prev)
+        counts.append(count)
+    ends = array('l', starts[1:])
+    if starts:
+        ends.append(end)
+    block_of = {addr: b for b, addr in enumerate(starts)}
+
+    # 第三遍：按最后一条指令生成边，try 区域按地址顺序用栈跟踪
+    edge_offsets = array('l', [0])
+    edge_targets = array('l')
+    edge_kinds = array('b')
+    handlers: List[int] = []
+
+    def add_edge(address: int, kind: EdgeKind):
+        target = block_of.get(address)
+        if target is not None:
+            edge_targets.append(target)
+            edge_kinds.append(kind)
+
+    for b, last in enumerate(lasts):
+        opcode = code[last]
+        next_block = ends[b]
+        # 和第一遍一样，代码区末尾被截断、没有偏移量的跳转不产生跳转边
+        target = last + code_offset(code[last + 1]) if last + 1 < end else -1
+        if opcode == TJSVMOpcode.VM_JMP:
+            add_edge(target, EdgeKind.JUMP)
+        elif opcode == TJSVMOpcode.VM_JF or opcode == TJSVMOpcode.VM_JNF:
+            add_edge(next_block, EdgeKind.FALLTHROUGH)
+            add_edge(target, EdgeKind.BRANCH)
+        elif opcode == TJSVMOpcode.VM_ENTRY:
+            add_edge(next_block, EdgeKind.FALLTHROUGH)
+            if target >= 0:
+                handlers.append(target)
+                add_edge(target, EdgeKind.EXCEPTION)
+        elif opcode == TJSVMOpcode.VM_THROW:
+            if handlers:
+                add_edge(handlers[-1], EdgeKind.EXCEPTION)
+        elif opcode == TJSVMOpcode.VM_EXTRY:
+            if handlers:
+                handlers.pop()
+            add_edge(next_block, EdgeKind.FALLTHROUGH)
+        elif opcode != TJSVMOpcode.VM_RET:
+            add_edge(next_block, EdgeKind.FALLTHROUGH)
+        edge_offsets.append(len(edge_targets))
+
+    return ControlFlowGraph(starts, ends, counts, edge_offsets, edge_targets, edge_kinds)
@@ -0,0 +1,1079 @@
+"""把字节码还原成 TJS 源代码
+
+运行: python -m dissemble decompile <文件> [--object N] [--jobs N]
+
+分四个阶段，每个阶段只依赖同一个对象上一阶段的结果，结果按对象缓存：
+  lift         DisassembledInstruction -> 按基本块分组的 IR 语句，寄存器和标志位都是显式的
+  expressions  基本块内只使用一次的临时寄存器代入使用处，还原表达式
+  structure    按控制流图把跳转还原成 if/while/for/do-while/try
+  emit         生成 TJS 源代码文本
+对象之间互不依赖，整个文件可以按对象分到多个进程并行处理。
+寄存器按 TJS2 编译器的约定命名: %-1 为 this，%-2 为隐式的 this (成员直接写名字)，
+%-3 起为参数 arg0, arg1...，正数寄存器为 local1, local2...
+"""
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+import math
+import re
+
+from .cfg import ControlFlowGraph, build_cfg
+from .tjs_const import FuncArgType, TJSContextType, TJSVMOpcode, code_offset
+from .tjs_disassembler import TJSDisassembler
+from .tjs_entity import DisassembledInstruction, TJSDataArea, TJSInterCodeContext
+
+# IR 中标志寄存器的编号，在16位寄存器范围之外
+FLAG = 0x10000
+THIS = -1
+THIS_PROXY = -2
+
+# ---- IR 表达式 ----
+
+@dataclass(frozen=True, slots=True)
+class Const:
+    value: Any
+
+@dataclass(frozen=True, slots=True)
+class Reg:
+    n: int
+
+@dataclass(frozen=True, slots=True)
+class Raw:
+    """直接输出的文本，如 global、参数列表中的 ..."""
+    text: str
+
+@dataclass(frozen=True, slots=True)
+class Unary:
+    op: str
+    operand: 'Expr'
+    postfix: bool = False
+
+@dataclass(frozen=True, slots=True)
+class Binary:
+    op: str
+    left: 'Expr'
+    right: 'Expr'
+
+@dataclass(frozen=True, slots=True)
+class Member:
+    obj: 'Expr'
+    name: 'Expr'
+
+@dataclass(frozen=True, slots=True)
+class Call:
+    func: 'Expr'
+    args: Tuple['Expr', ...]
+    new: bool = False
+
+@dataclass(frozen=True, slots=True)
+class AssignExpr:
+    target: 'Expr'
+    op: str
+    value: 'Expr'
+
+type Expr = Const | Reg | Raw | Unary | Binary | Member | Call | AssignExpr
+
+# ---- IR 语句 ----
+
+@dataclass(frozen=True, slots=True)
+class Assign:
+    """寄存器 (或标志位) 赋值"""
+    dest: int
+    value: Expr
+
+@dataclass(frozen=True, slots=True)
+class Effect:
+    """只为副作用求值的表达式"""
+    expr: Expr
+
+@dataclass(frozen=True, slots=True)
+class SetResult:
+    """srv，设置返回值"""
+    value: Expr
+
+@dataclass(frozen=True, slots=True)
+class Return:
+    value: Optional[Expr] = None
+
+@dataclass(frozen=True, slots=True)
+class Throw:
+    value: Expr
+
+@dataclass(frozen=True, slots=True)
+class Branch:
+    """when 为 True 时标志位为真跳转 (jf)，否则为假跳转 (jnf)；target 在 lift 阶段是地址，之后是块号"""
+    cond: Expr
+    when: bool
+    target: int
+
+@dataclass(frozen=True, slots=True)
+class Jump:
+    target: int
+
+@dataclass(frozen=True, slots=True)
+class TryEnter:
+    catch: int
+    exreg: int
+
+@dataclass(frozen=True, slots=True)
+class TryExit:
+    pass
+
+@dataclass(frozen=True, slots=True)
+class Note:
+    """没有对应源代码语法的指令，输出为注释"""
+    text: str
+    args: Tuple[Expr, ...] = ()
+
+type Stmt = Assign | Effect | SetResult | Return | Throw | Branch | Jump | TryEnter | TryExit | Note
+
+# ---- 结构化之后的语句 ----
+
+@dataclass(slots=True)
+class If:
+    cond: Expr
+    then: List['Node']
+    orelse: List['Node'] = field(default_factory=list)
+
+@dataclass(slots=True)
+class Loop:
+    kind: str  # 'while', 'for', 'do'
+    cond: Expr
+    body: List['Node']
+    step: List[Stmt] = field(default_factory=list)
+
+@dataclass(slots=True)
+class Try:
+    body: List['Node']
+    exreg: int
+    catch: List['Node']
+
+@dataclass(frozen=True, slots=True)
+class Break:
+    pass
+
+@dataclass(frozen=True, slots=True)
+class Continue:
+    pass
+
+@dataclass(frozen=True, slots=True)
+class Goto:
+    """无法结构化的跳转，输出为注释"""
+    address: int
+    cond: Optional[Expr] = None
+
+type Node = Stmt | If | Loop | Try | Break | Continue | Goto
+
+@dataclass(slots=True)
+class LiftedFunction:
+    """lift 阶段的结果：控制流图和每个基本块的 IR 语句"""
+    graph: ControlFlowGraph
+    blocks: List[List[Stmt]]
+
+@dataclass(slots=True)
+class RecoveredBlock:
+    """expressions 阶段的结果，term 为块末尾的跳转 (目标已换成块号，代码区末尾为块数，不是块起始地址时为 -1)"""
+    address: int
+    stmts: List[Stmt]
+    term: Optional[Branch | Jump | TryEnter] = None
+
+# ---- lift ----
+
+_BINARY_OPS = {
+    TJSVMOpcode.VM_LOR: '||', TJSVMOpcode.VM_LAND: '&&', TJSVMOpcode.VM_BOR: '|',
+    TJSVMOpcode.VM_BXOR: '^', TJSVMOpcode.VM_BAND: '&', TJSVMOpcode.VM_SAR: '>>',
+    TJSVMOpcode.VM_SAL: '<<', TJSVMOpcode.VM_SR: '>>>', TJSVMOpcode.VM_ADD: '+',
+    TJSVMOpcode.VM_SUB: '-', TJSVMOpcode.VM_MOD: '%', TJSVMOpcode.VM_DIV: '/',
+    TJSVMOpcode.VM_IDIV: '\\', TJSVMOpcode.VM_MUL: '*',
+}
+_COMPARE_OPS = {
+    TJSVMOpcode.VM_CEQ: '==', TJSVMOpcode.VM_CDEQ: '===', TJSVMOpcode.VM_CLT: '<', TJSVMOpcode.VM_CGT: '>',
+}
+_UNARY_OPS = {
+    TJSVMOpcode.VM_LNOT: '!', TJSVMOpcode.VM_BNOT: '~', TJSVMOpcode.VM_TYPEOF: 'typeof ',
+    TJSVMOpcode.VM_ASC: '#', TJSVMOpcode.VM_CHR: '$', TJSVMOpcode.VM_NUM: '+', TJSVMOpcode.VM_CHS: '-',
+    TJSVMOpcode.VM_INV: 'invalidate ', TJSVMOpcode.VM_CHKINV: 'isvalid ', TJSVMOpcode.VM_INT: 'int ',
+    TJSVMOpcode.VM_REAL: 'real ', TJSVMOpcode.VM_STR: 'string ', TJSVMOpcode.VM_OCTET: 'octet ',
+}
+
+def negate(expr: Expr) -> Expr:
+    """逻辑取反，去掉双重否定，相等比较直接换成不等"""
+    if isinstance(expr, Unary) and expr.op == '!' and not expr.postfix:
+        return expr.operand
+    if isinstance(expr, Binary):
+        negated = {'==': '!=', '!=': '==', '===': '!==', '!==': '==='}.get(expr.op)
+        if negated:
+            return Binary(negated, expr.left, expr.right)
+    return Unary('!', expr)
+
+def _dest(r: int, expr: Expr) -> Stmt:
+    """结果写入 %r，%0 表示丢弃结果"""
+    return Assign(r, expr) if r else Effect(expr)
+
+def _const(data: TJSInterCodeContext.Data, index: int) -> Const:
+    value = data[index]
+    if isinstance(value, memoryview):
+        value = value.tobytes()
+    return Const(value)
+
+def _call_args(w: Sequence[int], pos: int) -> Tuple[Expr, ...]:
+    """call 系列的参数列表，pos 为参数个数的位置，w 已按有符号数解释"""
+    num = w[pos]
+    if num == -1:
+        return (Raw('...'),)
+    if num == -2:
+        args = []
+        for j in range(w[pos + 1]):
+            arg_type, reg = w[pos + 2 + j * 2], w[pos + 3 + j * 2]
+            if arg_type == FuncArgType.fatExpand.value:
+                args.append(Unary('*', Reg(reg), postfix=True))
+            elif arg_type == FuncArgType.fatUnnamedExpand.value:
+                args.append(Raw('*'))
+            else:
+                args.append(Reg(reg))
+        return tuple(args)
+    return tuple(Reg(r) for r in w[pos + 1:pos + 1 + num])
+
+type Lifter = Callable[[int, Sequence[int], TJSInterCodeContext.Data], List[Stmt]]
+
+def _build_lifters() -> Dict[int, Lifter]:
+    op = TJSVMOpcode
+    R = Reg
+    flag = Reg(FLAG)
+    lifters: Dict[int, Lifter] = {
+        op.VM_NOP: lambda a, w, d: [],
+        op.VM_CONST: lambda a, w, d: [Assign(w[0], _const(d, w[1]))],
+        op.VM_CP: lambda a, w, d: [Assign(w[0], R(w[1]))],
+        op.VM_CL: lambda a, w, d: [Assign(w[0], Const(None))],
+        op.VM_CCL: lambda a, w, d: [Assign(r, Const(None)) for r in range(w[0], w[0] + w[1])],
+        op.VM_TT: lambda a, w, d: [Assign(FLAG, R(w[0]))],
+        op.VM_TF: lambda a, w, d: [Assign(FLAG, negate(R(w[0])))],
+        op.VM_SETF: lambda a, w, d: [Assign(w[0], flag)],
+        op.VM_SETNF: lambda a, w, d: [Assign(w[0], negate(flag))],
+        op.VM_NF: lambda a, w, d: [Assign(FLAG, negate(flag))],
+        op.VM_JF: lambda a, w, d: [Branch(flag, True, a + w[0])],
+        op.VM_JNF: lambda a, w, d: [Branch(flag, False, a + w[0])],
+        op.VM_JMP: lambda a, w, d: [Jump(a + w[0])],
+        op.VM_EVAL: lambda a, w, d: [Assign(w[0], Unary('!', R(w[0]), postfix=True))],
+        op.VM_EEXP: lambda a, w, d: [Effect(Unary('!', R(w[0]), postfix=True))],
+        op.VM_CHKINS: lambda a, w, d: [Assign(w[0], Binary('instanceof', R(w[0]), R(w[1])))],
+        op.VM_CALL: lambda a, w, d: [_dest(w[0], Call(R(w[1]), _call_args(w, 2)))],
+        op.VM_CALLD: lambda a, w, d: [_dest(w[0], Call(Member(R(w[1]), _const(d, w[2])), _call_args(w, 3)))],
+        op.VM_CALLI: lambda a, w, d: [_dest(w[0], Call(Member(R(w[1]), R(w[2])), _call_args(w, 3)))],
+        op.VM_NEW: lambda a, w, d: [_dest(w[0], Call(R(w[1]), _call_args(w, 2), new=True))],
+        op.VM_SETP: lambda a, w, d: [Effect(AssignExpr(Unary('*', R(w[0])), '=', R(w[1])))],
+        op.VM_GETP: lambda a, w, d: [_dest(w[0], Unary('*', R(w[1])))],
+        op.VM_DELD: lambda a, w, d: [_dest(w[0], Unary('delete ', Member(R(w[1]), _const(d, w[2]))))],
+        op.VM_DELI: lambda a, w, d: [_dest(w[0], Unary('delete ', Member(R(w[1]), R(w[2]))))],
+        op.VM_TYPEOFD: lambda a, w, d: [_dest(w[0], Unary('typeof ', Member(R(w[1]), _const(d, w[2]))))],
+        op.VM_TYPEOFI: lambda a, w, d: [_dest(w[0], Unary('typeof ', Member(R(w[1]), R(w[2]))))],
+        op.VM_SRV: lambda a, w, d: [SetResult(R(w[0]))],
+        op.VM_RET: lambda a, w, d: [Return()],
+        op.VM_ENTRY: lambda a, w, d: [TryEnter(a + w[0], w[1])],
+        op.VM_EXTRY: lambda a, w, d: [TryExit()],
+        op.VM_THROW: lambda a, w, d: [Throw(R(w[0]))],
+        op.VM_CHGTHIS: lambda a, w, d: [Assign(w[0], Binary('incontextof', R(w[0]), R(w[1])))],
+        op.VM_GLOBAL: lambda a, w, d: [Assign(w[0], Raw('global'))],
+        op.VM_ADDCI: lambda a, w, d: [Note('extends', (R(w[1]),))],
+        op.VM_REGMEMBER: lambda a, w, d: [Note('regmember')],
+        op.VM_DEBUGGER: lambda a, w, d: [Effect(Raw('debugger'))],
+    }
+    for opcode, symbol in _COMPARE_OPS.items():
+        lifters[opcode] = lambda a, w, d, s=symbol: [Assign(FLAG, Binary(s, R(w[0]), R(w[1])))]
+    for opcode, symbol in _UNARY_OPS.items():
+        lifters[opcode] = lambda a, w, d, s=symbol: [Assign(w[0], Unary(s, R(w[0])))]
+    for opcode in (op.VM_GPD, op.VM_GPDS):
+        lifters[opcode] = lambda a, w, d: [_dest(w[0], Member(R(w[1]), _const(d, w[2])))]
+    for opcode in (op.VM_GPI, op.VM_GPIS):
+        lifters[opcode] = lambda a, w, d: [_dest(w[0], Member(R(w[1]), R(w[2])))]
+    for opcode in (op.VM_SPD, op.VM_SPDE, op.VM_SPDEH, op.VM_SPDS):
+        lifters[opcode] = lambda a, w, d: [Effect(AssignExpr(Member(R(w[0]), _const(d, w[1])), '=', R(w[2])))]
+    for opcode in (op.VM_SPI, op.VM_SPIE, op.VM_SPIS):
+        lifters[opcode] = lambda a, w, d: [Effect(AssignExpr(Member(R(w[0]), R(w[1])), '=', R(w[2])))]
+
+    # 自增自减：基本形式直接改写寄存器，pd/pi/p 变体是前缀 ++/-- 表达式
+    for base, symbol in ((op.VM_INC, '+'), (op.VM_DEC, '-')):
+        lifters[base] = lambda a, w, d, s=symbol: [Assign(w[0], Binary(s, R(w[0]), Const(1)))]
+        lifters[base + 1] = lambda a, w, d, s=symbol * 2: [_dest(w[0], Unary(s, Member(R(w[1]), _const(d, w[2]))))]
+        lifters[base + 2] = lambda a, w, d, s=symbol * 2: [_dest(w[0], Unary(s, Member(R(w[1]), R(w[2]))))]
+        lifters[base + 3] = lambda a, w, d, s=symbol * 2: [_dest(w[0], Unary(s, Unary('*', R(w[1]))))]
+    # 二元运算：基本形式为 %a = %a op %b，pd/pi/p 变体为复合赋值表达式
+    for base, symbol in _BINARY_OPS.items():
+        compound = symbol + '='
+        lifters[base] = lambda a, w, d, s=symbol: [Assign(w[0], Binary(s, R(w[0]), R(w[1])))]
+        lifters[base + 1] = lambda a, w, d, s=compound: [
+            _dest(w[0], AssignExpr(Member(R(w[1]), _const(d, w[2])), s, R(w[3])))]
+        lifters[base + 2] = lambda a, w, d, s=compound: [
+            _dest(w[0], AssignExpr(Member(R(w[1]), R(w[2])), s, R(w[3])))]
+        lifters[base + 3] = lambda a, w, d, s=compound: [
+            _dest(w[0], AssignExpr(Unary('*', R(w[1])), s, R(w[2])))]
+    return lifters
+
+_LIFTERS = _build_lifters()
+
+def lift(obj: TJSInterCodeContext, instructions: Iterator[DisassembledInstruction]) -> LiftedFunction:
+    """把一个对象的指令翻译成 IR 语句，按控制流图的基本块分组"""
+    graph = build_cfg(obj)
+    blocks: List[List[Stmt]] = [[] for _ in range(len(graph))]
+    starts = graph.starts
+    data = obj.data
+    block = -1
+    next_start = 0
+    for instr in instructions:
+        while block + 1 < len(starts) and instr.address >= next_start:
+            block += 1
+            next_start = starts[block + 1] if block + 1 < len(starts) else len(obj.code)
+        lifter = _LIFTERS.get(instr.opcode_value)
+        if lifter is None:
+            blocks[block].append(Note(f'unknown opcode {instr.opcode_value}'))
+            continue
+        words = [code_offset(word) for word in instr.words]
+        try:
+            blocks[block].extend(lifter(instr.address, words, data))
+        except IndexError:
+            # 代码区末尾被截断的指令，或数据区索引越界
+            blocks[block].append(Note(f'malformed {instr.opcode}'))
+    return LiftedFunction(graph, blocks)
+
+# ---- expressions ----
+
+def expr_regs(expr: Expr, out: List[int]):
+    """把表达式读取的寄存器加入 out"""
+    match expr:
+        case Reg(n):
+            out.append(n)
+        case Unary(_, operand, _):
+            expr_regs(operand, out)
+        case Binary(_, left, right):
+            expr_regs(left, out)
+            expr_regs(right, out)
+        case Member(obj, name):
+            expr_regs(obj, out)
+            expr_regs(name, out)
+        case Call(func, args, _):
+            expr_regs(func, out)
+            for arg in args:
+                expr_regs(arg, out)
+        case AssignExpr(target, _, value):
+            expr_regs(target, out)
+            expr_regs(value, out)
+
+def is_pure(expr: Expr) -> bool:
+    """求值没有副作用并且不读取对象成员，可以安全地推迟到使用处"""
+    match expr:
+        case Const() | Reg() | Raw():
+            return True
+        case Unary(op, operand, postfix):
+            return not postfix and op not in ('*', '++', '--', 'delete ', 'invalidate ') and is_pure(operand)
+        case Binary(_, left, right):
+            return is_pure(left) and is_pure(right)
+    return False
+
+def _stmt_exprs(stmt: Stmt) -> Tuple[Expr, ...]:
+    match stmt:
+        case Assign(_, value) | SetResult(value) | Throw(value):
+            return (value,)
+        case Effect(expr):
+            return (expr,)
+        case Return(value):
+            return (value,) if value is not None else ()
+        case Branch(cond, _, _):
+            return (cond,)
+        case Note(_, args):
+            return args
+    return ()
+
+def stmt_uses(stmt: Stmt) -> List[int]:
+    regs: List[int] = []
+    for expr in _stmt_exprs(stmt):
+        expr_regs(expr, regs)
+    return regs
+
+def stmt_def(stmt: Stmt) -> Optional[int]:
+    if isinstance(stmt, Assign):
+        return stmt.dest
+    if isinstance(stmt, TryEnter):
+        return stmt.exreg
+    return None
+
+def _substitute(expr: Expr, pending: Dict[int, Tuple[Expr, frozenset, bool]]) -> Expr:
+    """把读取的待代入寄存器换成它的表达式，每个待代入寄存器只使用一次"""
+    match expr:
+        case Reg(n):
+            entry = pending.pop(n, None)
+            return expr if entry is None else entry[0]
+        case Unary(op, operand, postfix):
+            new = _substitute(operand, pending)
+            return expr if new is operand else Unary(op, new, postfix)
+        case Binary(op, left, right):
+            new_left = _substitute(left, pending)
+            new_right = _substitute(right, pending)
+            return expr if new_left is left and new_right is right else Binary(op, new_left, new_right)
+        case Member(obj, name):
+            new_obj = _substitute(obj, pending)
+            new_name = _substitute(name, pending)
+            return expr if new_obj is obj and new_name is name else Member(new_obj, new_name)
+        case Call(func, args, new):
+            new_func = _substitute(func, pending)
+            new_args = tuple(_substitute(arg, pending) for arg in args)
+            return Call(new_func, new_args, new)
+        case AssignExpr(target, op, value):
+            new_target = _substitute(target, pending)
+            new_value = _substitute(value, pending)
+            return expr if new_target is target and new_value is value else AssignExpr(new_target, op, new_value)
+    return expr
+
+def _substitute_stmt(stmt: Stmt, pending: Dict[int, Tuple[Expr, frozenset, bool]]) -> Stmt:
+    if not pending:
+        return stmt
+    match stmt:
+        case Assign(dest, value):
+            return Assign(dest, _substitute(value, pending))
+        case Effect(expr):
+            return Effect(_substitute(expr, pending))
+        case SetResult(value):
+            return SetResult(_substitute(value, pending))
+        case Return(value) if value is not None:
+            return Return(_substitute(value, pending))
+        case Throw(value):
+            return Throw(_substitute(value, pending))
+        case Branch(cond, when, target):
+            return Branch(_substitute(cond, pending), when, target)
+        case Note(text, args) if args:
+            return Note(text, tuple(_substitute(arg, pending) for arg in args))
+    return stmt
+
+def live_out_sets(lifted: LiftedFunction) -> List[Set[int]]:
+    """每个块出口处活跃的寄存器，标准的后向数据流迭代"""
+    graph = lifted.graph
+    count = len(lifted.blocks)
+    uses: List[Set[int]] = []
+    defs: List[Set[int]] = []
+    for stmts in lifted.blocks:
+        used: Set[int] = set()
+        defined: Set[int] = set()
+        for stmt in stmts:
+            used.update(r for r in stmt_uses(stmt) if r not in defined)
+            d = stmt_def(stmt)
+            if d is not None:
+                defined.add(d)
+        uses.append(used)
+        defs.append(defined)
+
+    offsets, targets = graph.edge_offsets, graph.edge_targets
+    live_in: List[Set[int]] = [set() for _ in range(count)]
+    live_out: List[Set[int]] = [set() for _ in range(count)]
+    changed = True
+    while changed:
+        changed = False
+        for b in reversed(range(count)):
+            out: Set[int] = set()
+            for e in range(offsets[b], offsets[b + 1]):
+                out |= live_in[targets[e]]
+            live_out[b] = out
+            new_in = uses[b] | (out - defs[b])
+            if new_in != live_in[b]:
+                live_in[b] = new_in
+                changed = True
+    return live_out
+
+_MANY = 2
+
+def recover_expressions(lifted: LiftedFunction) -> List[RecoveredBlock]:
+    """块内只读取一次、之后不再活跃的寄存器赋值代入到读取处
+
+    推迟求值不能改变副作用的顺序：输出有副作用的语句之前先输出所有待代入的非纯表达式，
+    输出写寄存器 r 的语句之前先输出读取 r 的待代入表达式
+    """
+    graph = lifted.graph
+    live_out = live_out_sets(lifted)
+    recovered: List[RecoveredBlock] = []
+
+    code_end = graph.ends[-1] if len(graph) else 0
+
+    def block_of(address: int) -> int:
+        if address == code_end:
+            # 跳到代码区末尾：最后一个块之后的自然去向
+            return len(graph)
+        b = graph.block_at(address)
+        return b if b >= 0 and graph.starts[b] == address else -1
+
+    for b, stmts in enumerate(lifted.blocks):
+        # 后向扫描：每个赋值之后、下一次赋值之前的读取次数，出口活跃的寄存器按多次计算
+        counts = dict.fromkeys(live_out[b], _MANY)
+        inline = [False] * len(stmts)
+        for i in range(len(stmts) - 1, -1, -1):
+            stmt = stmts[i]
+            d = stmt_def(stmt)
+            if d is not None:
+                inline[i] = isinstance(stmt, Assign) and counts.get(d, 0) == 1
+                counts[d] = 0
+            for r in stmt_uses(stmt):
+                counts[r] = min(counts.get(r, 0) + 1, _MANY)
+
+        out: List[Stmt] = []
+        # 寄存器 -> (表达式, 读取的寄存器, 是否为纯表达式)，按赋值顺序排列
+        pending: Dict[int, Tuple[Expr, frozenset, bool]] = {}
+
+        def flush(keep: Callable[[int, Tuple[Expr, frozenset, bool]], bool]):
+            """按顺序输出待代入的赋值，直到最后一个不满足 keep 的为止"""
+            keys = list(pending)
+            last = -1
+            for k, key in enumerate(keys):
+                if not keep(key, pending[key]):
+                    last = k
+            for key in keys[:last + 1]:
+                out.append(Assign(key, pending.pop(key)[0]))
+
+        for i, stmt in enumerate(stmts):
+            stmt = _substitute_stmt(stmt, pending)
+            if inline[i]:
+                regs: List[int] = []
+                expr_regs(stmt.value, regs)
+                pending[stmt.dest] = (stmt.value, frozenset(regs), is_pure(stmt.value))
+                continue
+            if pending:
+                if not (isinstance(stmt, Assign) and is_pure(stmt.value)):
+                    flush(lambda key, entry: entry[2])
+                d = stmt_def(stmt)
+                if d is not None:
+                    flush(lambda key, entry: d not in entry[1] and key != d)
+            out.append(stmt)
+        flush(lambda key, entry: False)
+
+        # srv 紧跟 ret 合并为 return 表达式
+        merged: List[Stmt] = []
+        for stmt in out:
+            if isinstance(stmt, Return) and stmt.value is None and merged and isinstance(merged[-1], SetResult):
+                stmt = Return(merged.pop().value)
+            merged.append(stmt)
+
+        block = RecoveredBlock(graph.starts[b], merged)
+        if merged:
+            last = merged[-1]
+            if isinstance(last, Branch):
+                block.term = Branch(last.cond, last.when, block_of(last.target))
+            elif isinstance(last, Jump):
+                block.term = Jump(block_of(last.target))
+            elif isinstance(last, TryEnter):
+                block.term = TryEnter(block_of(last.catch), last.exreg)
+            if block.term is not None:
+                merged.pop()
+        recovered.append(block)
+    return recovered
+
+# ---- structure ----
+
+class _Structurer:
+    """在按地址排列的块区间上递归还原结构
+
+    区间 [lo, hi) 之后的控制流去向为 follow，break/continue 分别跳到 brk/cont，不在循环中时为 None。
+    跳到 follow 的区间末尾跳转是自然的顺序执行，其它无法匹配的跳转 (包括目标为 -1 的) 输出为 Goto 注释
+    """
+    MAX_DEPTH = 100
+
+    def __init__(self, blocks: List[RecoveredBlock], graph: ControlFlowGraph):
+        self.blocks = blocks
+        self.graph = graph
+        # 循环头 -> 跳回它的最后一个块
+        self.tails: Dict[int, int] = {}
+        for b, block in enumerate(blocks):
+            term = block.term
+            if isinstance(term, (Branch, Jump)) and 0 <= term.target <= b:
+                self.tails[term.target] = max(self.tails.get(term.target, -1), b)
+        self.active: Set[int] = set()   # 正在结构化的循环头
+        self.dropped: Set[int] = set()  # 跳转已经并入循环条件的块
+        self.depth = 0
+
+    def run(self) -> List[Node]:
+        count = len(self.blocks)
+        return self.range(0, count, count, None, None)
+
+    def jump_condition(self, term: Branch) -> Expr:
+        return term.cond if term.when else negate(term.cond)
+
+    def address(self, target: int) -> int:
+        """块号对应的地址，代码区末尾为代码长度，无法解析的目标为 -1"""
+        if 0 <= target < len(self.blocks):
+            return self.blocks[target].address
+        if target == len(self.blocks) and target:
+            return self.graph.ends[-1]
+        return -1
+
+    def goto(self, b: int, target: int, cond: Optional[Expr] = None) -> Goto:
+        return Goto(self.address(target), cond)
+
+    def catch_note(self, catch: int) -> Note:
+        address = self.address(catch)
+        return Note('try, catch at', (Raw(f'0x{address:04X}' if address >= 0 else '?'),))
+
+    def range(self, lo: int, hi: int, follow: int, brk: Optional[int], cont: Optional[int]) -> List[Node]:
+        if self.depth >= self.MAX_DEPTH:
+            return self.flat(lo, hi)
+        self.depth += 1
+        try:
+            return self._range(lo, hi, follow, brk, cont)
+        finally:
+            self.depth -= 1
+
+    def flat(self, lo: int, hi: int) -> List[Node]:
+        """嵌套过深时不再结构化，按块顺序输出语句和跳转"""
+        nodes: List[Node] = []
+        for b in range(lo, hi):
+            block = self.blocks[b]
+            nodes.extend(block.stmts)
+            term = block.term
+            if isinstance(term, Branch) and b not in self.dropped:
+                nodes.append(self.goto(b, term.target, self.jump_condition(term)))
+            elif isinstance(term, Jump) and b not in self.dropped:
+                nodes.append(self.goto(b, term.target))
+            elif isinstance(term, TryEnter):
+                nodes.append(self.catch_note(term.catch))
+        return nodes
+
+    def _range(self, lo: int, hi: int, follow: int, brk: Optional[int], cont: Optional[int]) -> List[Node]:
+        nodes: List[Node] = []
+        blocks = self.blocks
+        b = lo
+        while b < hi:
+            tail = self.tails.get(b, -1)
+            if b <= tail < hi and b not in self.active:
+                nodes.append(self.loop(b, tail, brk, cont))
+                b = tail + 1
+                continue
+
+            block = blocks[b]
+            nodes.extend(block.stmts)
+            term = None if b in self.dropped else block.term
+            # 落到区间末尾时的自然去向
+            natural = b + 1 if b + 1 < hi else follow
+
+            if isinstance(term, Branch):
+                t = term.target
+                jc = self.jump_condition(term)
+                if t == natural:
+                    if not is_pure(jc):
+                        nodes.append(Effect(jc))
+                elif t == brk:
+                    nodes.append(If(jc, [Break()]))
+                elif t == cont:
+                    nodes.append(If(jc, [Continue()]))
+                elif b < t < hi or (t == hi and hi == follow):
+                    end = t
+                    last = blocks[t - 1].term if t - 1 > b else None
+                    if (isinstance(last, Jump) and t - 1 not in self.dropped and t < last.target
+                            and (last.target < hi or last.target == follow) and self.tails.get(last.target, -1) < t):
+                        end = last.target
+                        then = self.range(b + 1, t, end, brk, cont)
+                        orelse = self.range(t, end, end, brk, cont) if end <= hi else []
+                    else:
+                        then = self.range(b + 1, t, t, brk, cont)
+                        orelse = []
+                    nodes.append(If(negate(jc), then, orelse))
+                    b = min(end, hi)
+                    continue
+                else:
+                    nodes.append(self.goto(b, t, jc))
+            elif isinstance(term, Jump):
+                t = term.target
+                if t == natural:
+                    pass
+                elif t == brk:
+                    nodes.append(Break())
+                elif t == cont:
+                    nodes.append(Continue())
+                else:
+                    nodes.append(self.goto(b, t))
+            elif isinstance(term, TryEnter):
+                c = term.catch
+                if b < c < hi:
+                    end = hi
+                    last = blocks[c - 1].term
+                    if c - 1 > b and isinstance(last, Jump) and c < last.target <= hi:
+                        end = last.target
+                    body = self.range(b + 1, c, end, brk, cont)
+                    catch = self.range(c, end, end if end < hi else follow, brk, cont)
+                    nodes.append(Try(body, term.exreg, catch))
+                    b = end
+                    continue
+                nodes.append(self.catch_note(c))
+            b += 1
+        return nodes
+
+    def loop(self, head: int, tail: int, brk: Optional[int], cont: Optional[int]) -> Loop:
+        blocks = self.blocks
+        exit_ = tail + 1
+        self.active.add(head)
+        try:
+            tail_term = blocks[tail].term
+            if isinstance(tail_term, Branch):
+                # 条件回边：do { } while (cond)
+                self.dropped.add(tail)
+                body = self.range(head, exit_, tail, exit_, tail)
+                return Loop('do', self.jump_condition(tail_term), body)
+
+            # 无条件回边：while/for，回边所在块被 continue 跳转到时作为 for 的步进部分
+            loop_cont = head
+            body_hi = exit_
+            step: List[Stmt] = []
+            tail_stmts = blocks[tail].stmts
+            if (tail > head and tail_stmts and len(self.graph.predecessors(tail)) > 1
+                    and all(isinstance(stmt, (Assign, Effect)) for stmt in tail_stmts)):
+                loop_cont = tail
+                body_hi = tail
+                step = tail_stmts
+
+            head_term = blocks[head].term
+            if (isinstance(head_term, Branch) and head_term.target == exit_ and not blocks[head].stmts
+                    and head < body_hi):
+                self.dropped.add(head)
+                cond = negate(self.jump_condition(head_term))
+                body = self.range(head + 1, body_hi, loop_cont, exit_, loop_cont)
+            else:
+                cond = Const(True)
+                body = self.range(head, body_hi, loop_cont, exit_, loop_cont)
+                step = [] if loop_cont == head else step
+            return Loop('for' if step else 'while', cond, body, step)
+        finally:
+            self.active.discard(head)
+
+def structure(blocks: List[RecoveredBlock], graph: ControlFlowGraph) -> List[Node]:
+    """把块和跳转还原成结构化语句"""
+    return _Structurer(blocks, graph).run()
+
+# ---- emit ----
+
+_PRECEDENCE = {
+    '||': 3, '&&': 4, '|': 5, '^': 6, '&': 7,
+    '==': 8, '!=': 8, '===': 8, '!==': 8,
+    '<': 9, '>': 9, '<=': 9, '>=': 9, 'instanceof': 9,
+    '<<': 10, '>>': 10, '>>>': 10, '+': 11, '-': 11,
+    '*': 12, '/': 12, '%': 12, '\\': 12, 'incontextof': 14,
+}
+_ASSIGN, _UNARY, _POSTFIX, _PRIMARY = 1, 13, 15, 16
+_COMPOUND = {'+', '-', '*', '/', '%', '\\', '|', '&', '^', '<<', '>>', '>>>', '||', '&&'}
+_IDENTIFIER = re.compile(r'[A-Za-z_\u0080-\uffff][\w\u0080-\uffff]*\Z')
+_ESCAPES = {i: f'\\x{i:02X}' for i in range(0x20)}
+_ESCAPES.update({ord('\\'): '\\\\', ord('"'): '\\"', ord('\n'): '\\n', ord('\r'): '\\r', ord('\t'): '\\t'})
+
+def literal(value: Any) -> str:
+    """常量的 TJS 字面量"""
+    if value is None:
+        return 'void'
+    if isinstance(value, str):
+        return '"' + value.translate(_ESCAPES) + '"'
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return '<% ' + bytes(value).hex(' ') + ' %>'
+    if isinstance(value, float):
+        if math.isnan(value):
+            return 'NaN'
+        if math.isinf(value):
+            return 'Infinity' if value > 0 else '-Infinity'
+        return repr(value)
+    if isinstance(value, TJSInterCodeContext):
+        return value.name or 'function'
+    return str(value)
+
+def reg_name(n: int) -> str:
+    if n == FLAG:
+        return 'flag'
+    if n == THIS or n == THIS_PROXY:
+        return 'this'
+    if n < THIS_PROXY:
+        return f'arg{THIS_PROXY - 1 - n}'
+    return f'local{n}'
+
+def render(expr: Expr, need: int = 0) -> str:
+    """生成表达式文本，优先级低于 need 时加括号"""
+    match expr:
+        case Const(value):
+            text = literal(value)
+            prec = _UNARY if text.startswith('-') else _PRIMARY
+        case Reg(n):
+            text, prec = reg_name(n), _PRIMARY
+        case Raw(text):
+            prec = _PRIMARY
+        case Unary(op, operand, postfix):
+            if postfix:
+                text, prec = render(operand, _POSTFIX) + op, _POSTFIX
+            else:
+                # 避免 - -x 被写成 --x
+                inner = render(operand, _UNARY)
+                sep = ' ' if op in ('+', '-') and inner[:1] in ('+', '-') else ''
+                text, prec = op + sep + inner, _UNARY
+        case Binary(op, left, right):
+            prec = _PRECEDENCE[op]
+            text = f"{render(left, prec)} {op} {render(right, prec + 1)}"
+        case Member(obj, Const(str() as name)) if _IDENTIFIER.match(name):
+            if obj == Reg(THIS_PROXY):
+                text = name
+            else:
+                text = f"{render(obj, _POSTFIX)}.{name}"
+            prec = _POSTFIX
+        case Member(obj, name):
+            text, prec = f"{render(obj, _POSTFIX)}[{render(name)}]", _POSTFIX
+        case Call(func, args, new):
+            text = f"{render(func, _POSTFIX)}({', '.join(render(arg, _ASSIGN) for arg in args)})"
+            if new:
+                text = 'new ' + text
+            prec = _POSTFIX
+        case AssignExpr(target, op, value):
+            text, prec = f"{render(target, _POSTFIX)} {op} {render(value, _ASSIGN)}", _ASSIGN
+        case _:
+            text, prec = repr(expr), _PRIMARY
+    return f"({text})" if prec < need else text
+
+def render_stmt(stmt: Stmt) -> str:
+    """单条语句的文本，不含结尾的分号"""
+    match stmt:
+        case Assign(dest, Binary(op, Reg(left), right)) if left == dest and op in _COMPOUND:
+            name = reg_name(dest)
+            if right == Const(1) and op in ('+', '-'):
+                return f"{name}{op * 2}"
+            return f"{name} {op}= {render(right, _ASSIGN)}"
+        case Assign(dest, value):
+            return f"{reg_name(dest)} = {render(value, _ASSIGN)}"
+        case Effect(expr):
+            return render(expr)
+        case Return(value):
+            return 'return' if value is None else f"return {render(value)}"
+        case Throw(value):
+            return f"throw {render(value)}"
+    return ''
+
+def _collect_locals(nodes: List[Node], out: Set[int]):
+    for node in nodes:
+        match node:
+            case If(cond, then, orelse):
+                expr_regs(cond, out_list := [])
+                out.update(out_list)
+                _collect_locals(then, out)
+                _collect_locals(orelse, out)
+            case Loop(_, cond, body, step):
+                expr_regs(cond, out_list := [])
+                out.update(out_list)
+                _collect_locals(body, out)
+                _collect_locals(step, out)
+            case Try(body, _, catch):
+                _collect_locals(body, out)
+                _collect_locals(catch, out)
+            case Goto(_, cond) if cond is not None:
+                expr_regs(cond, out_list := [])
+                out.update(out_list)
+            case _:
+                out.update(stmt_uses(node))
+                d = stmt_def(node)
+                if d is not None:
+                    out.add(d)
+
+def signature(obj: TJSInterCodeContext) -> Tuple[str, str]:
+    """对象的函数头和结尾，顶层代码没有函数头"""
+    name = obj.name or ''
+    args = [f'arg{i}' for i in range(obj.func_decl_arg_count)]
+    if obj.func_decl_collapse_base >= 0:
+        args.append('*')
+    args_text = ', '.join(args)
+    match obj.context_type:
+        case TJSContextType.ctTopLevel:
+            return '', ''
+        case TJSContextType.ctClass:
+            return f"class {name} {{", '}'
+        case TJSContextType.ctProperty:
+            return f"property {name} {{", '}'
+        case TJSContextType.ctPropertyGetter:
+            return f"getter() {{ // {name}", '}'
+        case TJSContextType.ctPropertySetter:
+            return f"setter({args_text}) {{ // {name}", '}'
+        case TJSContextType.ctSuperClassGetter:
+            return f"{{ // super class getter {name}", '}'
+    return f"function {name}({args_text}) {{", '}'
+
+class _Emitter:
+    INDENT = '    '
+
+    def __init__(self):
+        self.lines: List[str] = []
+
+    def line(self, depth: int, text: str):
+        self.lines.append(self.INDENT * depth + text)
+
+    def block(self, nodes: List[Node], depth: int):
+        for node in nodes:
+            self.node(node, depth)
+
+    def node(self, node: Node, depth: int):
+        match node:
+            case If(cond, then, orelse):
+                if not then and orelse:
+                    cond, then, orelse = negate(cond), orelse, []
+                self.line(depth, f"if ({render(cond)}) {{")
+                self.block(then, depth + 1)
+                # else if 链
+                while len(orelse) == 1 and isinstance(orelse[0], If) and (orelse[0].then or not orelse[0].orelse):
+                    nested = orelse[0]
+                    self.line(depth, f"}} else if ({render(nested.cond)}) {{")
+                    self.block(nested.then, depth + 1)
+                    orelse = nested.orelse
+                if orelse:
+                    self.line(depth, "} else {")
+                    self.block(orelse, depth + 1)
+                self.line(depth, "}")
+            case Loop('do', cond, body, _):
+                self.line(depth, "do {")
+                self.block(body, depth + 1)
+                self.line(depth, f"}} while ({render(cond)});")
+            case Loop('for', cond, body, step):
+                steps = ', '.join(render_stmt(stmt) for stmt in step)
+                self.line(depth, f"for (; {render(cond)}; {steps}) {{")
+                self.block(body, depth + 1)
+                self.line(depth, "}")
+            case Loop(_, cond, body, _):
+                self.line(depth, f"while ({render(cond)}) {{")
+                self.block(body, depth + 1)
+                self.line(depth, "}")
+            case Try(body, exreg, catch):
+                self.line(depth, "try {")
+                self.block(body, depth + 1)
+                self.line(depth, f"}} catch ({reg_name(exreg)}) {{")
+                self.block(catch, depth + 1)
+                self.line(depth, "}")
+            case Break():
+                self.line(depth, "break;")
+            case Continue():
+                self.line(depth, "continue;")
+            case Goto(address, cond):
+                target = f"0x{address:04X}" if address >= 0 else "?"
+                prefix = f"if ({render(cond)}) " if cond is not None else ""
+                self.line(depth, f"// {prefix}goto {target}")
+            case Note(text, args):
+                self.line(depth, f"// {text} {', '.join(render(arg) for arg in args)}".rstrip())
+            case SetResult(value):
+                self.line(depth, f"// result = {render(value)}")
+            case TryExit():
+                pass
+            case _:
+                self.line(depth, render_stmt(node) + ';')
+
+def emit(obj: TJSInterCodeContext, nodes: List[Node]) -> str:
+    """生成一个对象的 TJS 源代码"""
+    if nodes and nodes[-1] == Return():
+        # 函数末尾隐含的 ret
+        nodes = nodes[:-1]
+    header, footer = signature(obj)
+    depth = 1 if header else 0
+    emitter = _Emitter()
+    if header:
+        emitter.line(0, header)
+    regs: Set[int] = set()
+    _collect_locals(nodes, regs)
+    local_regs = sorted(r for r in regs if 0 < r < FLAG)
+    if FLAG in regs:
+        local_regs.append(FLAG)
+    if local_regs:
+        emitter.line(depth, f"var {', '.join(reg_name(r) for r in local_regs)};")
+    emitter.block(nodes, depth)
+    if footer:
+        emitter.line(0, footer)
+    return '\n'.join(emitter.lines) + '\n'
+
+# ---- 流水线 ----
+
+class Decompiler:
+    """按对象运行四个阶段，每个阶段的结果按对象索引缓存
+
+    各阶段只读取同一个对象上一阶段的结果，清除某个阶段的缓存后只会重算它和之后的阶段
+    """
+    STAGES = ('lift', 'expressions', 'structure', 'emit')
+
+    def __init__(self, top_obj: Optional[TJSInterCodeContext],
+                 objects: List[TJSInterCodeContext], data_area: TJSDataArea):
+        self.objects = objects
+        self.disassembler = TJSDisassembler(top_obj, objects, data_area)
+        self.cache: Dict[str, Dict[int, Any]] = {stage: {} for stage in self.STAGES}
+
+    def clear_cache(self, stage: Optional[str] = None):
+        """清除 stage 及之后阶段的缓存，stage 缺省时清除全部"""
+        start = self.STAGES.index(stage) if stage else 0
+        for name in self.STAGES[start:]:
+            self.cache[name].clear()
+
+    def _cached(self, stage: str, obj_index: int, compute: Callable[[], Any]) -> Any:
+        cache = self.cache[stage]
+        result = cache.get(obj_index)
+        if result is None:
+            result = compute()
+            cache[obj_index] = result
+        return result
+
+    def lift(self, obj_index: int) -> LiftedFunction:
+        return self._cached('lift', obj_index, lambda: lift(
+            self.objects[obj_index], self.disassembler.iter_instructions(obj_index)))
+
+    def expressions(self, obj_index: int) -> List[RecoveredBlock]:
+        return self._cached('expressions', obj_index, lambda: recover_expressions(self.lift(obj_index)))
+
+    def structure(self, obj_index: int) -> List[Node]:
+        return self._cached('structure', obj_index, lambda: structure(
+            self.expressions(obj_index), self.lift(obj_index).graph))
+
+    def emit(self, obj_index: int) -> str:
+        return self._cached('emit', obj_index, lambda: emit(self.objects[obj_index], self.structure(obj_index)))
+
+    def decompile(self, obj_index: int) -> str:
+        """带对象标题的源代码，失败时只输出错误注释"""
+        obj = self.objects[obj_index]
+        title = f"// [{obj_index}] {obj.name} ({obj.context_type.name})\n"
+        try:
+            return title + self.emit(obj_index)
+        except Exception as e:
+            return title + f"// decompile failed: {type(e).__name__}: {e}\n"
+
+# 工作进程中最近加载的文件，同一文件的后续分块不再重新加载
+_worker_decompiler: Optional[Tuple[str, Optional[Decompiler]]] = None
+
+def decompile_objects(file_path: str, indices: List[int]) -> List[Tuple[int, str]]:
+    """在工作进程中按需加载文件并反编译指定的对象"""
+    global _worker_decompiler
+    if _worker_decompiler is None or _worker_decompiler[0] != file_path:
+        from .tjs_bytecode_loader import TJSByteCodeLoader
+
+        result = TJSByteCodeLoader.load_bytecode(file_path, lazy=True)
+        _worker_decompiler = (file_path, None if result is None else Decompiler(*result))
+    decompiler = _worker_decompiler[1]
+    if decompiler is None:
+        return [(index, f"// [{index}] load failed\n") for index in indices]
+    results = [(index, decompiler.decompile(index)) for index in indices]
+    # 只保留输出文本，各阶段的中间结果不跨分块保留
+    decompiler.clear_cache()
+    return results
+
+def decompile_file(file_path: str, jobs: Optional[int] = None,
+                   indices: Optional[List[int]] = None) -> Iterator[Tuple[int, str]]:
+    """按对象顺序产生 (对象索引, 源代码)，jobs 不为 1 时对象分块交给进程池
+
+    每个工作进程自己按需加载文件 (mmap)，只解码分到的对象
+    """
+    if indices is None:
+        from .tjs_bytecode_loader import TJSByteCodeLoader
+
+        result = TJSByteCodeLoader.load_bytecode(file_path, lazy=True)
+        if result is None:
+            raise ValueError(f"无法加载: {file_path}")
+        indices = list(range(len(result[1])))
+        if jobs == 1:
+            decompiler = Decompiler(*result)
+            for index in indices:
+                yield index, decompiler.decompile(index)
+            return
+    if jobs == 1 or len(indices) < 2:
+        yield from decompile_objects(file_path, indices)
+        return
+
+    import os
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = jobs or os.cpu_count() or 1
+    chunk = max(1, len(indices) // (workers * 4))
+    chunks = [indices[i:i + chunk] for i in range(0, len(indices), chunk)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for results in executor.map(decompile_objects, [file_path] * len(chunks), chunks):
+            yield from results
@@ -0,0 +1,269 @@
+from array import array
+from typing import Any, List, Optional, Tuple
+import hashlib
+import marshal
+import mmap
+import os
+import struct
+import sys
+import tempfile
+
+from .tjs_const import TJSContextType
+from .tjs_entity import *
+
+# 快照文件: 固定头 | marshal 序列化的数据区和对象表 | 按8字节对齐的各对象体 (本机字节序)
+SNAPSHOT_MAGIC = b'TJSC'
+SNAPSHOT_VERSION = 2
+SNAPSHOT_SUFFIX = '.tjc'
+_HEADER = struct.Struct('<4sHHQ')  # magic, version, 字节序 (0 小端 / 1 大端), 对象表长度
+_BYTE_ORDER = 0 if sys.byteorder == 'little' else 1
+
+type LoadResult = Tuple[Optional[TJSInterCodeContext], List[TJSInterCodeContext], TJSDataArea]
+
+class DiskCache:
+    """按文件内容哈希保存解析结果快照的磁盘缓存
+
+    快照几乎不需要 Python 层的解码：数据区和对象表用 marshal 一次读出，
+    代码区和源码位置直接从映射的文件复制到 array，按需加载时对象体在首次访问时才读取。
+    目录总大小超过 max_bytes 时按修改时间淘汰最久未使用的快照，命中时会更新快照的修改时间
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 1024 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(data: Any) -> str:
+        """计算文件内容的哈希，内容变化后旧快照自然失效"""
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key + SNAPSHOT_SUFFIX)
+
+    def load(self, key: str, lazy: bool = False) -> Optional[LoadResult]:
+        """读取快照，不存在或损坏时返回 None"""
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+        try:
+            magic, version, byte_order, table_size = _HEADER.unpack_from(mm, 0)
+            if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION or byte_order != _BYTE_ORDER:
+                raise ValueError("snapshot format mismatch")
+            table_end = _HEADER.size + table_size
+            with memoryview(mm) as view:
+                data_pools, top_level, table = marshal.loads(view[_HEADER.size:table_end])
+            body_base = table_end + (-table_end & 7)
+            byte_array, short_array, long_array, long_long_array, double_array, string_array, octet_array = data_pools
+            data_area = TJSDataArea(byte_array, array('H', short_array), array('i', long_array),
+                                    array('Q', long_long_array), array('d', double_array), string_array, octet_array)
+            _check_bodies(len(mm), body_base, table)
+            result = _build_objects(mm, body_base, data_area, top_level, table, lazy)
+        except Exception:
+            # 损坏或旧版本的快照直接丢弃
+            self._remove(path)
+            return None
+        finally:
+            if not lazy:
+                mm.close()
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return result
+
+    def store(self, key: str, result: LoadResult):
+        """写入快照，先写临时文件再替换，避免留下不完整的快照；目录不存在或不可写时什么也不做"""
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+            with os.fdopen(fd, 'wb') as f:
+                _write_snapshot(f, result)
+            os.replace(tmp_path, self.path(key))
+        except (OSError, ValueError):
+            if tmp_path is not None:
+                self._remove(tmp_path)
+            return
+        self.evict()
+
+    def evict(self):
+        """目录总大小超过上限时删除最久未使用的快照"""
+        entries = []
+        total = 0
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if not entry.name.endswith(SNAPSHOT_SUFFIX):
+                        continue
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((st.st_mtime_ns, st.st_size, entry.path))
+                    total += st.st_size
+        except OSError:
+            return
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if self._remove(path):
+                total -= size
+
+    @staticmethod
+    def _remove(path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+
+def _write_snapshot(f, result: LoadResult):
+    top_obj, objects, data_area = result
+    index_of = {id(obj): i for i, obj in enumerate(objects)}
+
+    def obj_index(obj: Optional[TJSInterCodeContext]) -> int:
+        return -1 if obj is None else index_of.get(id(obj), -1)
+
+    def plain(value):
+        # 映射文件的切片不能 marshal，转成 bytes
+        return value.tobytes() if isinstance(value, memoryview) else value
+
+    data_pools = (
+        plain(data_area.byte_array),
+        list(data_area.short_array),
+        list(data_area.long_array),
+        list(data_area.long_long_array),
+        list(data_area.double_array),
+        list(data_area.string_array),
+        [plain(octet) for octet in data_area.octet_array],
+    )
+
+    # 对象体: marshal 序列化的超类获取器和属性 | int16 数据变体 | int32 代码位置 | int32 源码位置 | uint16 代码，
+    # 各段按8字节对齐
+    table = []
+    bodies = []
+    offset = 0
+    for obj in objects:
+        props = [(name, obj_index(value)) for name, value in obj.properties.items()]
+        meta = marshal.dumps((list(obj.super_class_getters), props))
+        tags = obj.data.tags
+
+        positions = obj.source_positions
+        pos_count = -1 if positions is None else len(positions)
+        if not isinstance(positions, SourcePositions):
+            positions = SourcePositions(array('i', [pos.code_pos for pos in positions or ()]),
+                                        array('i', [pos.source_pos for pos in positions or ()]))
+        code = obj.code if isinstance(obj.code, array) else array('H', obj.code)
+        sections = [
+            meta,
+            tags.tobytes(),
+            positions.code_positions.tobytes(),
+            positions.source_positions.tobytes(),
+            code.tobytes(),
+        ]
+
+        body_size = sum((len(section) + 7) & ~7 for section in sections)
+        table.append((
+            obj.name, obj.context_type.value,
+            obj.max_variable_count, obj.variable_reserve_count, obj.max_frame_count,
+            obj.func_decl_arg_count, obj.func_decl_unnamed_arg_array_base, obj.func_decl_collapse_base,
+            obj_index(obj.parent), obj_index(obj.prop_setter), obj_index(obj.prop_getter),
+            obj_index(obj.super_class_getter_obj),
+            offset, body_size, len(meta), len(tags), pos_count, len(obj.code),
+        ))
+        for section in sections:
+            bodies.append(section)
+            bodies.append(b'\0' * (-len(section) & 7))
+        offset += body_size
+
+    table_data = marshal.dumps((data_pools, obj_index(top_obj), table))
+    f.write(_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, _BYTE_ORDER, len(table_data)))
+    f.write(table_data)
+    f.write(b'\0' * (-(_HEADER.size + len(table_data)) & 7))
+    f.writelines(bodies)
+
+
+def _check_bodies(length: int, body_base: int, table):
+    """按对象表中的各段长度检查对象体大小，并确认都在快照文件之内，截断的快照直接拒绝"""
+    for entry in table:
+        offset, body_size, meta_size, tag_count, pos_count, code_len = entry[12:]
+        sections = (meta_size, tag_count * 2, max(pos_count, 0) * 4, max(pos_count, 0) * 4, code_len * 2)
+        if min(offset, meta_size, tag_count, code_len) < 0:
+            raise ValueError("snapshot table corrupted")
+        if sum((size + 7) & ~7 for size in sections) != body_size or body_base + offset + body_size > length:
+            raise ValueError("snapshot truncated")
+
+
+def _build_objects(mm: mmap.mmap, body_base: int, data_area: TJSDataArea, top_level: int, table, lazy: bool) -> LoadResult:
+    objects: List[TJSInterCodeContext] = []
+
+    def read_array(typecode: str, offset: int, count: int) -> Tuple[array, int]:
+        values = array(typecode)
+        end = offset + count * values.itemsize
+        if end > len(mm):
+            raise ValueError("snapshot truncated")
+        values.frombytes(mm[offset:end])
+        return values, end + (-end & 7)
+
+    def fill_body(obj: TJSInterCodeContext, entry):
+        offset, _, meta_size, tag_count, pos_count, code_len = entry[12:]
+        offset += body_base
+        scgetters, props = marshal.loads(mm[offset:offset + meta_size])
+        offset += (meta_size + 7) & ~7
+
+        tags, offset = read_array('h', offset, tag_count)
+
+        code_positions, offset = read_array('i', offset, max(pos_count, 0))
+        src_positions, offset = read_array('i', offset, max(pos_count, 0))
+        source_positions = None
+        if pos_count >= 0:
+            source_positions = SourcePositions(code_positions, src_positions)
+
+        obj.source_positions = source_positions
+        obj.code, _ = read_array('H', offset, code_len)
+        obj.data = VariantTable(tags, data_area, objects)
+        obj.super_class_getters = scgetters
+        obj.properties = {name: objects[index] if index >= 0 else None for name, index in props}
+
+    for entry in table:
+        header = dict(
+            name=entry[0],
+            context_type=TJSContextType(entry[1]),
+            max_variable_count=entry[2],
+            variable_reserve_count=entry[3],
+            max_frame_count=entry[4],
+            func_decl_arg_count=entry[5],
+            func_decl_unnamed_arg_array_base=entry[6],
+            func_decl_collapse_base=entry[7],
+        )
+        if lazy:
+            # 闭包持有 mmap，首次访问时才读取对象体
+            obj = LazyTJSInterCodeContext(
+                **header,
+                body_offset=body_base + entry[12],
+                body_size=entry[13],
+                body_loader=lambda obj, entry=entry: fill_body(obj, entry),
+            )
+        else:
+            obj = TJSInterCodeContext(**header, code=[], data=[], source_positions=None, super_class_getters=[])
+        objects.append(obj)
+
+    for obj, entry in zip(objects, table):
+        parent, prop_setter, prop_getter, super_class_getter = entry[8:12]
+        obj.parent = objects[parent] if parent >= 0 else None
+        obj.prop_setter = objects[prop_setter] if prop_setter >= 0 else None
+        obj.prop_getter = objects[prop_getter] if prop_getter >= 0 else None
+        obj.super_class_getter_obj = objects[super_class_getter] if super_class_getter >= 0 else None
+        if not lazy:
+            fill_body(obj, entry)
+
+    top_obj = objects[top_level] if top_level >= 0 else None
+    return top_obj, objects, data_area
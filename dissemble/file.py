@@ -1,10 +1,15 @@
+import mmap
 import struct
+import sys
+from array import array
 from io import BytesIO
+from typing import Union
 
 class BinaryStream:
     """二进制流读取器，封装字节操作"""
     
     def __init__(self, data: bytes):
+        self.data = data
         self.stream = BytesIO(data)
         self.length = len(data)
     
@@ -32,10 +37,41 @@ class BinaryStream:
         """读取8字节双精度浮点数"""
         return struct.unpack('<d', self.stream.read(8))[0]
     
+    def _read_array(self, fmt: str, item_size: int, count: int) -> array:
+        """一次性读取 count 个同类型元素到 array 中，元素不逐个装箱为 Python 对象"""
+        pos = self.tell()
+        values = _to_array(fmt, self.data, pos, count * item_size if count > 0 else 0)
+        self.seek(pos + len(values) * item_size)
+        return values
+    
+    def read_uint16_array(self, count: int) -> array:
+        """批量读取2字节无符号整数"""
+        return self._read_array('H', 2, count)
+    
+    def read_int16_array(self, count: int) -> array:
+        """批量读取2字节有符号整数"""
+        return self._read_array('h', 2, count)
+    
+    def read_int32_array(self, count: int) -> array:
+        """批量读取4字节有符号整数"""
+        return self._read_array('i', 4, count)
+    
+    def read_uint64_array(self, count: int) -> array:
+        """批量读取8字节无符号整数"""
+        return self._read_array('Q', 8, count)
+    
+    def read_double_array(self, count: int) -> array:
+        """批量读取8字节双精度浮点数"""
+        return self._read_array('d', 8, count)
+    
     def read_bytes(self, length: int) -> bytes:
         """读取指定长度的字节"""
         return self.stream.read(length)
     
+    def read_utf16(self, length: int) -> str:
+        """读取 length 个UTF-16LE编码单元组成的字符串"""
+        return str(self.read_bytes(length * 2), 'utf-16-le')
+    
     def skip(self, length: int):
         """跳过指定长度的字节"""
         self.stream.seek(self.stream.tell() + length)
@@ -47,3 +83,78 @@ class BinaryStream:
     def seek(self, position: int):
         """设置读取位置"""
         self.stream.seek(position)
+
+
+def _to_array(fmt: str, data, pos: int, size: int) -> array:
+    """把 data[pos:pos + size] 的小端数据复制到 array 中"""
+    values = array(fmt)
+    if size:
+        if pos + size > len(data):
+            raise struct.error(f"unpack requires a buffer of {size} bytes")
+        values.frombytes(data[pos:pos + size])
+        if sys.byteorder == 'big':
+            values.byteswap()
+    return values
+
+
+_INT16 = struct.Struct('<h')
+_UINT16 = struct.Struct('<H')
+_INT32 = struct.Struct('<i')
+_UINT32 = struct.Struct('<I')
+_UINT64 = struct.Struct('<Q')
+_DOUBLE = struct.Struct('<d')
+
+class MappedBinaryStream(BinaryStream):
+    """直接在 mmap/memoryview 上读取的零拷贝二进制流，使用整数游标"""
+    
+    def __init__(self, data: Union[bytes, bytearray, memoryview, mmap.mmap]):
+        self.data = memoryview(data)
+        self.pos = 0
+        self.length = len(self.data)
+    
+    @classmethod
+    def open(cls, file_path: str) -> 'MappedBinaryStream':
+        """以只读方式映射文件，空文件无法映射时退回普通读取"""
+        with open(file_path, 'rb') as f:
+            try:
+                return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+            except ValueError:
+                return cls(f.read())
+    
+    def _unpack(self, st: struct.Struct):
+        value = st.unpack_from(self.data, self.pos)[0]
+        self.pos += st.size
+        return value
+    
+    def read_uint32(self) -> int:
+        return self._unpack(_UINT32)
+    
+    def read_int32(self) -> int:
+        return self._unpack(_INT32)
+    
+    def read_uint16(self) -> int:
+        return self._unpack(_UINT16)
+    
+    def read_int16(self) -> int:
+        return self._unpack(_INT16)
+    
+    def read_uint64(self) -> int:
+        return self._unpack(_UINT64)
+    
+    def read_double(self) -> float:
+        return self._unpack(_DOUBLE)
+    
+    def read_bytes(self, length: int) -> memoryview:
+        """返回底层缓冲区的切片，不复制数据"""
+        start = self.pos
+        self.pos = min(start + length, self.length)
+        return self.data[start:self.pos]
+    
+    def skip(self, length: int):
+        self.pos += length
+    
+    def tell(self) -> int:
+        return self.pos
+    
+    def seek(self, position: int):
+        self.pos = position
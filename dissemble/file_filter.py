@@ -0,0 +1,169 @@
+from typing import Dict, List, Set, Tuple
+import os
+from PyQt5.QtWidgets import QFileSystemModel
+from PyQt5.QtCore import Qt, QModelIndex, QObject, QRunnable, QSortFilterProxyModel, QThreadPool, QTimer, pyqtSignal
+
+from .batch import is_bytecode_file
+
+# 路径 -> (修改时间 (毫秒), 是否为字节码)
+type SniffCache = Dict[str, Tuple[int, bool]]
+
+class ScanSignals(QObject):
+    """DirectoryScanWorker 的信号"""
+    results = pyqtSignal(int, list)  # (扫描序号, 一批 (路径, 修改时间, 是否为字节码))
+    finished = pyqtSignal(int, str)  # (扫描序号, 目录)
+
+class DirectoryScanWorker(QRunnable):
+    """在线程池中读取目录下各文件的前8字节，判断是否为TJS2字节码
+
+    修改时间与缓存一致的文件不再读取，结果按批发出，由界面线程写入缓存
+    """
+    BATCH_SIZE = 512
+
+    def __init__(self, generation: int, directory: str, cache: SniffCache):
+        super().__init__()
+        self.generation = generation
+        self.directory = directory
+        self.cache = cache
+        self.signals = ScanSignals()
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        try:
+            self._scan()
+        finally:
+            self.signals.finished.emit(self.generation, self.directory)
+
+    def _scan(self):
+        batch = []
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if self._cancelled:
+                        return
+                    try:
+                        if not entry.is_file():
+                            continue
+                        mtime = entry.stat().st_mtime_ns // 1_000_000
+                    except OSError:
+                        continue
+                    path = entry.path.replace(os.sep, '/')
+                    known = self.cache.get(path)
+                    if known is not None and known[0] == mtime:
+                        continue
+                    batch.append((path, mtime, is_bytecode_file(entry.path)))
+                    if len(batch) >= self.BATCH_SIZE:
+                        self.signals.results.emit(self.generation, batch)
+                        batch = []
+        except OSError:
+            pass
+        if batch and not self._cancelled:
+            self.signals.results.emit(self.generation, batch)
+
+class BytecodeFilterProxyModel(QSortFilterProxyModel):
+    """只显示目录和TJS2字节码文件的文件系统代理模型
+
+    文件头在后台按目录检查，结果按 (路径, 修改时间) 缓存；还没有检查过或修改时间变化的文件先隐藏，
+    检查完成后重新过滤。关闭过滤时不做任何检查，排序交给 QFileSystemModel 保持目录在前
+    """
+    # 扫描结果合并后重新过滤的间隔 (毫秒)，避免每批结果都过滤整棵树
+    REFILTER_DELAY_MS = 200
+
+    def __init__(self, source: QFileSystemModel, parent=None):
+        super().__init__(parent)
+        self.setSourceModel(source)
+        self.thread_pool = QThreadPool.globalInstance()
+        self.cache: SniffCache = {}
+        self.enabled = False
+        self._generation = 0  # 关闭过滤时递增，丢弃正在进行的扫描结果
+        self._workers: Dict[str, DirectoryScanWorker] = {}
+        self._loaded_dirs: Set[str] = set()
+        # 扫描期间又有变化的目录，扫描结束后再扫描一次
+        self._dirty: Set[str] = set()
+        self._refilter_timer = QTimer(self)
+        self._refilter_timer.setSingleShot(True)
+        self._refilter_timer.setInterval(self.REFILTER_DELAY_MS)
+        self._refilter_timer.timeout.connect(self.invalidateFilter)
+        source.directoryLoaded.connect(self.on_directory_loaded)
+        source.rowsInserted.connect(self.on_rows_inserted)
+
+    def set_enabled(self, enabled: bool):
+        """打开或关闭过滤，打开时扫描所有已经加载的目录"""
+        if enabled == self.enabled:
+            return
+        self.enabled = enabled
+        if enabled:
+            for directory in list(self._loaded_dirs):
+                self.scan(directory)
+        else:
+            self.cancel_scans()
+        self.invalidateFilter()
+
+    def cancel_scans(self):
+        self._generation += 1
+        for worker in self._workers.values():
+            worker.cancel()
+        self._workers.clear()
+        self._dirty.clear()
+
+    def on_directory_loaded(self, directory: str):
+        self._loaded_dirs.add(directory)
+        if self.enabled:
+            self.scan(directory)
+
+    def on_rows_inserted(self, parent: QModelIndex, first: int, last: int):
+        """目录中出现新文件时重新扫描，已缓存且未修改的文件不会再读取"""
+        directory = self.sourceModel().filePath(parent)
+        if self.enabled and directory in self._loaded_dirs:
+            self.scan(directory)
+
+    def scan(self, directory: str):
+        """在后台检查目录下的文件，同一目录同时只有一个扫描"""
+        if directory in self._workers:
+            self._dirty.add(directory)
+            return
+        worker = DirectoryScanWorker(self._generation, directory, self.cache)
+        worker.signals.results.connect(self.on_scan_results)
+        worker.signals.finished.connect(self.on_scan_finished)
+        self._workers[directory] = worker
+        self.thread_pool.start(worker)
+
+    def on_scan_finished(self, generation: int, directory: str):
+        if generation != self._generation:
+            return
+        self._workers.pop(directory, None)
+        if directory in self._dirty:
+            self._dirty.discard(directory)
+            self.scan(directory)
+
+    def on_scan_results(self, generation: int, results: List[Tuple[str, int, bool]]):
+        if generation != self._generation:
+            return
+        cache = self.cache
+        for path, mtime, is_bytecode in results:
+            cache[path] = (mtime, is_bytecode)
+        if not self._refilter_timer.isActive():
+            self._refilter_timer.start()
+
+    def filterAcceptsRow(self, source_row: int, source_parent: QModelIndex) -> bool:
+        if not self.enabled:
+            return True
+        source: QFileSystemModel = self.sourceModel()
+        index = source.index(source_row, 0, source_parent)
+        if source.isDir(index):
+            return True
+        # 还没有检查过的文件先隐藏；修改时间在扫描时比较，这里不访问文件
+        known = self.cache.get(source.filePath(index))
+        return known is not None and known[1]
+
+    def sort(self, column: int, order: Qt.SortOrder = Qt.AscendingOrder):
+        self.sourceModel().sort(column, order)
+
+    def filePath(self, index: QModelIndex) -> str:
+        return self.sourceModel().filePath(self.mapToSource(index))
+
+    def index_of_path(self, path: str) -> QModelIndex:
+        return self.mapFromSource(self.sourceModel().index(path))
@@ -0,0 +1,141 @@
+from array import array
+from dataclasses import dataclass
+from typing import List, Tuple
+
+from .cfg import ControlFlowGraph
+
+# 一条边经过的折线顶点
+type EdgeRoute = List[Tuple[float, float]]
+
+@dataclass
+class GraphLayout:
+    """控制流图的分层布局，坐标单位为像素，块 b 的矩形是 (xs[b], ys[b], block_width, heights[b])"""
+    graph: ControlFlowGraph
+    xs: array
+    ys: array
+    heights: array
+    block_width: float
+    edge_routes: List[EdgeRoute]  # 与 graph 的边顺序相同
+    back_edges: bytearray         # 1 表示回边 (循环)
+    left: float
+    top: float
+    right: float
+    bottom: float
+
+def find_back_edges(graph: ControlFlowGraph) -> Tuple[bytearray, array]:
+    """深度优先遍历，返回 (回边标记, 拓扑序)
+
+    从块 0 开始，其余不可达的块按地址顺序作为新的起点，各次遍历的逆后序依次拼接。
+    后开始的遍历指向已有遍历的边也记为回边，这样入口块总在第一层，
+    去掉回边后的图无环，拼接的顺序就是它的拓扑序
+    """
+    count = len(graph)
+    offsets = graph.edge_offsets
+    targets = graph.edge_targets
+    back = bytearray(graph.edge_count)
+    state = bytearray(count)  # 0 未访问, 1 在栈上, 2 已完成
+    tree_of = array('l', [0]) * count
+    order = array('l')
+    for root in range(count):
+        if state[root]:
+            continue
+        postorder = array('l')
+        state[root] = 1
+        tree_of[root] = root
+        # (块, 下一条要看的边)
+        stack = [(root, offsets[root])]
+        while stack:
+            block, e = stack[-1]
+            if e < offsets[block + 1]:
+                stack[-1] = (block, e + 1)
+                target = targets[e]
+                if state[target] == 0:
+                    state[target] = 1
+                    tree_of[target] = root
+                    stack.append((target, offsets[target]))
+                elif state[target] == 1 or tree_of[target] != root:
+                    back[e] = 1
+            else:
+                stack.pop()
+                state[block] = 2
+                postorder.append(block)
+        postorder.reverse()
+        order.extend(postorder)
+    return back, order
+
+def layout_graph(graph: ControlFlowGraph, block_width: float, line_height: float,
+                 header_height: float = 0.0, h_gap: float = 40.0, v_gap: float = 40.0) -> GraphLayout:
+    """计算分层布局，只依赖块的指令条数，不需要指令文本
+
+    层号是去掉回边后从入口开始的最长路径，同一层的块按前驱的平均横坐标排序以减少交叉，
+    总时间与块数和边数成线性关系 (每层排序除外)。可以在工作线程中调用
+    """
+    count = len(graph)
+    offsets = graph.edge_offsets
+    targets = graph.edge_targets
+    back, order = find_back_edges(graph)
+
+    # 分层
+    layer_of = array('l', [0]) * count
+    for block in order:
+        next_layer = layer_of[block] + 1
+        for e in range(offsets[block], offsets[block + 1]):
+            if not back[e]:
+                target = targets[e]
+                if layer_of[target] < next_layer:
+                    layer_of[target] = next_layer
+    layers: List[List[int]] = [[] for _ in range(max(layer_of, default=-1) + 1)]
+    for block in order:
+        layers[layer_of[block]].append(block)
+
+    heights = array('d', (header_height + max(n, 1) * line_height for n in graph.instruction_counts))
+    xs = array('d', [0.0]) * count
+    ys = array('d', [0.0]) * count
+    pitch = block_width + h_gap
+    pred_sum = array('d', [0.0]) * count
+    pred_count = array('l', [0]) * count
+
+    y = 0.0
+    left = right = 0.0
+    for blocks in layers:
+        # 按前驱中心的平均横坐标排序，没有前驱的块按 0 (居中) 处理，排序稳定所以同值时保持拓扑序
+        blocks.sort(key=lambda b: pred_sum[b] / pred_count[b] if pred_count[b] else 0.0)
+        x = -(len(blocks) * pitch - h_gap) / 2
+        left = min(left, x)
+        layer_height = 0.0
+        for block in blocks:
+            xs[block] = x
+            ys[block] = y
+            layer_height = max(layer_height, heights[block])
+            center = x + block_width / 2
+            for e in range(offsets[block], offsets[block + 1]):
+                if not back[e]:
+                    target = targets[e]
+                    pred_sum[target] += center
+                    pred_count[target] += 1
+            x += pitch
+        right = max(right, x - h_gap)
+        y += layer_height + v_gap
+
+    # 边从源块底边均匀分布的出口引出，进入目标块顶边中点
+    routes: List[EdgeRoute] = []
+    lane = h_gap / 2
+    for block in range(count):
+        lo, hi = offsets[block], offsets[block + 1]
+        bottom = ys[block] + heights[block]
+        for k, e in enumerate(range(lo, hi)):
+            target = targets[e]
+            sx = xs[block] + block_width * (k + 1) / (hi - lo + 1)
+            tx = xs[target] + block_width / 2
+            ty = ys[target]
+            if back[e]:
+                # 回边从两个块左侧绕回
+                side = min(xs[block], xs[target]) - lane
+                routes.append([(sx, bottom), (sx, bottom + lane), (side, bottom + lane),
+                               (side, ty - lane), (tx, ty - lane), (tx, ty)])
+            else:
+                mid = ty - v_gap / 2
+                routes.append([(sx, bottom), (sx, mid), (tx, mid), (tx, ty)])
+
+    return GraphLayout(graph, xs, ys, heights, block_width, routes, back,
+                       left - h_gap, -v_gap, right + h_gap, y)
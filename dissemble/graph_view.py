@@ -0,0 +1,186 @@
+from typing import Callable, Iterator, List, Optional
+from PyQt5.QtWidgets import QGraphicsItem, QGraphicsPathItem, QGraphicsScene, QGraphicsView, QStyleOptionGraphicsItem
+from PyQt5.QtCore import Qt, QPointF, QRectF, QTimer
+from PyQt5.QtGui import QBrush, QColor, QFont, QFontMetricsF, QPainter, QPainterPath, QPen
+
+from .cfg import EdgeKind
+from .graph_layout import GraphLayout
+
+# 块编号 -> 块内各条指令的文本
+type BlockTextProvider = Callable[[int], List[str]]
+
+EDGE_COLORS = {
+    EdgeKind.FALLTHROUGH: QColor(110, 110, 110),
+    EdgeKind.JUMP: QColor(40, 90, 200),
+    EdgeKind.BRANCH: QColor(30, 150, 60),
+    EdgeKind.EXCEPTION: QColor(200, 50, 50),
+}
+
+class BlockItem(QGraphicsItem):
+    """一个基本块
+
+    缩放到文字无法辨认时只画占位矩形；放大后才向 text_provider 取指令文本，
+    取到的文本保存在块上，只绘制露出部分的行
+    """
+    # 比例低于这个值时不绘制文字
+    DETAIL_LOD = 0.45
+
+    def __init__(self, view: 'GraphView', block: int, rect: QRectF):
+        super().__init__()
+        self.view = view
+        self.block = block
+        self.rect = rect
+        self.lines: Optional[List[str]] = None
+        self.setFlag(QGraphicsItem.ItemUsesExtendedStyleOption)
+        self.setPos(rect.topLeft())
+
+    def boundingRect(self) -> QRectF:
+        return QRectF(0, 0, self.rect.width(), self.rect.height())
+
+    def paint(self, painter: QPainter, option: QStyleOptionGraphicsItem, widget=None):
+        view = self.view
+        bounds = self.boundingRect()
+        lod = option.levelOfDetailFromTransform(painter.worldTransform())
+        if lod < self.DETAIL_LOD:
+            painter.fillRect(bounds, view.placeholder_brush)
+            return
+
+        painter.setPen(view.border_pen)
+        painter.setBrush(view.block_brush)
+        painter.drawRect(bounds)
+        if self.lines is None:
+            self.lines = view.block_lines(self.block)
+
+        line_height = view.line_height
+        exposed = option.exposedRect
+        header = view.header_height
+        first = max(0, int((exposed.top() - header) // line_height))
+        last = min(len(self.lines), int((exposed.bottom() - header) // line_height) + 1)
+        painter.setFont(view.block_font)
+        painter.setPen(view.header_pen)
+        painter.drawText(QRectF(4, 0, bounds.width() - 8, header), Qt.AlignVCenter | Qt.AlignLeft,
+                         f"block {self.block}")
+        painter.setPen(view.text_pen)
+        for row in range(first, last):
+            painter.drawText(QRectF(4, header + row * line_height, bounds.width() - 8, line_height),
+                             Qt.AlignVCenter | Qt.AlignLeft, self.lines[row])
+
+class GraphView(QGraphicsView):
+    """基本块和控制流边的图形视图
+
+    布局在工作线程中算好后交给 set_layout，图元分批加入场景，加入过程中界面保持响应。
+    场景用 BSP 索引，缩放和平移时只绘制视口内的图元
+    """
+    # 每次事件循环加入场景的块数
+    ITEMS_PER_TICK = 400
+    MIN_SCALE = 0.005
+    MAX_SCALE = 4.0
+    # 块宽度按字符数计算
+    BLOCK_COLUMNS = 52
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.graph_scene = QGraphicsScene(self)
+        self.setScene(self.graph_scene)
+        self.setDragMode(QGraphicsView.ScrollHandDrag)
+        self.setTransformationAnchor(QGraphicsView.AnchorUnderMouse)
+        self.setOptimizationFlags(QGraphicsView.DontAdjustForAntialiasing | QGraphicsView.DontSavePainterState)
+        self.setBackgroundBrush(QColor(245, 245, 245))
+
+        self.block_font = QFont("Courier New", 10)
+        metrics = QFontMetricsF(self.block_font)
+        self.metrics = metrics
+        self.line_height = metrics.height()
+        self.header_height = metrics.height() + 4
+        self.block_width = metrics.horizontalAdvance('0') * self.BLOCK_COLUMNS + 8
+        self.block_brush = QBrush(QColor(255, 255, 255))
+        self.placeholder_brush = QBrush(QColor(190, 200, 215))
+        self.border_pen = QPen(QColor(80, 80, 80), 0)
+        self.header_pen = QPen(QColor(120, 120, 120))
+        self.text_pen = QPen(QColor(0, 0, 0))
+        self.edge_pens = {kind: QPen(color, 0) for kind, color in EDGE_COLORS.items()}
+
+        self.text_provider: Optional[BlockTextProvider] = None
+        self.graph_layout: Optional[GraphLayout] = None
+        self._pending: Optional[Iterator[None]] = None
+        self._populate_timer = QTimer(self)
+        self._populate_timer.timeout.connect(self._populate_step)
+
+    def clear(self, message: str = ""):
+        """清空场景，message 非空时显示在中间"""
+        self._populate_timer.stop()
+        self._pending = None
+        self.graph_layout = None
+        self.text_provider = None
+        self.graph_scene.clear()
+        self.resetTransform()
+        if message:
+            self.graph_scene.setSceneRect(QRectF())
+            self.graph_scene.addText(message, self.block_font)
+
+    def set_layout(self, layout: GraphLayout, text_provider: BlockTextProvider):
+        """显示布局好的图，入口块放在视口顶部，其余图元在之后的事件循环中分批加入"""
+        self.clear()
+        self.graph_layout = layout
+        self.text_provider = text_provider
+        self.graph_scene.setSceneRect(QRectF(layout.left, layout.top,
+                                             layout.right - layout.left, layout.bottom - layout.top))
+        self._pending = self._create_items()
+        self._populate_step()
+        if len(layout.graph):
+            self.centerOn(layout.xs[0] + layout.block_width / 2, layout.ys[0] + self.viewport().height() / 2 - 20)
+        if self._pending is not None:
+            self._populate_timer.start(0)
+
+    def _create_items(self) -> Iterator[None]:
+        layout = self.graph_layout
+        graph = layout.graph
+        scene = self.graph_scene
+        kinds = graph.edge_kinds
+        offsets = graph.edge_offsets
+        # 按地址顺序加入，入口块在第一批
+        for block in range(len(graph)):
+            scene.addItem(BlockItem(self, block, QRectF(layout.xs[block], layout.ys[block],
+                                                        layout.block_width, layout.heights[block])))
+            for e in range(offsets[block], offsets[block + 1]):
+                scene.addItem(self._edge_item(layout.edge_routes[e], EdgeKind(kinds[e])))
+            yield
+
+    def block_lines(self, block: int) -> List[str]:
+        """块内指令的文本，超出块宽的部分省略"""
+        if self.text_provider is None:
+            return []
+        width = self.block_width - 8
+        return [self.metrics.elidedText(line, Qt.ElideRight, width) for line in self.text_provider(block)]
+
+    def _edge_item(self, route, kind: EdgeKind) -> QGraphicsPathItem:
+        path = QPainterPath(QPointF(*route[0]))
+        for point in route[1:]:
+            path.lineTo(*point)
+        # 箭头
+        x, y = route[-1]
+        size = 5.0
+        path.moveTo(x - size, y - size * 1.6)
+        path.lineTo(x, y)
+        path.lineTo(x + size, y - size * 1.6)
+        item = QGraphicsPathItem(path)
+        item.setPen(self.edge_pens[kind])
+        item.setZValue(-1)
+        return item
+
+    def _populate_step(self):
+        if self._pending is None:
+            return
+        for _ in range(self.ITEMS_PER_TICK):
+            if next(self._pending, StopIteration) is StopIteration:
+                self._pending = None
+                self._populate_timer.stop()
+                return
+
+    def wheelEvent(self, event):
+        """滚轮缩放，以鼠标位置为中心"""
+        factor = 1.15 ** (event.angleDelta().y() / 120)
+        scale = self.transform().m11() * factor
+        if self.MIN_SCALE <= scale <= self.MAX_SCALE:
+            self.scale(factor, factor)
+        event.accept()
@@ -0,0 +1,96 @@
+from collections import defaultdict
+from enum import Enum
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+import re
+import threading
+
+from .tjs_const import TYPE_STRING
+from .tjs_disassembler import TJSDisassembler
+from .tjs_entity import VariantTable
+
+class MatchMode(Enum):
+    """对象搜索的匹配方式"""
+    EXACT = 'Exact'
+    SUBSTRING = 'Substring'
+    REGEX = 'Regex'
+
+def compile_matcher(text: str, mode: MatchMode, ignore_case: bool = False) -> Callable[[str], bool]:
+    """生成匹配函数，忽略大小写时非正则模式的参数应是 casefold 后的字符串
+
+    正则表达式无效时抛出 re.error
+    """
+    if mode is MatchMode.REGEX:
+        pattern = re.compile(text, re.IGNORECASE if ignore_case else 0)
+        return lambda s: pattern.search(s) is not None
+    if ignore_case:
+        text = text.casefold()
+    if mode is MatchMode.EXACT:
+        return text.__eq__
+    return lambda s: text in s
+
+class ObjectSearchIndex:
+    """按对象数据区中的字符串常量搜索对象
+
+    索引在第一次搜索时扫描所有对象的数据区建立，和指令是否引用无关：每个不同的字符串只保存一次，
+    附带包含它的对象列表，所以匹配只需要扫描不同字符串而不是每个对象的数据区。
+    建立索引会解码所有按需加载的对象体，可以在工作线程中进行
+    """
+
+    def __init__(self, disassembler: TJSDisassembler):
+        self.disassembler = disassembler
+        self._lock = threading.Lock()
+        self._objects: Optional[Dict[str, List[int]]] = None
+        self._strings: List[str] = []
+        self._folded: List[str] = []
+
+    def build(self):
+        with self._lock:
+            if self._objects is not None:
+                return
+            objects: Dict[str, List[int]] = defaultdict(list)
+            # 数据区是 VariantTable 的对象按 (常量池, 池索引) 归类，每个字符串只从池中取一次
+            tagged: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+            tables: Dict[int, VariantTable] = {}
+            for obj_index, obj in enumerate(self.disassembler.objects):
+                data = obj.data
+                if isinstance(data, VariantTable):
+                    area = id(data.data_area)
+                    tables.setdefault(area, data)
+                    tags = data.tags
+                    for pool_index in {tags[pos + 1] for pos in range(0, len(tags), 2) if tags[pos] == TYPE_STRING}:
+                        tagged[area, pool_index].append(obj_index)
+                else:
+                    for value in {v for v in data if type(v) is str}:
+                        objects[value].append(obj_index)
+
+            merged: Set[str] = set()
+            for (area, pool_index), indices in tagged.items():
+                value = tables[area].resolve(TYPE_STRING, pool_index)
+                if value is None:
+                    continue
+                if value in objects:
+                    # 同一个字符串出现在不同的池项中，合并后恢复对象顺序
+                    merged.add(value)
+                objects[value].extend(indices)
+            for value in merged:
+                objects[value] = sorted(set(objects[value]))
+            self._strings = sorted(objects)
+            self._folded = [s.casefold() for s in self._strings]
+            self._objects = dict(objects)
+
+    def iter_matches(self, text: str, mode: MatchMode, ignore_case: bool = False) -> Iterator[int]:
+        """逐个产生匹配对象的索引，每个对象只产生一次"""
+        matcher = compile_matcher(text, mode, ignore_case)
+        self.build()
+        if mode is MatchMode.EXACT and not ignore_case:
+            yield from self._objects.get(text, ())
+            return
+
+        keys = self._strings if mode is MatchMode.REGEX or not ignore_case else self._folded
+        seen = set()
+        for key, value in zip(keys, self._strings):
+            if matcher(key):
+                for obj_index in self._objects[value]:
+                    if obj_index not in seen:
+                        seen.add(obj_index)
+                        yield obj_index
@@ -0,0 +1,199 @@
+"""整个目录的符号索引，保存在 SQLite 数据库中
+
+运行: python -m dissemble index <目录> [--db 路径] [--jobs N]
+      python -m dissemble query <名称> [--db 路径] [--kind 类型] [--prefix]
+
+索引类名、函数名、属性名、字符串常量和 calld 的调用目标。
+再次索引时只重新解析修改时间或大小变化的文件，并删除已经不存在的文件
+"""
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import os
+import sqlite3
+
+from .batch import is_bytecode_file
+from .tjs_bytecode_loader import TJSByteCodeLoader
+from .tjs_const import TJSContextType, XRefKind
+from .tjs_disassembler import TJSDisassembler
+
+DEFAULT_DB = 'tjs_symbols.db'
+
+SYMBOL_KINDS = ('class', 'function', 'property', 'string', 'call')
+
+# 定义符号的对象类型
+_DEFINITION_KINDS = {
+    TJSContextType.ctClass: 'class',
+    TJSContextType.ctFunction: 'function',
+    TJSContextType.ctExprFunction: 'function',
+    TJSContextType.ctProperty: 'property',
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    bytecode INTEGER NOT NULL,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS symbols (
+    file_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    object_index INTEGER NOT NULL,
+    object_name TEXT,
+    address INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS symbols_name ON symbols (name, kind);
+CREATE INDEX IF NOT EXISTS symbols_file ON symbols (file_id);
+"""
+
+# (类型, 名称, 对象索引, 对象名, 指令地址)，定义符号的地址为 -1
+type SymbolRow = Tuple[str, str, int, Optional[str], int]
+# (文件路径, 修改时间, 大小, 是否为字节码, 符号, 错误信息)
+type FileSymbols = Tuple[str, int, int, bool, List[SymbolRow], Optional[str]]
+
+def extract_symbols(file_path: str) -> FileSymbols:
+    """解析一个文件并提取符号，在工作进程中运行，异常只记录为这个文件的错误"""
+    try:
+        st = os.stat(file_path)
+    except OSError as e:
+        return file_path, 0, 0, False, [], str(e)
+    if not is_bytecode_file(file_path):
+        return file_path, st.st_mtime_ns, st.st_size, False, [], None
+
+    try:
+        result = TJSByteCodeLoader.load_bytecode(file_path, lazy=True, strict=True)
+        if result is None:
+            return file_path, st.st_mtime_ns, st.st_size, True, [], "加载失败"
+        objects = result[1]
+        rows: List[SymbolRow] = []
+        for index, obj in enumerate(objects):
+            kind = _DEFINITION_KINDS.get(obj.context_type)
+            if kind and obj.name:
+                rows.append((kind, obj.name, index, obj.name, -1))
+
+        # 每个对象中的同一个符号只记录第一次出现的位置
+        seen = set()
+        for (xref_kind, value), refs in TJSDisassembler(*result).xref_index().items():
+            if xref_kind is XRefKind.CALL:
+                kind = 'call'
+            elif xref_kind is XRefKind.CONST and isinstance(value, str):
+                kind = 'string'
+            else:
+                continue
+            for index, address in refs:
+                if (kind, value, index) not in seen:
+                    seen.add((kind, value, index))
+                    rows.append((kind, value, index, objects[index].name, address))
+    except Exception as e:
+        return file_path, st.st_mtime_ns, st.st_size, True, [], f"{type(e).__name__}: {e}"
+    return file_path, st.st_mtime_ns, st.st_size, True, rows, None
+
+def walk_files(root: str) -> Iterator[Tuple[str, int, int]]:
+    """按路径顺序产生目录下所有文件的 (路径, 修改时间, 大小)"""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            file_path = os.path.join(dirpath, name)
+            try:
+                st = os.stat(file_path)
+            except OSError:
+                continue
+            yield file_path, st.st_mtime_ns, st.st_size
+
+class SymbolIndex:
+    """符号索引数据库"""
+
+    def __init__(self, db_path: str = DEFAULT_DB):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript(_SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self) -> 'SymbolIndex':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def stale_files(self, root: str) -> Tuple[List[str], List[int]]:
+        """比较数据库和磁盘，返回 (需要重新解析的文件, 已删除文件的 id)"""
+        root = os.path.abspath(root)
+        prefix = os.path.join(root, '')
+        known: Dict[str, Tuple[int, int, int]] = {
+            path: (file_id, mtime_ns, size)
+            for file_id, path, mtime_ns, size in self.conn.execute(
+                "SELECT id, path, mtime_ns, size FROM files WHERE substr(path, 1, ?) = ?",
+                (len(prefix), prefix))
+        }
+        changed = []
+        for file_path, mtime_ns, size in walk_files(root):
+            entry = known.pop(file_path, None)
+            if entry is None or entry[1:] != (mtime_ns, size):
+                changed.append(file_path)
+        return changed, [file_id for file_id, _, _ in known.values()]
+
+    def update(self, root: str, jobs: Optional[int] = None) -> Tuple[int, int, int]:
+        """增量索引目录，返回 (重新解析的文件数, 删除的文件数, 失败的文件数)"""
+        changed, removed = self.stale_files(root)
+        failed = 0
+        with self.conn:
+            self._delete_files(removed)
+            for file_symbols in self._extract_all(changed, jobs):
+                self._store(file_symbols)
+                if file_symbols[5] is not None:
+                    failed += 1
+                    print(f"失败: {file_symbols[0]}: {file_symbols[5]}")
+        return len(changed), len(removed), failed
+
+    @staticmethod
+    def _extract_all(paths: List[str], jobs: Optional[int]) -> Iterable[FileSymbols]:
+        if jobs == 1 or len(paths) < 2:
+            return map(extract_symbols, paths)
+        from concurrent.futures import ProcessPoolExecutor
+
+        def results():
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                yield from executor.map(extract_symbols, paths, chunksize=8)
+        return results()
+
+    def _delete_files(self, file_ids: List[int]):
+        params = [(file_id,) for file_id in file_ids]
+        self.conn.executemany("DELETE FROM symbols WHERE file_id = ?", params)
+        self.conn.executemany("DELETE FROM files WHERE id = ?", params)
+
+    def _store(self, file_symbols: FileSymbols):
+        file_path, mtime_ns, size, bytecode, rows, error = file_symbols
+        row = self.conn.execute("SELECT id FROM files WHERE path = ?", (file_path,)).fetchone()
+        if row is not None:
+            self._delete_files([row[0]])
+        file_id = self.conn.execute(
+            "INSERT INTO files (path, mtime_ns, size, bytecode, error) VALUES (?, ?, ?, ?, ?)",
+            (file_path, mtime_ns, size, int(bytecode), error)).lastrowid
+        self.conn.executemany(
+            "INSERT INTO symbols (file_id, kind, name, object_index, object_name, address) VALUES (?, ?, ?, ?, ?, ?)",
+            [(file_id, *symbol) for symbol in rows])
+
+    def query(self, name: str, kinds: Optional[Iterable[str]] = None,
+              prefix: bool = False) -> List[Tuple[str, str, str, int, Optional[str], int]]:
+        """按名称查找符号，返回 (文件路径, 类型, 名称, 对象索引, 对象名, 指令地址) 列表
+
+        prefix 为 True 时查找以 name 开头的符号，同样使用名称索引
+        """
+        if prefix:
+            where = "s.name >= ? AND s.name < ?"
+            params: List = [name, name + '\U0010ffff']
+        else:
+            where = "s.name = ?"
+            params = [name]
+        if kinds:
+            kinds = list(kinds)
+            where += f" AND s.kind IN ({', '.join('?' * len(kinds))})"
+            params += kinds
+        return self.conn.execute(
+            "SELECT f.path, s.kind, s.name, s.object_index, s.object_name, s.address "
+            "FROM symbols s JOIN files f ON f.id = s.file_id "
+            f"WHERE {where} ORDER BY f.path, s.object_index, s.address", params).fetchall()
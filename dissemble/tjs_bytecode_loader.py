@@ -1,9 +1,19 @@
-from typing import List, Optional, Tuple
+from array import array
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple
 
 from .tjs_const import *
 from .file import *
 from .tjs_entity import *
 
+if TYPE_CHECKING:
+    from .disk_cache import DiskCache
+
+# 进度回调: progress(已读取字节数, 总字节数)，在回调中抛出 LoadCancelled 可以中止加载
+type Progress = Callable[[int, int], None]
+
+class LoadCancelled(Exception):
+    """加载被进度回调取消"""
+
 class TJSByteCodeLoader:
     """TJS字节码加载器"""
     
@@ -15,8 +25,85 @@ class TJSByteCodeLoader:
     octetArray: List[bytes]
 
     @staticmethod
-    def load_objs_area(stream: BinaryStream, data_area: TJSDataArea) -> Tuple[Optional[TJSInterCodeContext], List[TJSInterCodeContext]]:
-        """读取对象（代码上下文）信息"""
+    def load_obj_body(stream: BinaryStream, data_area: TJSDataArea, objects: List[Optional[TJSInterCodeContext]]) -> Tuple[SourcePositions | None, array, VariantTable, List[int], array]:
+        """读取对象头部之后的源码位置、代码、数据变体、超类获取器和属性列表"""
+
+        # 读取源代码位置信息
+        count: int = stream.read_int32()
+        source_positions: SourcePositions | None = None
+        if count > 0:
+            # 读取代码位置
+            code_positions = stream.read_int32_array(count)
+            # 读取源代码位置
+            source_positions = SourcePositions(code_positions, stream.read_int32_array(count))
+        else:
+            stream.skip(count * 8)  # 跳过源代码位置数据
+        
+        # 读取代码
+        code_size = stream.read_int32()
+        code = stream.read_uint16_array(code_size)
+        
+        # 对齐到4字节
+        if code_size & 1:
+            stream.skip(2)
+        
+        # 读取数据变体，只保存 (类型, 池索引) 对，值在访问时从共享的常量池中查找
+        count = stream.read_int32()
+        vdata = VariantTable(stream.read_int16_array(count * 2), data_area, objects)
+        
+        # 读取超类获取器
+        count = stream.read_int32()
+        scgetterps = list(stream.read_int32_array(count))
+        
+        # 读取属性
+        count = stream.read_int32()
+        props = array('i')
+        if count > 0:
+            pcount = count * 2
+            props = stream.read_int32_array(pcount)
+
+        return source_positions, code, vdata, scgetterps, props
+
+    @staticmethod
+    def resolve_properties(obj: TJSInterCodeContext, props: List[int], objects: List[TJSInterCodeContext], data_area: TJSDataArea):
+        """把 (名称索引, 对象索引) 形式的属性列表设置到对象的属性字典中"""
+        length = len(props) // 2
+        for i in range(length):
+            pos = i * 2
+            pname_idx = props[pos]
+            pobj_idx = props[pos + 1]
+            
+            pname = data_area.string_array[pname_idx] if pname_idx < len(data_area.string_array) else f"prop_{i}"
+            pobj = objects[pobj_idx] if pobj_idx < len(objects) else None
+            
+            # 在Python中，我们可能需要以不同的方式处理属性设置
+            # 这里只是简单地将属性添加到对象的属性字典中
+            if not hasattr(obj, 'properties'):
+                obj.properties = {}
+            obj.properties[pname] = pobj
+
+    @staticmethod
+    def lazy_body_loader(stream: BinaryStream, offset: int, data_area: TJSDataArea, objects: List[TJSInterCodeContext]):
+        """返回在首次访问时解码对象体的回调，使用独立游标，不影响原始流"""
+        def load(obj: LazyTJSInterCodeContext):
+            body = MappedBinaryStream(stream.data)
+            body.seek(offset)
+            source_positions, code, vdata, scgetterps, props = TJSByteCodeLoader.load_obj_body(body, data_area, objects)
+            obj.source_positions = source_positions
+            obj.code = code
+            obj.data = vdata
+            obj.super_class_getters = scgetterps
+            obj.properties = {}
+            TJSByteCodeLoader.resolve_properties(obj, props, objects, data_area)
+        return load
+
+    @staticmethod
+    def load_objs_area(stream: BinaryStream, data_area: TJSDataArea, lazy: bool = False, progress: Optional[Progress] = None) -> Tuple[Optional[TJSInterCodeContext], List[TJSInterCodeContext]]:
+        """读取对象（代码上下文）信息
+
+        lazy 为 True 时只读取每个对象的头部，并根据 objsize 跳过对象体，
+        代码、数据、源码位置和属性在首次访问时才解码
+        """
 
         tag = stream.read_int32()
         stream.skip(4) # size
@@ -28,7 +115,6 @@ class TJSByteCodeLoader:
         obj_count = stream.read_int32()
         
         objects: List[TJSInterCodeContext | None] = [None] * obj_count  # 存储所有对象
-        work: List[VariantReplace] = []  # 变体替换工作列表
         parents: List[int] = [0] * obj_count  # 父对象索引
         prop_setters: List[int] = [0] * obj_count  # 属性设置器索引
         prop_getters: List[int] = [0] * obj_count  # 属性获取器索引
@@ -42,7 +128,8 @@ class TJSByteCodeLoader:
             if tag != FILE_TAG_LE:
                 raise ValueError("ByteCode broken: invalid object tag")
             
-            stream.skip(4) # objsize
+            objsize = stream.read_int32()
+            obj_start = stream.tell()
             
             # 读取对象属性
             parents[o] = stream.read_int32()
@@ -58,81 +145,33 @@ class TJSByteCodeLoader:
             prop_getters[o] = stream.read_int32()
             super_class_getters[o] = stream.read_int32()
             
-            # 读取源代码位置信息
-            count: int = stream.read_int32()
-            source_positions: List[SourcePos] | None = None
-            if count > 0:
-                # 读取代码位置
-                code_positions = [stream.read_int32() for _ in range(count)]
-                # 读取源代码位置
-                source_positions = [
-                    SourcePos(code_positions[i], stream.read_int32()) for i in range(count)
-                ]
-            else:
-                stream.skip(count * 8)  # 跳过源代码位置数据
-            
-            # 读取代码
-            code_size = stream.read_int32()
-            code: List[int] = [
-                stream.read_uint16() for _ in range(code_size)
-            ]
-            
-            # 对齐到4字节
-            if code_size & 1:
-                stream.skip(2)
-            
-            # 读取数据变体
-            count = stream.read_int32()
-            vcount = count * 2
-            data_list = [stream.read_int16() for _ in range(vcount)]
-            
-            # 创建变体数据
-            vdata = [None] * count
-            for i in range(count):
-                pos = i * 2
-                type_val = data_list[pos]
-                index = data_list[pos + 1]
-                
-                if type_val == TYPE_VOID:
-                    vdata[i] = None
-                elif type_val == TYPE_OBJECT:
-                    vdata[i] = None  # 空对象
-                elif type_val == TYPE_INTER_OBJECT:
-                    work.append(VariantReplace(vdata, i, index))
-                elif type_val == TYPE_INTER_GENERATOR:
-                    work.append(VariantReplace(vdata, i, index))
-                elif type_val == TYPE_STRING:
-                    vdata[i] = data_area.string_array[index]
-                elif type_val == TYPE_OCTET:
-                    vdata[i] = data_area.octet_array[index]
-                elif type_val == TYPE_REAL:
-                    vdata[i] = data_area.double_array[index]
-                elif type_val == TYPE_BYTE:
-                    vdata[i] = data_area.byte_array[index]
-                elif type_val == TYPE_SHORT:
-                    vdata[i] = data_area.short_array[index]
-                elif type_val == TYPE_INTEGER:
-                    vdata[i] = data_area.long_array[index]
-                elif type_val == TYPE_LONG:
-                    vdata[i] = data_area.long_long_array[index]
-                else:  # TYPE_UNKNOWN or default
-                    vdata[i] = None
-            
-            # 读取超类获取器
-            count = stream.read_int32()
-            scgetterps = [stream.read_int32() for _ in range(count)]
-            
-            # 读取属性
-            count = stream.read_int32()
-            if count > 0:
-                pcount = count * 2
-                props = [stream.read_int32() for _ in range(pcount)]
-                properties[o] = props
-            
-            # 创建代码上下文对象
             name = data_area.string_array[name_idx] if name_idx < len(data_area.string_array) else f"obj_{o}"
             context_type = TJSContextType(context_type_val)
+
+            if lazy:
+                body_offset = stream.tell()
+                stream.seek(obj_start + objsize)
+                obj = LazyTJSInterCodeContext(
+                    name=name,
+                    context_type=context_type,
+                    max_variable_count=max_variable_count,
+                    variable_reserve_count=variable_reserve_count,
+                    max_frame_count=max_frame_count,
+                    func_decl_arg_count=func_decl_arg_count,
+                    func_decl_unnamed_arg_array_base=func_decl_unnamed_arg_array_base,
+                    func_decl_collapse_base=func_decl_collapse_base,
+                    body_offset=body_offset,
+                    body_size=obj_start + objsize - body_offset,
+                    body_loader=TJSByteCodeLoader.lazy_body_loader(stream, body_offset, data_area, objects)
+                )
+                objects[o] = obj
+                if progress:
+                    progress(stream.tell(), stream.length)
+                continue
+
+            source_positions, code, vdata, scgetterps, properties[o] = TJSByteCodeLoader.load_obj_body(stream, data_area, objects)
             
+            # 创建代码上下文对象
             obj = TJSInterCodeContext(
                 name=name,
                 context_type=context_type,
@@ -149,6 +188,8 @@ class TJSByteCodeLoader:
             )
             
             objects[o] = obj
+            if progress:
+                progress(stream.tell(), stream.length)
         
         # 设置对象之间的引用关系
         for o in range(obj_count):
@@ -172,33 +213,14 @@ class TJSByteCodeLoader:
             
             # 设置属性
             if properties[o]:
-                props = properties[o]
-                length = len(props) // 2
-                for i in range(length):
-                    pos = i * 2
-                    pname_idx = props[pos]
-                    pobj_idx = props[pos + 1]
-                    
-                    pname = data_area.string_array[pname_idx] if pname_idx < len(data_area.string_array) else f"prop_{i}"
-                    pobj = objects[pobj_idx] if pobj_idx < len(objects) else None
-                    
-                    # 在Python中，我们可能需要以不同的方式处理属性设置
-                    # 这里只是简单地将属性添加到对象的属性字典中
-                    if not hasattr(obj, 'properties'):
-                        obj.properties = {}
-                    obj.properties[pname] = pobj
-        
-        # 处理变体替换工作
-        for w in work:
-            if w.index < len(objects):
-                w.work[w.index] = objects[w.index]
+                TJSByteCodeLoader.resolve_properties(obj, properties[o], objects, data_area)
         
         # 返回顶层对象和所有对象
         top_obj = objects[top_level] if top_level >= 0 and top_level < len(objects) else None
         return top_obj, objects
 
     @staticmethod
-    def load_data_area(stream: BinaryStream) -> Optional[TJSDataArea]:
+    def load_data_area(stream: BinaryStream, progress: Optional[Progress] = None) -> Optional[TJSDataArea]:
         """使用流式读取加载数据区域"""
         data_area = TJSDataArea()
         
@@ -219,7 +241,7 @@ class TJSByteCodeLoader:
         # 2. 读取短整型数组
         count = stream.read_int32()
         if count > 0:
-            data_area.short_array = [stream.read_uint16() for _ in range(count)]
+            data_area.short_array = stream.read_uint16_array(count)
             # 对齐到4字节
             if count & 1:
                 stream.skip(2)
@@ -227,33 +249,37 @@ class TJSByteCodeLoader:
         # 3. 读取整型数组
         count = stream.read_int32()
         if count > 0:
-            data_area.long_array = [stream.read_int32() for _ in range(count)]
+            data_area.long_array = stream.read_int32_array(count)
         
         # 4. 读取长整型数组
         count = stream.read_int32()
         if count > 0:
-            data_area.long_long_array = [stream.read_uint64() for _ in range(count)]
+            data_area.long_long_array = stream.read_uint64_array(count)
         
         # 5. 读取双精度浮点数组
         count = stream.read_int32()
         if count > 0:
-            data_area.double_array = [stream.read_double() for _ in range(count)]
+            data_area.double_array = stream.read_double_array(count)
         
         # 6. 读取字符串数组
         count = stream.read_int32()
         if count > 0:
-            for _ in range(count):
+            for i in range(count):
+                if progress and i & 0x3FF == 0:
+                    progress(stream.tell(), stream.length)
+                
                 # 读取字符串长度
                 length = stream.read_int32()
                 
                 # 读取UTF-16字符串
-                utf16_data = stream.read_bytes(length * 2)
+                start = stream.tell()
                 try:
                     # 尝试解码为UTF-16
-                    string_value = utf16_data.decode('utf-16-le')
+                    string_value = stream.read_utf16(length)
                 except UnicodeDecodeError:
                     # 如果解码失败，使用原始字节的十六进制表示
-                    string_value = f"hex:{utf16_data.hex()}"
+                    stream.seek(start)
+                    string_value = f"hex:{stream.read_bytes(length * 2).hex()}"
                 
                 data_area.string_array.append(string_value)
                 
@@ -292,25 +318,55 @@ class TJSByteCodeLoader:
         return tag == FILE_TAG_LE and ver == VER_TAG_LE
     
     @staticmethod
-    def load_bytecode(file_path: str) -> Optional[Tuple[Optional[TJSInterCodeContext], List[TJSInterCodeContext], TJSDataArea]]:
-        """加载TJS字节码文件"""
+    def load_bytecode(file_path: str, lazy: bool = False, progress: Optional[Progress] = None,
+                      cache: Optional['DiskCache'] = None, strict: bool = False) -> Optional[Tuple[Optional[TJSInterCodeContext], List[TJSInterCodeContext], TJSDataArea]]:
+        """加载TJS字节码文件，lazy 为 True 时对象体按需解码
+
+        progress 会以已读取的字节数被周期性调用，回调抛出的 LoadCancelled 会传给调用者。
+        指定 cache 时先按文件内容查找磁盘快照，未命中则完整解析后写入快照。
+        解析失败时打印原因并返回 None；strict 为 True 时把异常交给调用者，不是字节码的文件仍返回 None
+        """
         try:
-            with open(file_path, 'rb') as f:
-                stream = BinaryStream(f.read())
-                
+            stream = MappedBinaryStream.open(file_path)
+
             if not TJSByteCodeLoader.is_tjs2_bytecode(stream):
                 return None
                 
             exceptFilesize = stream.read_int32()
             if exceptFilesize != stream.length: raise Exception("文件损坏")
 
-            data_area = TJSByteCodeLoader.load_data_area(stream)
+            cache_key = None
+            if cache is not None:
+                try:
+                    cache_key = cache.key(stream.data)
+                    result = cache.load(cache_key, lazy)
+                except Exception as e:
+                    # 缓存出错只当作未命中，不影响解析
+                    print(f"Disk cache unavailable: {e}")
+                    cache_key = result = None
+                if result is not None:
+                    if progress: progress(stream.length, stream.length)
+                    return result
+                if cache_key is not None:
+                    # 快照需要完整的对象体
+                    lazy = False
+
+            data_area = TJSByteCodeLoader.load_data_area(stream, progress)
             if not data_area: raise Exception("读取Data Area失败")
             # 加载对象区域
-            top_obj, objects = TJSByteCodeLoader.load_objs_area(stream, data_area)
-            
+            top_obj, objects = TJSByteCodeLoader.load_objs_area(stream, data_area, lazy, progress)
+
+            if cache_key is not None:
+                try:
+                    cache.store(cache_key, (top_obj, objects, data_area))
+                except Exception as e:
+                    print(f"Disk cache unavailable: {e}")
             return top_obj, objects, data_area
             
+        except LoadCancelled:
+            raise
         except Exception as e:
+            if strict:
+                raise
             print(f"Error loading bytecode: {e}")
             return None
@@ -1,4 +1,6 @@
+from dataclasses import dataclass, field
 from enum import Enum, IntEnum, auto
+from typing import List, Optional, Sequence, Tuple
 
 # TJS2 字节码文件标记 小端表示
 FILE_TAG_LE = 0x32534A54  # 'TJS2
@@ -170,3 +172,161 @@ class FuncArgType(Enum):
     fatNormal = 0
     fatExpand = 1
     fatUnnamedExpand = 2
+
+
+class OperandKind(Enum):
+    """指令操作数类型"""
+    REG = auto()    # 寄存器 %n
+    DATA = auto()   # 数据区索引 *n
+    CODE = auto()   # 相对当前指令的代码偏移
+    COUNT = auto()  # 前一个寄存器开始的寄存器个数 (ccl)
+    ARGS = auto()   # 可变长参数列表 (call 系列)，必须是最后一个操作数
+
+@dataclass(frozen=True, slots=True)
+class InstructionFormat:
+    """指令格式：操作数类型和显示模板
+
+    template 使用 str.format，位置参数依次为各操作数的显示值，
+    ARGS 操作数展开后的参数列表为 {args}
+    """
+    operands: Tuple[OperandKind, ...] = ()
+    template: str = ''
+    comment: str = ''
+    # 固定长度 (含操作码)，可变长指令为到参数个数字为止的长度
+    size: int = field(init=False)
+    variable: bool = field(init=False)
+    # 操作数只有寄存器和数据区索引时可以按切片直接解码
+    registers_only: bool = field(init=False)
+    # 数据区索引操作数的位置，没有时为-1
+    data_operand: int = field(init=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, 'size', 1 + len(self.operands))
+        object.__setattr__(self, 'variable', OperandKind.ARGS in self.operands)
+        object.__setattr__(self, 'registers_only',
+                           all(kind in (OperandKind.REG, OperandKind.DATA) for kind in self.operands))
+        object.__setattr__(self, 'data_operand',
+                           self.operands.index(OperandKind.DATA) if OperandKind.DATA in self.operands else -1)
+
+def _build_instruction_formats() -> List[Optional[InstructionFormat]]:
+    R, D, C = OperandKind.REG, OperandKind.DATA, OperandKind.CODE
+    op = TJSVMOpcode
+
+    none = InstructionFormat()
+    r1 = InstructionFormat((R,), "%{0}")
+    r2 = InstructionFormat((R, R), "%{0}, %{1}")
+    jump = InstructionFormat((C,), "0x{0:09X}")
+    get_d = InstructionFormat((R, R, D), "%{0}, %{1}.*{2}")
+    get_i = InstructionFormat((R, R, R), "%{0}, %{1}.%{2}")
+
+    formats = {
+        op.VM_NOP: none, op.VM_RET: none, op.VM_EXTRY: none,
+        op.VM_REGMEMBER: none, op.VM_DEBUGGER: none,
+        op.VM_NF: InstructionFormat(comment="!"),
+        op.VM_CONST: InstructionFormat((R, D), "%{0}, *{1}"),
+        op.VM_CCL: InstructionFormat((R, OperandKind.COUNT), "%{0}-%{1}"),
+        op.VM_JF: jump, op.VM_JNF: jump, op.VM_JMP: jump,
+        op.VM_ENTRY: InstructionFormat((C, R), "{0:09d}, %{1}"),
+        op.VM_CALL: InstructionFormat((R, R, OperandKind.ARGS), "%{0}, %{1}({args})"),
+        op.VM_NEW: InstructionFormat((R, R, OperandKind.ARGS), "%{0}, %{1}({args})"),
+        op.VM_CALLD: InstructionFormat((R, R, D, OperandKind.ARGS), "%{0}, %{1}.*{2}({args})"),
+        op.VM_CALLI: InstructionFormat((R, R, R, OperandKind.ARGS), "%{0}, %{1}.%{2}({args})"),
+    }
+    for opcode in (op.VM_CP, op.VM_CEQ, op.VM_CDEQ, op.VM_CLT, op.VM_CGT, op.VM_CHKINS,
+                   op.VM_SETP, op.VM_GETP, op.VM_CHGTHIS, op.VM_ADDCI):
+        formats[opcode] = r2
+    for opcode in (op.VM_TT, op.VM_TF, op.VM_SETF, op.VM_SETNF, op.VM_LNOT, op.VM_BNOT,
+                   op.VM_ASC, op.VM_CHR, op.VM_NUM, op.VM_CHS, op.VM_CL, op.VM_INV,
+                   op.VM_CHKINV, op.VM_TYPEOF, op.VM_EVAL, op.VM_EEXP, op.VM_INT,
+                   op.VM_REAL, op.VM_STR, op.VM_OCTET, op.VM_SRV, op.VM_THROW, op.VM_GLOBAL):
+        formats[opcode] = r1
+    for opcode in (op.VM_GPD, op.VM_GPDS, op.VM_DELD, op.VM_TYPEOFD):
+        formats[opcode] = get_d
+    for opcode in (op.VM_GPI, op.VM_GPIS, op.VM_DELI, op.VM_TYPEOFI):
+        formats[opcode] = get_i
+    for opcode in (op.VM_SPD, op.VM_SPDE, op.VM_SPDEH, op.VM_SPDS):
+        formats[opcode] = InstructionFormat((R, D, R), "%{0}.*{1}, %{2}")
+    for opcode in (op.VM_SPI, op.VM_SPIE, op.VM_SPIS):
+        formats[opcode] = InstructionFormat((R, R, R), "%{0}.%{1}, %{2}")
+
+    # 带 pd/pi/p 变体的二元运算
+    for base in (op.VM_LOR, op.VM_LAND, op.VM_BOR, op.VM_BXOR, op.VM_BAND, op.VM_SAR,
+                 op.VM_SAL, op.VM_SR, op.VM_ADD, op.VM_SUB, op.VM_MOD, op.VM_DIV,
+                 op.VM_IDIV, op.VM_MUL):
+        formats[base] = r2
+        formats[base + 1] = InstructionFormat((R, R, D, R), "%{0}, %{1}.*{2}, %{3}")
+        formats[base + 2] = InstructionFormat((R, R, R, R), "%{0}, %{1}.%{2}, %{3}")
+        formats[base + 3] = InstructionFormat((R, R, R), "%{0}, %{1}, %{2}")
+    # 自增自减的 pd/pi/p 变体
+    for base in (op.VM_INC, op.VM_DEC):
+        formats[base] = r1
+        formats[base + 1] = get_d
+        formats[base + 2] = get_i
+        formats[base + 3] = r2
+
+    table: List[Optional[InstructionFormat]] = [None] * (max(op) + 1)
+    for opcode, fmt in formats.items():
+        table[opcode] = fmt
+    return table
+
+# 按操作码值索引的指令格式表
+INSTRUCTION_FORMATS = _build_instruction_formats()
+
+class XRefKind(Enum):
+    """交叉引用类型"""
+    CONST = auto()   # 引用数据区常量的任意指令
+    READ = auto()    # 读取成员 (gpd/gpds 及先读后写的 pd 运算)
+    WRITE = auto()   # 写入成员 (spd 系列及先读后写的 pd 运算)
+    CALL = auto()    # 调用成员方法 (calld)
+    DELETE = auto()  # 删除成员 (deld)
+    TYPEOF = auto()  # 成员的 typeof (typeofd)
+
+def _build_xref_kinds() -> List[Tuple[XRefKind, ...]]:
+    op = TJSVMOpcode
+    kinds = {
+        op.VM_CONST: (XRefKind.CONST,),
+        op.VM_GPD: (XRefKind.CONST, XRefKind.READ),
+        op.VM_GPDS: (XRefKind.CONST, XRefKind.READ),
+        op.VM_CALLD: (XRefKind.CONST, XRefKind.CALL),
+        op.VM_DELD: (XRefKind.CONST, XRefKind.DELETE),
+        op.VM_TYPEOFD: (XRefKind.CONST, XRefKind.TYPEOF),
+    }
+    for opcode in (op.VM_SPD, op.VM_SPDE, op.VM_SPDEH, op.VM_SPDS):
+        kinds[opcode] = (XRefKind.CONST, XRefKind.WRITE)
+    for base in (op.VM_LOR, op.VM_LAND, op.VM_BOR, op.VM_BXOR, op.VM_BAND, op.VM_SAR,
+                 op.VM_SAL, op.VM_SR, op.VM_ADD, op.VM_SUB, op.VM_MOD, op.VM_DIV,
+                 op.VM_IDIV, op.VM_MUL, op.VM_INC, op.VM_DEC):
+        kinds[base + 1] = (XRefKind.CONST, XRefKind.READ, XRefKind.WRITE)
+
+    table: List[Tuple[XRefKind, ...]] = [()] * len(INSTRUCTION_FORMATS)
+    for opcode, kind in kinds.items():
+        table[opcode] = kind
+    return table
+
+# 按操作码值索引，引用数据区的指令产生的交叉引用类型
+XREF_KINDS = _build_xref_kinds()
+
+def code_offset(word: int) -> int:
+    """跳转偏移按有符号16位解释，代码区按 uint16 读取时向后跳转的偏移是一个很大的正数"""
+    return word - 0x10000 if word >= 0x8000 else word
+
+def instruction_size(code_area: Sequence[int], i: int) -> int:
+    """根据格式表计算位于 i 的指令长度，不做任何格式化，未知操作码按1计算"""
+    opcode = code_area[i]
+    fmt = INSTRUCTION_FORMATS[opcode] if opcode < len(INSTRUCTION_FORMATS) else None
+    if fmt is None:
+        return 1
+    st = fmt.size
+    if not fmt.variable:
+        return st
+    num = code_area[i + st - 1]
+    if num >= 0x8000:
+        # 代码区按 uint16 读取，-1/-2 读出来是 0xFFFF/0xFFFE
+        num -= 0x10000
+    if num == -1:
+        # omit arg
+        return st
+    if num == -2:
+        # expand arg
+        return st + 1 + code_area[i + st] * 2
+    return st + num
@@ -1,15 +1,36 @@
 
-from typing import List, Optional, Any
+from collections import defaultdict
+import re
+from typing import Callable, Dict, Hashable, Iterator, List, Optional, Any, Tuple
 
-from .tjs_const import FuncArgType, TJSVMOpcode
+from .tjs_const import FuncArgType, TJSVMOpcode, OperandKind, InstructionFormat, INSTRUCTION_FORMATS, XREF_KINDS, XRefKind, code_offset, instruction_size
 from .tjs_entity import *
 
+type XRef = Tuple[int, int]  # (对象索引, 指令地址)
+
+# 控制字符显示为转义序列，避免换行等字符打断列表的一行
+_CONTROL_ESCAPES = {i: f"\\x{i:02x}" for i in (*range(0x20), 0x7F)}
+_CONTROL_ESCAPES.update({ord('\n'): "\\n", ord('\r'): "\\r", ord('\t'): "\\t"})
+_CONTROL_CHARS = re.compile('[\x00-\x1f\x7f]')
+
 class TJSDisassembler:
+    # 常量注释的默认最大长度，None 表示不截断
+    DEFAULT_MAX_CONST_LENGTH = 256
+
     def __init__(self, top_obj: Optional[TJSInterCodeContext], 
-                objects: List[TJSInterCodeContext], data_area: TJSDataArea):
+                objects: List[TJSInterCodeContext], data_area: TJSDataArea,
+                max_const_length: Optional[int] = DEFAULT_MAX_CONST_LENGTH):
         self.top_obj = top_obj
         self.objects = objects
         data_area = data_area
+        self.max_const_length = max_const_length
+        self._xrefs: Optional[Dict[Tuple[XRefKind, Hashable], List[XRef]]] = None
+        # id(上下文) -> 按数据区索引缓存的常量注释文本
+        self._const_text: Dict[int, List[Optional[str]]] = {}
+        # 相同的注释文本只保留一份，各上下文共用
+        self._interned: Dict[str, str] = {}
+        # id(对象) -> 对象索引，对象常量的注释用到时才建立
+        self._object_index: Optional[Dict[int, int]] = None
         
     @staticmethod
     def from_vm_reg_addr(addr: int) -> int:
@@ -31,27 +52,86 @@ class TJSDisassembler:
         return addr # // tjs_uint32_size
     
     @staticmethod
-    def get_const_data(base: TJSInterCodeContext.Data, x: int) -> None | int | float | str | bytes:
+    def get_const_data(base: TJSInterCodeContext.Data, x: int) -> None | int | float | str | bytes | memoryview:
         if len(base) <= x:
-            raise Exception(f"get_const_data: {base}, {x}")
+            raise Exception(f"get_const_data: index {x} out of range ({len(base)})")
         return base[x]
     
-    def get_value_comment(self, value: None | int | float | str | bytes) -> str:
-        """获取值的注释表示"""
+    def get_value_comment(self, value: None | int | float | str | bytes | memoryview | TJSInterCodeContext) -> str:
+        """获取值的注释表示，控制字符转义，超过 max_const_length 的字符串和八位字节数据截断"""
         if value is None:
             return "null"
-        return str(value)
+        if isinstance(value, TJSInterCodeContext):
+            # 只显示对象的索引和名称，不生成整个对象的 repr，也不解码按需加载的对象体
+            return self.object_comment(value)
+        limit = self.max_const_length
+        if isinstance(value, (bytes, memoryview)):
+            # 八位字节数据可能是映射文件的切片，只复制要显示的部分
+            if limit is not None and len(value) > limit:
+                return f"{bytes(value[:limit])}... ({len(value)} bytes)"
+            return str(bytes(value))
+        if not isinstance(value, str):
+            return str(value)
+        if limit is not None and len(value) > limit:
+            return f"{value[:limit].translate(_CONTROL_ESCAPES)}... ({len(value)} chars)"
+        # 没有控制字符时直接使用数据区中的字符串，不复制
+        return value.translate(_CONTROL_ESCAPES) if _CONTROL_CHARS.search(value) else value
+
+    def object_comment(self, obj: TJSInterCodeContext) -> str:
+        """对象常量的注释文本: object [索引] 名称"""
+        if self._object_index is None:
+            self._object_index = {id(o): i for i, o in enumerate(self.objects)}
+        index = self._object_index.get(id(obj))
+        return f"object [{'?' if index is None else index}] {obj.name}"
+
+    def const_comment(self, context: TJSInterCodeContext, index: int) -> str:
+        """引用上下文数据区第 index 项的指令注释，每项只格式化一次，引用同一项的指令共用同一个字符串"""
+        texts = self._const_text.get(id(context))
+        if texts is None:
+            texts = self._const_text.setdefault(id(context), [None] * len(context.data))
+        text = texts[index] if index < len(texts) else None
+        if text is None:
+            value = self.get_value_comment(self.get_const_data(context.data, index))
+            text = f"*{self.from_vm_reg_addr(index)} = {value}"
+            text = self._interned.setdefault(text, text)
+            texts[index] = text
+        return text
+
+    @classmethod
+    def dispatch_table(cls) -> List[Optional[Callable[..., DisassembledInstruction]]]:
+        """按操作码值索引的处理函数表，每个类只构建一次
+
+        表项统一为 handler(self, i, obj, code_area, opcode)
+        """
+        table = cls.__dict__.get('_dispatch_table')
+        if table is None:
+            table = cls._build_dispatch_table()
+            cls._dispatch_table = table
+        return table
+
+    @classmethod
+    def _build_dispatch_table(cls) -> List[Optional[Callable[..., DisassembledInstruction]]]:
+        def handler(mnemonic: str, fmt: InstructionFormat):
+            return lambda self, i, obj, code_area, opcode: self._disassemble_format(i, obj, code_area, mnemonic, fmt)
+
+        table: List[Optional[Callable[..., DisassembledInstruction]]] = [None] * len(INSTRUCTION_FORMATS)
+        for opcode in TJSVMOpcode:
+            fmt = INSTRUCTION_FORMATS[opcode]
+            if fmt is not None:
+                table[opcode] = handler(opcode.name[3:].lower(), fmt)
+        return table
 
     def disassemble(self, obj_index: int = 0, start: int = 0, end: Optional[int] = None) -> List[DisassembledInstruction]:
         """反汇编指定对象的代码区域"""
-        
-        instructions: List[DisassembledInstruction] = []
+        return list(self.iter_instructions(obj_index, start, end))
+
+    def iter_instructions(self, obj_index: int = 0, start: int = 0, end: Optional[int] = None) -> Iterator[DisassembledInstruction]:
+        """逐条产生指定对象代码区域的指令，不保留整个指令列表"""
 
         if obj_index >= len(self.objects):
-            return []
+            return
             
         obj = self.objects[obj_index]
-        data_area = obj.data
         code_area = obj.code
         
         if end is None:
@@ -59,1054 +139,204 @@ class TJSDisassembler:
         elif end > len(code_area):
             end = len(code_area)
             
+        table = self.dispatch_table()
+        table_size = len(table)
         i = start
         
         while i < end:
             
             # 解码指令
             opcode_val = code_area[i]
-            try:
-                opcode = TJSVMOpcode(opcode_val)
-            except ValueError:
+            handler = table[opcode_val] if opcode_val < table_size else None
+            if handler is None:
                 # 未知操作码
-                instruction = DisassembledInstruction(
+                yield DisassembledInstruction(
                     address=i,
                     opcode=f"unknown ({opcode_val})",
                     size=1,
+                    opcode_value=opcode_val,
                 )
-                instructions.append(instruction)
                 i += 1
                 continue
-                
-            # 根据操作码解码
-            if opcode == TJSVMOpcode.VM_NOP:
-                disasm = self._disassemble_nop(i)
-            elif opcode == TJSVMOpcode.VM_NF:
-                disasm = self._disassemble_nf(i)
-            elif opcode == TJSVMOpcode.VM_CONST:
-                disasm = self._disassemble_const(i, data_area, code_area)
-            elif opcode == TJSVMOpcode.VM_CP:
-                disasm = self._disassemble_cp(i, data_area, code_area)
-            elif opcode == TJSVMOpcode.VM_CEQ:
-                disasm = self._disassemble_ceq(i, data_area, code_area)
-            elif opcode == TJSVMOpcode.VM_CDEQ:
-                disasm = self._disassemble_cdeq(i, data_area, code_area)
-            elif opcode == TJSVMOpcode.VM_CLT:
-                disasm = self._disassemble_clt(i, data_area, code_area)
-            elif opcode == TJSVMOpcode.VM_CGT:
-                disasm = self._disassemble_cgt(i, data_area, code_area)
-            elif opcode == TJSVMOpcode.VM_CHKINS:
-                disasm = self._disassemble_chkins(i, data_area, code_area)
-            elif opcode in [TJSVMOpcode.VM_LOR, TJSVMOpcode.VM_LOR + 1, TJSVMOpcode.VM_LOR + 2, TJSVMOpcode.VM_LOR + 3]:
-                disasm = self._disassemble_lor(i, data_area, code_area, opcode)
-            elif opcode in [TJSVMOpcode.VM_LAND, TJSVMOpcode.VM_LAND + 1, TJSVMOpcode.VM_LAND + 2, TJSVMOpcode.VM_LAND + 3]:
-                disasm = self._disassemble_land(i, data_area, code_area, opcode)
-            elif opcode in [TJSVMOpcode.VM_BOR, TJSVMOpcode.VM_BOR + 1, TJSVMOpcode.VM_BOR + 2, TJSVMOpcode.VM_BOR + 3]:
-                disasm = self._disassemble_bor(i, data_area, code_area, opcode)
-            elif opcode in [TJSVMOpcode.VM_BXOR, TJSVMOpcode.VM_BXOR + 1, TJSVMOpcode.VM_BXOR + 2, TJSVMOpcode.VM_BXOR + 3]:
-                disasm = self._disassemble_bxor(i, data_area, code_area, opcode)
-            elif opcode in [TJSVMOpcode.VM_BAND, TJSVMOpcode.VM_BAND + 1, TJSVMOpcode.VM_BAND + 2, TJSVMOpcode.VM_BAND + 3]:
-                disasm = self._disassemble_band(i, data_area, code_area, opcode)
-            elif opcode in [TJSVMOpcode.VM_SAR, TJSVMOpcode.VM_SAR + 1, TJSVMOpcode.VM_SAR + 2, TJSVMOpcode.VM_SAR + 3]:
-                disasm = self._disassemble_sar(i, data_area, code_area, opcode)
-            elif opcode in [TJSVMOpcode.VM_SAL, TJSVMOpcode.VM_SAL + 1, TJSVMOpcode.VM_SAL + 2, TJSVMOpcode.VM_SAL + 3]:
-                disasm = self._disassemble_sal(i, data_area, code_area, opcode)
-            elif opcode in [TJSVMOpcode.VM_SR, TJSVMOpcode.VM_SR + 1, TJSVMOpcode.VM_SR + 2, TJSVMOpcode.VM_SR + 3]:
-                disasm = self._disassemble_sr(i, data_area, code_area, opcode)
-            elif opcode in [TJSVMOpcode.VM_ADD, TJSVMOpcode.VM_ADD + 1, TJSVMOpcode.VM_ADD + 2, TJSVMOpcode.VM_ADD + 3]:
-                disasm = self._disassemble_add(i, data_area, code_area, opcode)
-            elif opcode in [TJSVMOpcode.VM_SUB, TJSVMOpcode.VM_SUB + 1, TJSVMOpcode.VM_SUB + 2, TJSVMOpcode.VM_SUB + 3]:
-                disasm = self._disassemble_sub(i, data_area, code_area, opcode)
-            elif opcode in [TJSVMOpcode.VM_MOD, TJSVMOpcode.VM_MOD + 1, TJSVMOpcode.VM_MOD + 2, TJSVMOpcode.VM_MOD + 3]:
-                disasm = self._disassemble_mod(i, data_area, code_area, opcode)
-            elif opcode in [TJSVMOpcode.VM_DIV, TJSVMOpcode.VM_DIV + 1, TJSVMOpcode.VM_DIV + 2, TJSVMOpcode.VM_DIV + 3]:
-                disasm = self._disassemble_div(i, data_area, code_area, opcode)
-            elif opcode in [TJSVMOpcode.VM_IDIV, TJSVMOpcode.VM_IDIV + 1, TJSVMOpcode.VM_IDIV + 2, TJSVMOpcode.VM_IDIV + 3]:
-                disasm = self._disassemble_idiv(i, data_area, code_area, opcode)
-            elif opcode in [TJSVMOpcode.VM_MUL, TJSVMOpcode.VM_MUL + 1, TJSVMOpcode.VM_MUL + 2, TJSVMOpcode.VM_MUL + 3]:
-                disasm = self._disassemble_mul(i, data_area, code_area, opcode)
-            elif opcode == TJSVMOpcode.VM_TT:
-                disasm = self._disassemble_tt(i, code_area)
-            elif opcode == TJSVMOpcode.VM_TF:
-                disasm = self._disassemble_tf(i, code_area)
-            elif opcode == TJSVMOpcode.VM_SETF:
-                disasm = self._disassemble_setf(i, code_area)
-            elif opcode == TJSVMOpcode.VM_SETNF:
-                disasm = self._disassemble_setnf(i, data_area, code_area)
-            elif opcode == TJSVMOpcode.VM_LNOT:
-                disasm = self._disassemble_lnot(i, data_area, code_area)
-            elif opcode == TJSVMOpcode.VM_BNOT:
-                disasm = self._disassemble_bnot(i, data_area, code_area)
-            elif opcode == TJSVMOpcode.VM_ASC:
-                disasm = self._disassemble_asc(i, data_area, code_area)
-            elif opcode == TJSVMOpcode.VM_CHR:
-                disasm = self._disassemble_chr(i, data_area, code_area)
-            elif opcode == TJSVMOpcode.VM_NUM:
-                disasm = self._disassemble_num(i, data_area, code_area)
-            elif opcode == TJSVMOpcode.VM_CHS:
-                disasm = self._disassemble_chs(i, data_area, code_area)
-            elif opcode == TJSVMOpcode.VM_CL:
-                disasm = self._disassemble_cl(i, data_area, code_area)
-            elif opcode == TJSVMOpcode.VM_INV:
-                disasm = self._disassemble_inv(i, data_area, code_area)
-            elif opcode == TJSVMOpcode.VM_CHKINV:
-                disasm = self._disassemble_chkinv(i, data_area, code_area)
-            elif opcode == TJSVMOpcode.VM_TYPEOF:
-                disasm = self._disassemble_typeof(i, data_area, code_area)
-            elif opcode == TJSVMOpcode.VM_EVAL:
-                disasm = self._disassemble_eval(i, data_area, code_area)
-            elif opcode == TJSVMOpcode.VM_EEXP:
-                disasm = self._disassemble_eexp(i, data_area, code_area)
-            elif opcode == TJSVMOpcode.VM_INT:
-                disasm = self._disassemble_int(i, data_area, code_area)
-            elif opcode == TJSVMOpcode.VM_REAL:
-                disasm = self._disassemble_real(i, data_area, code_area)
-            elif opcode == TJSVMOpcode.VM_STR:
-                disasm = self._disassemble_str(i, data_area, code_area)
-            elif opcode == TJSVMOpcode.VM_OCTET:
-                disasm = self._disassemble_octet(i, data_area, code_area)
-            elif opcode == TJSVMOpcode.VM_CCL:
-                disasm = self._disassemble_ccl(i, data_area, code_area)
-            elif opcode in [TJSVMOpcode.VM_INC, TJSVMOpcode.VM_INC + 1, TJSVMOpcode.VM_INC + 2, TJSVMOpcode.VM_INC + 3]:
-                disasm = self._disassemble_inc(i, data_area, code_area, opcode)
-            elif opcode in [TJSVMOpcode.VM_DEC, TJSVMOpcode.VM_DEC + 1, TJSVMOpcode.VM_DEC + 2, TJSVMOpcode.VM_DEC + 3]:
-                disasm = self._disassemble_dec(i, data_area, code_area, opcode)
-            elif opcode == TJSVMOpcode.VM_JF:
-                disasm = self._disassemble_jf(i, data_area, code_area)
-            elif opcode == TJSVMOpcode.VM_JNF:
-                disasm = self._disassemble_jnf(i, data_area, code_area)
-            elif opcode == TJSVMOpcode.VM_JMP:
-                disasm = self._disassemble_jmp(i, data_area, code_area)
-            elif opcode in [TJSVMOpcode.VM_CALL, TJSVMOpcode.VM_CALLD, TJSVMOpcode.VM_CALLI, TJSVMOpcode.VM_NEW]:
-                disasm = self._disassemble_call(i, data_area, code_area, opcode)
-            elif opcode in [TJSVMOpcode.VM_GPD, TJSVMOpcode.VM_GPDS]:
-                disasm = self._disassemble_gpd(i, data_area, code_area, opcode)
-            elif opcode in [TJSVMOpcode.VM_SPD, TJSVMOpcode.VM_SPDE, TJSVMOpcode.VM_SPDEH, TJSVMOpcode.VM_SPDS]:
-                disasm = self._disassemble_spd(i, data_area, code_area, opcode)
-            elif opcode in [TJSVMOpcode.VM_GPI, TJSVMOpcode.VM_GPIS]:
-                disasm = self._disassemble_gpi(i, data_area, code_area, opcode)
-            elif opcode in [TJSVMOpcode.VM_SPI, TJSVMOpcode.VM_SPIE, TJSVMOpcode.VM_SPIS]:
-                disasm = self._disassemble_spi(i, data_area, code_area, opcode)
-            elif opcode == TJSVMOpcode.VM_SETP:
-                disasm = self._disassemble_setp(i, data_area, code_area)
-            elif opcode == TJSVMOpcode.VM_GETP:
-                disasm = self._disassemble_getp(i, data_area, code_area)
-            elif opcode in [TJSVMOpcode.VM_DELD, TJSVMOpcode.VM_TYPEOFD]:
-                disasm = self._disassemble_deld(i, data_area, code_area, opcode)
-            elif opcode in [TJSVMOpcode.VM_DELI, TJSVMOpcode.VM_TYPEOFI]:
-                disasm = self._disassemble_deli(i, data_area, code_area, opcode)
-            elif opcode == TJSVMOpcode.VM_SRV:
-                disasm = self._disassemble_srv(i, data_area, code_area)
-            elif opcode == TJSVMOpcode.VM_RET:
-                disasm = self._disassemble_ret(i, data_area, code_area)
-            elif opcode == TJSVMOpcode.VM_ENTRY:
-                disasm = self._disassemble_entry(i, data_area, code_area)
-            elif opcode == TJSVMOpcode.VM_EXTRY:
-                disasm = self._disassemble_extry(i, data_area, code_area)
-            elif opcode == TJSVMOpcode.VM_THROW:
-                disasm = self._disassemble_throw(i, data_area, code_area)
-            elif opcode == TJSVMOpcode.VM_CHGTHIS:
-                disasm = self._disassemble_chgthis(i, data_area, code_area)
-            elif opcode == TJSVMOpcode.VM_GLOBAL:
-                disasm = self._disassemble_global(i, data_area, code_area)
-            elif opcode == TJSVMOpcode.VM_ADDCI:
-                disasm = self._disassemble_addci(i, data_area, code_area)
-            elif opcode == TJSVMOpcode.VM_REGMEMBER:
-                disasm = self._disassemble_regmember(i, data_area, code_area)
-            elif opcode == TJSVMOpcode.VM_DEBUGGER:
-                disasm = self._disassemble_debugger(i, data_area, code_area)
-            else:
-                # 默认处理未知操作码
-                disasm = DisassembledInstruction(
-                    address=i,
-                    opcode=opcode.name,
-                    operands="",
-                    comment=f"Not implemented yet",
-                    size=1,
-                )
             
-            instructions.append(disasm)
+            disasm = handler(self, i, obj, code_area, opcode_val)
+            yield disasm
             i += disasm.size
-            
-        return instructions
-    
-    def _disassemble_lor(self, i, data_area, code_area, opcode):
-        return self._disassemble_op2(TJSVMOpcode.VM_LOR, "lor", i, data_area, code_area, opcode)
-
-    def _disassemble_land(self, i, data_area, code_area, opcode):
-        return self._disassemble_op2(TJSVMOpcode.VM_LAND, "land", i, data_area, code_area, opcode)
 
-    def _disassemble_bor(self, i, data_area, code_area, opcode):
-        return self._disassemble_op2(TJSVMOpcode.VM_BOR, "bor", i, data_area, code_area, opcode)
+    def iter_all(self) -> Iterator[Tuple[int, DisassembledInstruction]]:
+        """依次产生所有对象的 (对象索引, 指令)"""
+        for obj_index in range(len(self.objects)):
+            for instr in self.iter_instructions(obj_index):
+                yield obj_index, instr
 
-    def _disassemble_bxor(self, i, data_area, code_area, opcode):
-        return self._disassemble_op2(TJSVMOpcode.VM_BXOR, "bxor", i, data_area, code_area, opcode)
+    @staticmethod
+    def xref_key(value: Any) -> Optional[Hashable]:
+        """常量在交叉引用索引中的键，只索引字符串、数值和八位字节数据"""
+        if isinstance(value, (str, int, float, bytes)):
+            return value
+        if isinstance(value, memoryview):
+            return value.tobytes()
+        return None
 
-    def _disassemble_band(self, i, data_area, code_area, opcode):
-        return self._disassemble_op2(TJSVMOpcode.VM_BAND, "band", i, data_area, code_area, opcode)
+    def xref_index(self) -> Dict[Tuple[XRefKind, Hashable], List[XRef]]:
+        """(引用类型, 常量) -> 引用它的 (对象索引, 指令地址) 列表，首次调用时扫描所有对象建立"""
+        if self._xrefs is None:
+            self._xrefs = self._build_xref_index()
+        return self._xrefs
 
-    def _disassemble_sar(self, i, data_area, code_area, opcode):
-        return self._disassemble_op2(TJSVMOpcode.VM_SAR, "sar", i, data_area, code_area, opcode)
+    def _build_xref_index(self) -> Dict[Tuple[XRefKind, Hashable], List[XRef]]:
+        # 只按格式表计算指令长度，不生成指令记录
+        index: Dict[Tuple[XRefKind, Hashable], List[XRef]] = defaultdict(list)
+        # 数据区是 VariantTable 的对象先按 (类型, 池索引) 归类，不需要取值和计算字符串哈希，
+        # 扫描结束后每个常量只取一次值
+        tagged: Dict[Tuple[XRefKind, int], List[XRef]] = defaultdict(list)
+        # 每个操作码: (定长指令的长度或 0, 数据区操作数位置, 引用类型)
+        steps = [(0 if fmt is None or fmt.variable else fmt.size,
+                  -1 if fmt is None else fmt.data_operand + 1,
+                  kinds)
+                 for fmt, kinds in zip(INSTRUCTION_FORMATS, XREF_KINDS)]
+        table_size = len(steps)
+        xref_key = self.xref_key
+        tables: Dict[int, VariantTable] = {}
+        for obj_index, obj in enumerate(self.objects):
+            code_area = obj.code
+            data = obj.data
+            data_size = len(data)
+            tags = data.tags if isinstance(data, VariantTable) else None
+            if tags is not None:
+                tables.setdefault(id(data.data_area), data)
+            end = len(code_area)
+            i = 0
+            while i < end:
+                opcode_val = code_area[i]
+                if opcode_val >= table_size:
+                    i += 1
+                    continue
+                size, data_pos, kinds = steps[opcode_val]
+                if data_pos > 0 and i + data_pos < end and code_area[i + data_pos] < data_size:
+                    slot = code_area[i + data_pos]
+                    ref = (obj_index, i)
+                    if tags is not None:
+                        # 按 (常量池, 类型, 池索引) 归类
+                        key = (id(data.data_area), tags[slot * 2], tags[slot * 2 + 1])
+                        for kind in kinds:
+                            tagged[kind, key].append(ref)
+                    else:
+                        key = xref_key(data[slot])
+                        if key is not None:
+                            for kind in kinds:
+                                index[kind, key].append(ref)
+                i += size or instruction_size(code_area, i)
 
-    def _disassemble_sal(self, i, data_area, code_area, opcode):
-        return self._disassemble_op2(TJSVMOpcode.VM_SAL, "sal", i, data_area, code_area, opcode)
+        merged = set()
+        for (kind, (area, type_val, pool_index)), refs in tagged.items():
+            key = xref_key(tables[area].resolve(type_val, pool_index))
+            if key is None:
+                continue
+            existing = index.get((kind, key))
+            if existing is None:
+                index[kind, key] = refs
+            else:
+                # 同一个值出现在不同的池项或数据区中，合并后恢复地址顺序
+                existing.extend(refs)
+                merged.add((kind, key))
+        for kind_key in merged:
+            index[kind_key].sort()
+        return dict(index)
 
-    def _disassemble_sr(self, i, data_area, code_area, opcode):
-        return self._disassemble_op2(TJSVMOpcode.VM_SR, "sr", i, data_area, code_area, opcode)
+    def xrefs(self, value: Any, kind: XRefKind = XRefKind.CONST) -> List[XRef]:
+        """查询以 kind 方式引用常量 value 的所有 (对象索引, 指令地址)，返回的列表不要修改"""
+        key = self.xref_key(value)
+        if key is None:
+            return []
+        return self.xref_index().get((kind, key), [])
 
-    def _disassemble_add(self, i, data_area, code_area, opcode):
-        return self._disassemble_op2(TJSVMOpcode.VM_ADD, "add", i, data_area, code_area, opcode)
+    def callers(self, name: str) -> List[XRef]:
+        """调用名为 name 的成员方法的位置"""
+        return self.xrefs(name, XRefKind.CALL)
 
-    def _disassemble_sub(self, i, data_area, code_area, opcode):
-        return self._disassemble_op2(TJSVMOpcode.VM_SUB, "sub", i, data_area, code_area, opcode)
+    def readers(self, name: str) -> List[XRef]:
+        """读取名为 name 的成员的位置"""
+        return self.xrefs(name, XRefKind.READ)
 
-    def _disassemble_mod(self, i, data_area, code_area, opcode):
-        return self._disassemble_op2(TJSVMOpcode.VM_MOD, "mod", i, data_area, code_area, opcode)
+    def writers(self, name: str) -> List[XRef]:
+        """写入名为 name 的成员的位置"""
+        return self.xrefs(name, XRefKind.WRITE)
 
-    def _disassemble_div(self, i, data_area, code_area, opcode):
-        return self._disassemble_op2(TJSVMOpcode.VM_DIV, "div", i, data_area, code_area, opcode)
+    def referencing_objects(self, value: Any, kind: XRefKind = XRefKind.CONST) -> List[int]:
+        """引用常量 value 的对象索引，按索引排序"""
+        return sorted({obj_index for obj_index, _ in self.xrefs(value, kind)})
 
-    def _disassemble_idiv(self, i, data_area, code_area, opcode):
-        return self._disassemble_op2(TJSVMOpcode.VM_IDIV, "idiv", i, data_area, code_area, opcode)
+    def _disassemble_format(self, i: int, obj: TJSInterCodeContext, code_area: List[int],
+                            mnemonic: str, fmt: InstructionFormat) -> DisassembledInstruction:
+        """根据指令格式表解码一条指令，只计算长度，文本在访问时由 render_* 生成"""
+        size = instruction_size(code_area, i) if fmt.variable else fmt.size
+        return DisassembledInstruction(i, mnemonic, size, code_area[i], obj, self)
 
-    def _disassemble_mul(self, i, data_area, code_area, opcode):
-        return self._disassemble_op2(TJSVMOpcode.VM_MUL, "mul", i, data_area, code_area, opcode)
+    def render_operands(self, instr: DisassembledInstruction) -> str:
+        """生成指令的操作数文本"""
+        fmt = INSTRUCTION_FORMATS[instr.opcode_value]
+        words = instr.words
+        
+        if fmt.registers_only:
+            # 只有寄存器和数据区索引的指令，直接按原始字解码
+            reg_addr = self.from_vm_reg_addr
+            return fmt.template.format(*[reg_addr(word) for word in words])
+        
+        values = []
+        args = ""
+        for k, kind in enumerate(fmt.operands):
+            word = words[k]
+            if kind is OperandKind.REG or kind is OperandKind.DATA:
+                values.append(self.from_vm_reg_addr(word))
+            elif kind is OperandKind.CODE:
+                # 和控制流图一样按有符号偏移计算目标
+                values.append(self.from_vm_code_addr(code_offset(word)) + instr.address)
+            elif kind is OperandKind.COUNT:
+                # 显示为寄存器范围的最后一个寄存器
+                values.append(values[-1] + word - 1)
+            else:
+                args = self._render_args(words, k)
+        return fmt.template.format(*values, args=args)
 
-    def _disassemble_op2(self, base_opcode, mnemonic, i, data_area, code_area, opcode):
-        """通用的 2 操作数指令反汇编器 (带 pd/pi/p 变体)"""
-        if opcode == base_opcode:
-            reg1 = self.from_vm_reg_addr(code_area[i + 1])
-            reg2 = self.from_vm_reg_addr(code_area[i + 2])
-            return DisassembledInstruction(
-                address=i,
-                opcode=mnemonic,
-                operands=f"%{reg1}, %{reg2}",
-                comment="",
-                size=3
-            )
-        elif opcode == base_opcode + 1:
-            reg1 = self.from_vm_reg_addr(code_area[i + 1])
-            reg2 = self.from_vm_reg_addr(code_area[i + 2])
-            reg3 = self.from_vm_reg_addr(code_area[i + 3])
-            reg4 = self.from_vm_reg_addr(code_area[i + 4])
-            value = self.get_const_data(data_area, code_area[i + 3])
-            comment = f"*{reg3} = {self.get_value_comment(value)}"
-            return DisassembledInstruction(
-                address=i,
-                opcode=f"{mnemonic}pd",
-                operands=f"%{reg1}, %{reg2}.*{reg3}, %{reg4}",
-                comment=comment,
-                size=5
-            )
-        elif opcode == base_opcode + 2:
-            reg1 = self.from_vm_reg_addr(code_area[i + 1])
-            reg2 = self.from_vm_reg_addr(code_area[i + 2])
-            reg3 = self.from_vm_reg_addr(code_area[i + 3])
-            reg4 = self.from_vm_reg_addr(code_area[i + 4])
-            return DisassembledInstruction(
-                address=i,
-                opcode=f"{mnemonic}pi",
-                operands=f"%{reg1}, %{reg2}.%{reg3}, %{reg4}",
-                comment="",
-                size=5
-            )
-        elif opcode == base_opcode + 3:
-            reg1 = self.from_vm_reg_addr(code_area[i + 1])
-            reg2 = self.from_vm_reg_addr(code_area[i + 2])
-            reg3 = self.from_vm_reg_addr(code_area[i + 3])
-            return DisassembledInstruction(
-                address=i,
-                opcode=f"{mnemonic}p",
-                operands=f"%{reg1}, %{reg2}, %{reg3}",
-                comment="",
-                size=4
-            )
+    def render_comment(self, instr: DisassembledInstruction) -> str:
+        """生成指令的注释文本，引用数据区的指令显示常量值"""
+        fmt = INSTRUCTION_FORMATS[instr.opcode_value]
+        if fmt.data_operand < 0:
+            return fmt.comment
+        return self.const_comment(instr.context, instr.words[fmt.data_operand])
 
-    def _disassemble_cp(self, i, data_area, code_area):
-        reg1 = self.from_vm_reg_addr(code_area[i + 1])
-        reg2 = self.from_vm_reg_addr(code_area[i + 2])
-        
-        return DisassembledInstruction(
-            address=i,
-            opcode="cp",
-            operands=f"%{reg1}, %{reg2}",
-            comment="",
-            size=3
-        )
-    
-    def _disassemble_ceq(self, i, data_area, code_area):
-        reg1 = self.from_vm_reg_addr(code_area[i + 1])
-        reg2 = self.from_vm_reg_addr(code_area[i + 2])
-        
-        return DisassembledInstruction(
-            address=i,
-            opcode="ceq",
-            operands=f"%{reg1}, %{reg2}",
-            comment="",
-            size=3
-        )
-    
-    def _disassemble_cdeq(self, i, data_area, code_area):
-        reg1 = self.from_vm_reg_addr(code_area[i + 1])
-        reg2 = self.from_vm_reg_addr(code_area[i + 2])
-        
-        return DisassembledInstruction(
-            address=i,
-            opcode="cdeq",
-            operands=f"%{reg1}, %{reg2}",
-            comment="",
-            size=3
-        )
-    
-    def _disassemble_clt(self, i, data_area, code_area):
-        reg1 = self.from_vm_reg_addr(code_area[i + 1])
-        reg2 = self.from_vm_reg_addr(code_area[i + 2])
-        
-        return DisassembledInstruction(
-            address=i,
-            opcode="clt",
-            operands=f"%{reg1}, %{reg2}",
-            comment="",
-            size=3
-        )
-    
-    def _disassemble_cgt(self, i, data_area, code_area):
-        reg1 = self.from_vm_reg_addr(code_area[i + 1])
-        reg2 = self.from_vm_reg_addr(code_area[i + 2])
-        
-        return DisassembledInstruction(
-            address=i,
-            opcode="cgt",
-            operands=f"%{reg1}, %{reg2}",
-            comment="",
-            size=3
-        )
-    
-    def _disassemble_chkins(self, i, data_area, code_area):
-        reg1 = self.from_vm_reg_addr(code_area[i + 1])
-        reg2 = self.from_vm_reg_addr(code_area[i + 2])
-        
-        return DisassembledInstruction(
-            address=i,
-            opcode="chkins",
-            operands=f"%{reg1}, %{reg2}",
-            comment="",
-            size=3
-        )
-    
-    def _disassemble_tt(self, i, code_area):
-        reg1 = self.from_vm_reg_addr(code_area[i + 1])
-        
-        return DisassembledInstruction(
-            address=i,
-            opcode="tt",
-            operands=f"%{reg1}",
-            comment="",
-            size=2
-        )
-    
-    def _disassemble_tf(self, i, code_area):
-        reg1 = self.from_vm_reg_addr(code_area[i + 1])
-        
-        return DisassembledInstruction(
-            address=i,
-            opcode="tf",
-            operands=f"%{reg1}",
-            comment="",
-            size=2
-        )
-    
-    def _disassemble_setf(self, i, code_area):
-        reg1 = self.from_vm_reg_addr(code_area[i + 1])
-        
-        return DisassembledInstruction(
-            address=i,
-            opcode="setf",
-            operands=f"%{reg1}",
-            comment="",
-            size=2
-        )
-    
-    def _disassemble_setnf(self, i, data_area, code_area):
-        reg1 = self.from_vm_reg_addr(code_area[i + 1])
-        
-        return DisassembledInstruction(
-            address=i,
-            opcode="setnf",
-            operands=f"%{reg1}",
-            comment="",
-            size=2
-        )
-    
-    def _disassemble_lnot(self, i, data_area, code_area):
-        reg1 = self.from_vm_reg_addr(code_area[i + 1])
-        
-        return DisassembledInstruction(
-            address=i,
-            opcode="lnot",
-            operands=f"%{reg1}",
-            comment="",
-            size=2
-        )
-    
-    def _disassemble_bnot(self, i, data_area, code_area):
-        reg1 = self.from_vm_reg_addr(code_area[i + 1])
-        
-        return DisassembledInstruction(
-            address=i,
-            opcode="bnot",
-            operands=f"%{reg1}",
-            comment="",
-            size=2
-        )
-    
-    def _disassemble_asc(self, i, data_area, code_area):
-        reg1 = self.from_vm_reg_addr(code_area[i + 1])
-        
-        return DisassembledInstruction(
-            address=i,
-            opcode="asc",
-            operands=f"%{reg1}",
-            comment="",
-            size=2
-        )
-    
-    def _disassemble_chr(self, i, data_area, code_area):
-        reg1 = self.from_vm_reg_addr(code_area[i + 1])
-        
-        return DisassembledInstruction(
-            address=i,
-            opcode="chr",
-            operands=f"%{reg1}",
-            comment="",
-            size=2
-        )
-    
-    def _disassemble_num(self, i, data_area, code_area):
-        reg1 = self.from_vm_reg_addr(code_area[i + 1])
-        
-        return DisassembledInstruction(
-            address=i,
-            opcode="num",
-            operands=f"%{reg1}",
-            comment="",
-            size=2
-        )
-    
-    def _disassemble_chs(self, i, data_area, code_area):
-        reg1 = self.from_vm_reg_addr(code_area[i + 1])
-        
-        return DisassembledInstruction(
-            address=i,
-            opcode="chs",
-            operands=f"%{reg1}",
-            comment="",
-            size=2
-        )
-    
-    def _disassemble_cl(self, i, data_area, code_area):
-        reg1 = self.from_vm_reg_addr(code_area[i + 1])
-        
-        return DisassembledInstruction(
-            address=i,
-            opcode="cl",
-            operands=f"%{reg1}",
-            comment="",
-            size=2
-        )
-    
-    def _disassemble_inv(self, i, data_area, code_area):
-        reg1 = self.from_vm_reg_addr(code_area[i + 1])
-        
-        return DisassembledInstruction(
-            address=i,
-            opcode="inv",
-            operands=f"%{reg1}",
-            comment="",
-            size=2
-        )
-    
-    def _disassemble_chkinv(self, i, data_area, code_area):
-        reg1 = self.from_vm_reg_addr(code_area[i + 1])
-        
-        return DisassembledInstruction(
-            address=i,
-            opcode="chkinv",
-            operands=f"%{reg1}",
-            comment="",
-            size=2
-        )
-    
-    def _disassemble_typeof(self, i, data_area, code_area):
-        reg1 = self.from_vm_reg_addr(code_area[i + 1])
-        
-        return DisassembledInstruction(
-            address=i,
-            opcode="typeof",
-            operands=f"%{reg1}",
-            comment="",
-            size=2
-        )
-    
-    def _disassemble_eval(self, i, data_area, code_area):
-        reg1 = self.from_vm_reg_addr(code_area[i + 1])
-        
-        return DisassembledInstruction(
-            address=i,
-            opcode="eval",
-            operands=f"%{reg1}",
-            comment="",
-            size=2
-        )
-    
-    def _disassemble_eexp(self, i, data_area, code_area):
-        reg1 = self.from_vm_reg_addr(code_area[i + 1])
-        
-        return DisassembledInstruction(
-            address=i,
-            opcode="eexp",
-            operands=f"%{reg1}",
-            comment="",
-            size=2
-        )
-    
-    def _disassemble_int(self, i, data_area, code_area):
-        reg1 = self.from_vm_reg_addr(code_area[i + 1])
-        
-        return DisassembledInstruction(
-            address=i,
-            opcode="int",
-            operands=f"%{reg1}",
-            comment="",
-            size=2
-        )
-    
-    def _disassemble_real(self, i, data_area, code_area):
-        reg1 = self.from_vm_reg_addr(code_area[i + 1])
-        
-        return DisassembledInstruction(
-            address=i,
-            opcode="real",
-            operands=f"%{reg1}",
-            comment="",
-            size=2
-        )
-    
-    def _disassemble_str(self, i, data_area, code_area):
-        reg1 = self.from_vm_reg_addr(code_area[i + 1])
-        
-        return DisassembledInstruction(
-            address=i,
-            opcode="str",
-            operands=f"%{reg1}",
-            comment="",
-            size=2
-        )
-    
-    def _disassemble_octet(self, i, data_area, code_area):
-        reg1 = self.from_vm_reg_addr(code_area[i + 1])
-        
-        return DisassembledInstruction(
-            address=i,
-            opcode="octet",
-            operands=f"%{reg1}",
-            comment="",
-            size=2
-        )
-    
-    def _disassemble_ccl(self, i, data_area, code_area):
-        reg1 = self.from_vm_reg_addr(code_area[i + 1])
-        count = code_area[i + 2]
-        reg_end = reg1 + count - 1
-        
-        return DisassembledInstruction(
-            address=i,
-            opcode="ccl",
-            operands=f"%{reg1}-%{reg_end}",
-            comment="",
-            size=3
-        )
-    
-    def _disassemble_inc(self, i, data_area, code_area, opcode):
-        if opcode == TJSVMOpcode.VM_INC:
-            reg1 = self.from_vm_reg_addr(code_area[i + 1])
-            return DisassembledInstruction(
-                address=i,
-                opcode="inc",
-                operands=f"%{reg1}",
-                comment="",
-                size=2
-            )
-        elif opcode == TJSVMOpcode.VM_INC + 1:
-            reg1 = self.from_vm_reg_addr(code_area[i + 1])
-            reg2 = self.from_vm_reg_addr(code_area[i + 2])
-            reg3 = self.from_vm_reg_addr(code_area[i + 3])
-            
-            value = self.get_const_data(data_area, code_area[i + 3])
-            comment = f"*{reg3} = {self.get_value_comment(value)}"
-                
-            return DisassembledInstruction(
-                address=i,
-                opcode="incpd",
-                operands=f"%{reg1}, %{reg2}.*{reg3}",
-                comment=comment,
-                size=4
-            )
-        elif opcode == TJSVMOpcode.VM_INC + 2:
-            reg1 = self.from_vm_reg_addr(code_area[i + 1])
-            reg2 = self.from_vm_reg_addr(code_area[i + 2])
-            reg3 = self.from_vm_reg_addr(code_area[i + 3])
-            
-            return DisassembledInstruction(
-                address=i,
-                opcode="incpi",
-                operands=f"%{reg1}, %{reg2}.%{reg3}",
-                comment="",
-                size=4
-            )
-        elif opcode == TJSVMOpcode.VM_INC + 3:
-            reg1 = self.from_vm_reg_addr(code_area[i + 1])
-            reg2 = self.from_vm_reg_addr(code_area[i + 2])
-            
-            return DisassembledInstruction(
-                address=i,
-                opcode="incp",
-                operands=f"%{reg1}, %{reg2}",
-                comment="",
-                size=3
-            )
-    
-    def _disassemble_dec(self, i, data_area, code_area, opcode):
-        if opcode == TJSVMOpcode.VM_DEC:
-            reg1 = self.from_vm_reg_addr(code_area[i + 1])
-            return DisassembledInstruction(
-                address=i,
-                opcode="dec",
-                operands=f"%{reg1}",
-                comment="",
-                size=2
-            )
-        elif opcode == TJSVMOpcode.VM_DEC + 1:
-            reg1 = self.from_vm_reg_addr(code_area[i + 1])
-            reg2 = self.from_vm_reg_addr(code_area[i + 2])
-            reg3 = self.from_vm_reg_addr(code_area[i + 3])
-            
-            value = self.get_const_data(data_area, code_area[i + 3])
-            comment = f"*{reg3} = {self.get_value_comment(value)}"
-                
-            return DisassembledInstruction(
-                address=i,
-                opcode="decpd",
-                operands=f"%{reg1}, %{reg2}.*{reg3}",
-                comment=comment,
-                size=4
-            )
-        elif opcode == TJSVMOpcode.VM_DEC + 2:
-            reg1 = self.from_vm_reg_addr(code_area[i + 1])
-            reg2 = self.from_vm_reg_addr(code_area[i + 2])
-            reg3 = self.from_vm_reg_addr(code_area[i + 3])
-            
-            return DisassembledInstruction(
-                address=i,
-                opcode="decpi",
-                operands=f"%{reg1}, %{reg2}.%{reg3}",
-                comment="",
-                size=4
-            )
-        elif opcode == TJSVMOpcode.VM_DEC + 3:
-            reg1 = self.from_vm_reg_addr(code_area[i + 1])
-            reg2 = self.from_vm_reg_addr(code_area[i + 2])
-            
-            return DisassembledInstruction(
-                address=i,
-                opcode="decp",
-                operands=f"%{reg1}, %{reg2}",
-                comment="",
-                size=3
-            )
-    
-    def _disassemble_jf(self, i, data_area, code_area):
-        addr = self.from_vm_code_addr(code_area[i + 1]) + i
-        
-        return DisassembledInstruction(
-            address=i,
-            opcode="jf",
-            operands=f"0x{addr:09X}",
-            comment="",
-            size=2
-        )
-    
-    def _disassemble_jnf(self, i, data_area, code_area):
-        addr = self.from_vm_code_addr(code_area[i + 1]) + i
-        
-        return DisassembledInstruction(
-            address=i,
-            opcode="jnf",
-            operands=f"0x{addr:09X}",
-            comment="",
-            size=2
-        )
-    
-    def _disassemble_jmp(self, i, data_area, code_area):
-        addr = self.from_vm_code_addr(code_area[i + 1]) + i
-        
-        return DisassembledInstruction(
-            address=i,
-            opcode="jmp",
-            operands=f"0x{addr:09X}",
-            comment="",
-            size=2
-        )
-    
-    def _disassemble_call(self, i, data_area, code_area, opcode):
-        reg1 = self.from_vm_reg_addr(code_area[i + 1])
-        reg2 = self.from_vm_reg_addr(code_area[i + 2])
-        
-        if opcode == TJSVMOpcode.VM_CALL:
-            operands = f"%{reg1}, %{reg2}("
-            st = 4
-        elif opcode == TJSVMOpcode.VM_CALLD:
-            reg3 = self.from_vm_reg_addr(code_area[i + 3])
-            operands = f"%{reg1}, %{reg2}.*{reg3}("
-            st = 5
-        elif opcode == TJSVMOpcode.VM_CALLI:
-            reg3 = self.from_vm_reg_addr(code_area[i + 3])
-            operands = f"%{reg1}, %{reg2}.%{reg3}("
-            st = 5
-        elif opcode == TJSVMOpcode.VM_NEW:
-            operands = f"%{reg1}, %{reg2}("
-            st = 4
-        
-        num = code_area[i + st - 1]
-        c = 0
+    def _render_args(self, words: Tuple[int, ...], pos: int) -> str:
+        """生成 call 系列指令的参数列表文本，pos 为参数个数字在 words 中的位置"""
+        num = words[pos]
+        if num >= 0x8000:
+            # 代码区按 uint16 读取，参数个数按有符号数解释
+            num -= 0x10000
         
         if num == -1:
             # omit arg
-            size = st
-            operands += "..."
-        elif num == -2:
+            return "..."
+        
+        args: List[str] = []
+        if num == -2:
             # expand arg
-            st += 1
-            num = code_area[i + st - 1]
-            size = st + num * 2
-            first = True
+            pos += 1
+            num = words[pos]
             for j in range(num):
-                if not first:
-                    operands += ", "
-                first = False
-                
-                arg_type = code_area[i + st + j * 2]
-                arg_reg = self.from_vm_reg_addr(code_area[i + st + j * 2 + 1])
+                arg_type = words[pos + 1 + j * 2]
+                arg_reg = self.from_vm_reg_addr(words[pos + 2 + j * 2])
                 
                 if arg_type == FuncArgType.fatNormal.value:
-                    operands += f"%{arg_reg}"
+                    args.append(f"%{arg_reg}")
                 elif arg_type == FuncArgType.fatExpand.value:
-                    operands += f"%{arg_reg}*"
+                    args.append(f"%{arg_reg}*")
                 elif arg_type == FuncArgType.fatUnnamedExpand.value:
-                    operands += "*"
-        else:
-            # normal operation
-            size = st + num
-            first = True
-            while num > 0:
-                if not first:
-                    operands += ", "
-                first = False
-                
-                arg_reg = self.from_vm_reg_addr(code_area[i + c + st])
-                operands += f"%{arg_reg}"
-                c += 1
-                num -= 1
-        
-        operands += ")"
-        
-        comment = ""
-        if opcode == TJSVMOpcode.VM_CALLD and data_area:
-            reg3 = self.from_vm_reg_addr(code_area[i + 3])
-            value = self.get_const_data(data_area, code_area[i + 3])
-            comment = f"*{reg3} = {self.get_value_comment(value)}"
-        
-        opcode_name = "call"
-        if opcode == TJSVMOpcode.VM_CALLD:
-            opcode_name = "calld"
-        elif opcode == TJSVMOpcode.VM_CALLI:
-            opcode_name = "calli"
-        elif opcode == TJSVMOpcode.VM_NEW:
-            opcode_name = "new"
-        
-        return DisassembledInstruction(
-            address=i,
-            opcode=opcode_name,
-            operands=operands,
-            comment=comment,
-            size=size
-        )
-    
-    def _disassemble_gpd(self, i, data_area, code_area, opcode):
-        reg1 = self.from_vm_reg_addr(code_area[i + 1])
-        reg2 = self.from_vm_reg_addr(code_area[i + 2])
-        reg3 = self.from_vm_reg_addr(code_area[i + 3])
-        
-        value = self.get_const_data(data_area, code_area[i + 3])
-        comment = f"*{reg3} = {self.get_value_comment(value)}"
-        
-        opcode_name = "gpd" if opcode == TJSVMOpcode.VM_GPD else "gpds"
-        
-        return DisassembledInstruction(
-            address=i,
-            opcode=opcode_name,
-            operands=f"%{reg1}, %{reg2}.*{reg3}",
-            comment=comment,
-            size=4
-        )
-    
-    def _disassemble_spd(self, i, data_area, code_area, opcode):
-        reg1 = self.from_vm_reg_addr(code_area[i + 1])
-        reg2 = self.from_vm_reg_addr(code_area[i + 2])
-        reg3 = self.from_vm_reg_addr(code_area[i + 3])
-
-        value = self.get_const_data(data_area, code_area[i + 2])
-        comment = f"*{reg2} = {self.get_value_comment(value)}"
-        
-        if opcode == TJSVMOpcode.VM_SPD:
-            opcode_name = "spd"
-        elif opcode == TJSVMOpcode.VM_SPDE:
-            opcode_name = "spde"
-        elif opcode == TJSVMOpcode.VM_SPDEH:
-            opcode_name = "spdeh"
-        elif opcode == TJSVMOpcode.VM_SPDS:
-            opcode_name = "spds"
-        
-        return DisassembledInstruction(
-            address=i,
-            opcode=opcode_name,
-            operands=f"%{reg1}.*{reg2}, %{reg3}",
-            comment=comment,
-            size=4
-        )
-    
-    def _disassemble_gpi(self, i, data_area, code_area, opcode):
-        reg1 = self.from_vm_reg_addr(code_area[i + 1])
-        reg2 = self.from_vm_reg_addr(code_area[i + 2])
-        reg3 = self.from_vm_reg_addr(code_area[i + 3])
-        
-        opcode_name = "gpi" if opcode == TJSVMOpcode.VM_GPI else "gpis"
-        
-        return DisassembledInstruction(
-            address=i,
-            opcode=opcode_name,
-            operands=f"%{reg1}, %{reg2}.%{reg3}",
-            comment="",
-            size=4
-        )
-    
-    def _disassemble_spi(self, i, data_area, code_area, opcode):
-        reg1 = self.from_vm_reg_addr(code_area[i + 1])
-        reg2 = self.from_vm_reg_addr(code_area[i + 2])
-        reg3 = self.from_vm_reg_addr(code_area[i + 3])
-        
-        if opcode == TJSVMOpcode.VM_SPI:
-            opcode_name = "spi"
-        elif opcode == TJSVMOpcode.VM_SPIE:
-            opcode_name = "spie"
-        elif opcode == TJSVMOpcode.VM_SPIS:
-            opcode_name = "spis"
-        
-        return DisassembledInstruction(
-            address=i,
-            opcode=opcode_name,
-            operands=f"%{reg1}.%{reg2}, %{reg3}",
-            comment="",
-            size=4
-        )
-    
-    def _disassemble_setp(self, i, data_area, code_area):
-        reg1 = self.from_vm_reg_addr(code_area[i + 1])
-        reg2 = self.from_vm_reg_addr(code_area[i + 2])
-        
-        return DisassembledInstruction(
-            address=i,
-            opcode="setp",
-            operands=f"%{reg1}, %{reg2}",
-            comment="",
-            size=3
-        )
-    
-    def _disassemble_getp(self, i, data_area, code_area):
-        reg1 = self.from_vm_reg_addr(code_area[i + 1])
-        reg2 = self.from_vm_reg_addr(code_area[i + 2])
-        
-        return DisassembledInstruction(
-            address=i,
-            opcode="getp",
-            operands=f"%{reg1}, %{reg2}",
-            comment="",
-            size=3
-        )
-    
-    def _disassemble_deld(self, i, data_area, code_area, opcode):
-        reg1 = self.from_vm_reg_addr(code_area[i + 1])
-        reg2 = self.from_vm_reg_addr(code_area[i + 2])
-        reg3 = self.from_vm_reg_addr(code_area[i + 3])
-    
-        value = self.get_const_data(data_area, code_area[i + 3])
-        comment = f"*{reg3} = {self.get_value_comment(value)}"
-        
-        opcode_name = "deld" if opcode == TJSVMOpcode.VM_DELD else "typeofd"
-        
-        return DisassembledInstruction(
-            address=i,
-            opcode=opcode_name,
-            operands=f"%{reg1}, %{reg2}.*{reg3}",
-            comment=comment,
-            size=4
-        )
-    
-    def _disassemble_deli(self, i, data_area, code_area, opcode):
-        reg1 = self.from_vm_reg_addr(code_area[i + 1])
-        reg2 = self.from_vm_reg_addr(code_area[i + 2])
-        reg3 = self.from_vm_reg_addr(code_area[i + 3])
-        
-        opcode_name = "deli" if opcode == TJSVMOpcode.VM_DELI else "typeofi"
-        
-        return DisassembledInstruction(
-            address=i,
-            opcode=opcode_name,
-            operands=f"%{reg1}, %{reg2}.%{reg3}",
-            comment="",
-            size=4
-        )
-    
-    def _disassemble_srv(self, i, data_area, code_area):
-        reg1 = self.from_vm_reg_addr(code_area[i + 1])
-        
-        return DisassembledInstruction(
-            address=i,
-            opcode="srv",
-            operands=f"%{reg1}",
-            comment="",
-            size=2
-        )
-    
-    def _disassemble_ret(self, i, data_area, code_area):
-        return DisassembledInstruction(
-            address=i,
-            opcode="ret",
-            operands="",
-            comment="",
-            size=1
-        )
-    
-    def _disassemble_entry(self, i, data_area, code_area):
-        addr = self.from_vm_code_addr(code_area[i + 1]) + i
-        reg1 = self.from_vm_reg_addr(code_area[i + 2])
-        
-        return DisassembledInstruction(
-            address=i,
-            opcode="entry",
-            operands=f"{addr:09d}, %{reg1}",
-            comment="",
-            size=3
-        )
-    
-    def _disassemble_extry(self, i, data_area, code_area):
-        return DisassembledInstruction(
-            address=i,
-            opcode="extry",
-            operands="",
-            comment="",
-            size=1
-        )
-    
-    def _disassemble_throw(self, i, data_area, code_area):
-        reg1 = self.from_vm_reg_addr(code_area[i + 1])
-        
-        return DisassembledInstruction(
-            address=i,
-            opcode="throw",
-            operands=f"%{reg1}",
-            comment="",
-            size=2
-        )
-    
-    def _disassemble_chgthis(self, i, data_area, code_area):
-        reg1 = self.from_vm_reg_addr(code_area[i + 1])
-        reg2 = self.from_vm_reg_addr(code_area[i + 2])
-        
-        return DisassembledInstruction(
-            address=i,
-            opcode="chgthis",
-            operands=f"%{reg1}, %{reg2}",
-            comment="",
-            size=3
-        )
-    
-    def _disassemble_global(self, i, data_area, code_area):
-        reg1 = self.from_vm_reg_addr(code_area[i + 1])
-        
-        return DisassembledInstruction(
-            address=i,
-            opcode="global",
-            operands=f"%{reg1}",
-            comment="",
-            size=2
-        )
-    
-    def _disassemble_addci(self, i, data_area, code_area):
-        reg1 = self.from_vm_reg_addr(code_area[i + 1])
-        reg2 = self.from_vm_reg_addr(code_area[i + 2])
-        
-        return DisassembledInstruction(
-            address=i,
-            opcode="addci",
-            operands=f"%{reg1}, %{reg2}",
-            comment="",
-            size=3
-        )
-    
-    def _disassemble_regmember(self, i, data_area, code_area):
-        return DisassembledInstruction(
-            address=i,
-            opcode="regmember",
-            operands="",
-            comment="",
-            size=1
-        )
-    
-    def _disassemble_debugger(self, i, data_area, code_area):
-        return DisassembledInstruction(
-            address=i,
-            opcode="debugger",
-            operands="",
-            comment="",
-            size=1
-        )
-    
-    def _disassemble_nop(self, i: int) -> DisassembledInstruction:
-        return DisassembledInstruction(
-            address=i,
-            opcode="nop",
-            size=1
-        )
-    
-    def _disassemble_nf(self, i: int) -> DisassembledInstruction:
-        return DisassembledInstruction(
-            address=i,
-            opcode="nf",
-            comment="!",
-            size=1
-        )
-  
-    def _disassemble_const(self, i: int, data_area: TJSInterCodeContext.Data, code_area: List[int]) -> DisassembledInstruction:
-        reg1 = self.from_vm_reg_addr(code_area[i + 1])
-        reg2 = self.from_vm_reg_addr(code_area[i + 2])
-        
-        comment = f"*{self.from_vm_reg_addr(reg2)} = {self.get_value_comment(self.get_const_data(data_area, code_area[i + 2]))}"
-            
-        return DisassembledInstruction(
-            address=i,
-            opcode="const",
-            operands=f"%{reg1}, *{reg2}",
-            comment=comment,
-            size=3
-        )
+                    args.append("*")
+                else:
+                    args.append("")
+            return ", ".join(args)
+        
+        # normal operation
+        for c in range(num):
+            args.append(f"%{self.from_vm_reg_addr(words[pos + 1 + c])}")
+        return ", ".join(args)
@@ -1,23 +1,52 @@
+from array import array
 from dataclasses import dataclass, field
-from typing import List, Optional, Any, Dict
+from typing import Callable, Iterator, List, Optional, Any, Dict, Sequence, Tuple, overload
+import threading
 
-from .tjs_const import TJSContextType
+from .tjs_const import (TJSContextType, TYPE_BYTE, TYPE_INTEGER, TYPE_INTER_GENERATOR, TYPE_INTER_OBJECT,
+                        TYPE_LONG, TYPE_OCTET, TYPE_REAL, TYPE_SHORT, TYPE_STRING)
 
-@dataclass
+@dataclass(slots=True)
 class SourcePos:
     """源代码位置信息"""
     code_pos: int
     source_pos: int
 
+class SourcePositions(Sequence[SourcePos]):
+    """源代码位置表，两列分别保存在 int32 数组中，按下标访问时才生成 SourcePos"""
+    __slots__ = ('code_positions', 'source_positions')
+
+    def __init__(self, code_positions: array, source_positions: array):
+        self.code_positions = code_positions
+        self.source_positions = source_positions
+
+    def __len__(self) -> int:
+        return len(self.code_positions)
+
+    @overload
+    def __getitem__(self, index: int) -> SourcePos: ...
+    @overload
+    def __getitem__(self, index: slice) -> List[SourcePos]: ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [SourcePos(code_pos, src_pos) for code_pos, src_pos
+                    in zip(self.code_positions[index], self.source_positions[index])]
+        return SourcePos(self.code_positions[index], self.source_positions[index])
+
+    def __iter__(self) -> Iterator[SourcePos]:
+        for code_pos, src_pos in zip(self.code_positions, self.source_positions):
+            yield SourcePos(code_pos, src_pos)
+
 
 # 修改TJSInterCodeContext以支持属性
-@dataclass
+@dataclass(slots=True)
 class TJSInterCodeContext:
-    type Data = List[None | int | float | str | bytes]
-    """TJS中间代码上下文"""
+    type Data = Sequence[None | int | float | str | bytes | memoryview | 'TJSInterCodeContext']
+    """TJS中间代码上下文，code 通常是 uint16 的 array，data 通常是 VariantTable，两者也都接受列表"""
     name: str
     context_type: TJSContextType
-    code: List[int]
+    code: Sequence[int]
     data: Data
     max_variable_count: int
     variable_reserve_count: int
@@ -25,7 +54,7 @@ class TJSInterCodeContext:
     func_decl_arg_count: int
     func_decl_unnamed_arg_array_base: int
     func_decl_collapse_base: int
-    source_positions: List[SourcePos]
+    source_positions: Optional[Sequence[SourcePos]]
     super_class_getters: List[int]
     parent: Optional['TJSInterCodeContext'] = None
     prop_setter: Optional['TJSInterCodeContext'] = None
@@ -34,12 +63,70 @@ class TJSInterCodeContext:
     properties: Dict[str, Any] = field(default_factory=dict)  # 属性字典
 
 
-@dataclass
-class VariantReplace:
-    """变体替换工作项"""
-    work: TJSInterCodeContext.Data  # 变体列表
-    index: int       # 在变体列表中的索引
-    obj_index: int   # 对象索引
+class ObjectDecodeError(Exception):
+    """按需解码对象体失败，文件中这个对象的数据已损坏"""
+
+
+class LazyTJSInterCodeContext(TJSInterCodeContext):
+    """按需解码的TJS中间代码上下文
+
+    加载时只保存头部字段和对象体在文件中的位置，
+    首次访问 code、data 等字段时才调用 body_loader 解码对象体，
+    解码失败时抛出 ObjectDecodeError，对象保持未解码状态
+    """
+    __slots__ = ('body_offset', 'body_size', '_body_loader')
+    LAZY_FIELDS = ('code', 'data', 'source_positions', 'super_class_getters', 'properties')
+    # 界面线程和后台搜索可能同时访问同一个对象，解码过程需要互斥
+    _load_lock = threading.RLock()
+
+    def __init__(self, name: str, context_type: TJSContextType,
+                 max_variable_count: int, variable_reserve_count: int, max_frame_count: int,
+                 func_decl_arg_count: int, func_decl_unnamed_arg_array_base: int, func_decl_collapse_base: int,
+                 body_offset: int, body_size: int,
+                 body_loader: Callable[['LazyTJSInterCodeContext'], None]):
+        self.name = name
+        self.context_type = context_type
+        self.max_variable_count = max_variable_count
+        self.variable_reserve_count = variable_reserve_count
+        self.max_frame_count = max_frame_count
+        self.func_decl_arg_count = func_decl_arg_count
+        self.func_decl_unnamed_arg_array_base = func_decl_unnamed_arg_array_base
+        self.func_decl_collapse_base = func_decl_collapse_base
+        self.parent = None
+        self.prop_setter = None
+        self.prop_getter = None
+        self.super_class_getter_obj = None
+        self.body_offset = body_offset
+        self.body_size = body_size
+        self._body_loader = body_loader
+
+    @property
+    def loaded(self) -> bool:
+        """对象体是否已经解码"""
+        return self._body_loader is None
+
+    def __getattr__(self, attr: str):
+        # 只有未赋值的槽位才会走到这里
+        if attr in self.LAZY_FIELDS:
+            with self._load_lock:
+                # 其它线程可能已经解码完成
+                body_loader = self._body_loader
+                if body_loader is not None:
+                    self._body_loader = None
+                    try:
+                        body_loader(self)
+                    except Exception as e:
+                        # 清除已经赋值的字段，下次访问时重新解码并得到同样的错误
+                        for name in self.LAZY_FIELDS:
+                            try:
+                                object.__delattr__(self, name)
+                            except AttributeError:
+                                pass
+                        self._body_loader = body_loader
+                        raise ObjectDecodeError(f"对象 {self.name} 解码失败: {e}") from e
+            return object.__getattribute__(self, attr)
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{attr}'")
+
 
 @dataclass
 class CodeBlock:
@@ -55,21 +142,117 @@ class CodeBlock:
         """获取指定行的源代码（简化实现）"""
         return f"Source line {line}"
 
-@dataclass
+@dataclass(slots=True)
 class TJSDataArea:
-    """存储TJS字节码的数据区域"""
-    byte_array: List[int] = field(default_factory=list)
-    short_array: List[int] = field(default_factory=list)
-    long_array: List[int] = field(default_factory=list)
-    long_long_array: List[int] = field(default_factory=list)
-    double_array: List[float] = field(default_factory=list)
+    """存储TJS字节码的数据区域，数值常量保存在 array 中"""
+    byte_array: bytes = b''
+    short_array: Sequence[int] = field(default_factory=lambda: array('H'))
+    long_array: Sequence[int] = field(default_factory=lambda: array('i'))
+    long_long_array: Sequence[int] = field(default_factory=lambda: array('Q'))
+    double_array: Sequence[float] = field(default_factory=lambda: array('d'))
     string_array: List[str] = field(default_factory=list)
-    octet_array: List[bytes] = field(default_factory=list)
+    octet_array: List[bytes | memoryview] = field(default_factory=list)
 
-@dataclass
 class DisassembledInstruction:
-    address: int
-    opcode: str
-    size: int
-    operands: str = ''
-    comment: str = ''
+    """反汇编得到的一条指令
+
+    只保存地址、操作码和所属对象的引用，原始操作数直接从对象的代码区读取，
+    operands/comment 文本在访问时才由 renderer 生成，不需要文本的分析可以完全跳过格式化
+    """
+    __slots__ = ('address', 'opcode', 'size', 'opcode_value', 'context', 'renderer')
+
+    def __init__(self, address: int, opcode: str, size: int, opcode_value: int = -1,
+                 context: Optional[TJSInterCodeContext] = None, renderer: Any = None):
+        self.address = address
+        self.opcode = opcode
+        self.size = size
+        self.opcode_value = opcode_value  # 操作码的数值
+        self.context = context            # 指令所属的代码上下文
+        self.renderer = renderer          # 提供 render_operands/render_comment 的反汇编器
+
+    @property
+    def words(self) -> List[int]:
+        """操作码之后的原始代码字"""
+        if self.context is None:
+            return []
+        return self.context.code[self.address + 1:self.address + self.size]
+
+    @property
+    def operands(self) -> str:
+        return self._render('render_operands')
+
+    @property
+    def comment(self) -> str:
+        return self._render('render_comment')
+
+    def _render(self, method: str) -> str:
+        """调用 renderer 生成文本，损坏的指令(数据区索引越界、变长指令被截断等)显示为 <invalid: 原因>
+
+        文本在界面绘制等无法向上抛出异常的地方按需生成，所以在这里把异常转换为文本
+        """
+        if not self.renderer:
+            return ''
+        try:
+            return getattr(self.renderer, method)(self)
+        except Exception as e:
+            return f"<invalid: {e!r}>"
+
+    def __repr__(self) -> str:
+        return f"DisassembledInstruction(address={self.address}, opcode={self.opcode!r}, size={self.size})"
+
+# 变体类型 -> TJSDataArea 中对应的常量池
+_VARIANT_POOLS = {
+    TYPE_STRING: 'string_array',
+    TYPE_OCTET: 'octet_array',
+    TYPE_REAL: 'double_array',
+    TYPE_BYTE: 'byte_array',
+    TYPE_SHORT: 'short_array',
+    TYPE_INTEGER: 'long_array',
+    TYPE_LONG: 'long_long_array',
+}
+
+class VariantTable(Sequence[Any]):
+    """对象的数据变体表
+
+    只保存文件中的 (类型, 池索引) 对，值留在共享的 TJSDataArea 常量池中，按下标访问时才查找；
+    对象引用按索引在 objects 中查找，所以可以在所有对象加载完成前建立。
+    分析时可以用 tag 按池索引比较常量，不需要比较值
+    """
+    __slots__ = ('tags', 'data_area', 'objects')
+
+    def __init__(self, tags: array, data_area: 'TJSDataArea', objects: List[Optional[TJSInterCodeContext]]):
+        self.tags = tags  # int16: 类型0, 索引0, 类型1, 索引1, ...
+        self.data_area = data_area
+        self.objects = objects
+
+    def __len__(self) -> int:
+        return len(self.tags) >> 1
+
+    def tag(self, index: int) -> Tuple[int, int]:
+        """第 index 项的 (类型, 池索引)"""
+        pos = index * 2
+        return self.tags[pos], self.tags[pos + 1]
+
+    def resolve(self, type_val: int, pool_index: int) -> Any:
+        """从常量池或对象表中取出 (类型, 池索引) 对应的值，无效的项为 None"""
+        if type_val == TYPE_INTER_OBJECT or type_val == TYPE_INTER_GENERATOR:
+            objects = self.objects
+            return objects[pool_index] if 0 <= pool_index < len(objects) else None
+        pool = _VARIANT_POOLS.get(type_val)
+        if pool is None:
+            # void、object 和未知类型
+            return None
+        try:
+            return getattr(self.data_area, pool)[pool_index]
+        except IndexError:
+            return None
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("variant index out of range")
+        pos = index * 2
+        return self.resolve(self.tags[pos], self.tags[pos + 1])
@@ -1,29 +1,256 @@
-from typing import List
+from itertools import islice
+from typing import Iterator, List, Optional, Tuple
 import os
-from PyQt5.QtWidgets import (QMainWindow, QTreeWidget, QTreeView,
-                             QTreeWidgetItem, QSplitter, QVBoxLayout, QFileSystemModel,
+import re
+from PyQt5.QtWidgets import (QMainWindow, QTreeView,
+                             QSplitter, QVBoxLayout, QFileSystemModel,
                              QWidget, QHeaderView, QLineEdit,QGroupBox, QFormLayout, QComboBox,
-                             QLabel, QHBoxLayout, QFileDialog, QMessageBox, QPushButton)
-from PyQt5.QtCore import Qt, QDir, QModelIndex
-from PyQt5.QtGui import QFont
+                             QLabel, QHBoxLayout, QFileDialog, QMessageBox, QPushButton, QProgressBar, QCheckBox,
+                             QTabWidget)
+from PyQt5.QtCore import Qt, QDir, QModelIndex, QAbstractTableModel, QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+from PyQt5.QtGui import QFont, QFontMetrics
 
-from .tjs_entity import TJSInterCodeContext
+from .tjs_entity import TJSInterCodeContext, DisassembledInstruction, ObjectDecodeError
 
 from .tjs_disassembler import TJSDisassembler
-from .tjs_bytecode_loader import TJSByteCodeLoader
+from .tjs_bytecode_loader import TJSByteCodeLoader, LoadCancelled
+from .cache import LRUCache, file_cache_key, PARSED_SIZE_FACTOR, INSTRUCTION_SIZE
+from .disk_cache import DiskCache
+from .object_search import MatchMode, ObjectSearchIndex, compile_matcher
+from .cfg import build_cfg
+from .graph_layout import GraphLayout, layout_graph
+from .graph_view import GraphView
+from .file_filter import BytecodeFilterProxyModel
+
+class DisassemblyModel(QAbstractTableModel):
+    """反汇编列表模型，滚动到末尾时才从反汇编器按批取指令"""
+    HEADERS = ['Address', 'Opcode', 'Operands', 'Comment']
+    BATCH_SIZE = 1000
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.instructions: List[DisassembledInstruction] = []
+        self._source: Optional[Iterator[DisassembledInstruction]] = None
+
+    def set_source(self, source: Optional[Iterator[DisassembledInstruction]],
+                   instructions: Optional[List[DisassembledInstruction]] = None):
+        """替换指令来源，instructions 为已经从 source 取出的行"""
+        self.beginResetModel()
+        self.instructions = instructions if instructions is not None else []
+        self._source = source
+        self.endResetModel()
+
+    def state(self) -> Tuple[List[DisassembledInstruction], Optional[Iterator[DisassembledInstruction]]]:
+        """已取出的行和剩余的指令来源，可以交给 set_source 恢复"""
+        return self.instructions, self._source
+
+    def clear(self):
+        self.set_source(None)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.instructions)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index: QModelIndex, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        instr = self.instructions[index.row()]
+        column = index.column()
+        if column == 0:
+            return f"0x{instr.address:04X}"
+        elif column == 1:
+            return instr.opcode
+        elif column == 2:
+            return instr.operands
+        return f"; {instr.comment}"
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._source is not None
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._source is None:
+            return
+        batch: List[DisassembledInstruction] = []
+        try:
+            batch.extend(islice(self._source, self.BATCH_SIZE))
+        except Exception as e:
+            # 代码区损坏时停止取指令，保留已经解码的行并在末尾显示错误，异常不能抛回 Qt
+            print(f"Error disassembling: {e}")
+            last = batch[-1] if batch else (self.instructions[-1] if self.instructions else None)
+            address = last.address + last.size if last is not None else 0
+            batch.append(DisassembledInstruction(address, f"<invalid: {e!r}>", 0))
+            self._source = None
+        if len(batch) < self.BATCH_SIZE:
+            self._source = None
+        if not batch:
+            return
+        first = len(self.instructions)
+        self.beginInsertRows(QModelIndex(), first, first + len(batch) - 1)
+        self.instructions.extend(batch)
+        self.endInsertRows()
+
+class LoadSignals(QObject):
+    """LoadWorker 的信号，QRunnable 本身不能发信号"""
+    progress = pyqtSignal(int, int)          # (加载序号, 千分比)
+    finished = pyqtSignal(int, str, object)  # (加载序号, 文件路径, load_bytecode 的结果)
+
+class LoadWorker(QRunnable):
+    """在线程池中加载字节码文件，进度按已读取的字节数计算"""
+
+    def __init__(self, generation: int, file_path: str, disk_cache: Optional[DiskCache] = None):
+        super().__init__()
+        self.generation = generation
+        self.file_path = file_path
+        self.disk_cache = disk_cache
+        self.signals = LoadSignals()
+        self._cancelled = False
+        self._permille = -1
+
+    def cancel(self):
+        self._cancelled = True
+
+    def _on_progress(self, position: int, length: int):
+        if self._cancelled:
+            raise LoadCancelled()
+        permille = position * 1000 // length if length else 1000
+        if permille != self._permille:
+            self._permille = permille
+            self.signals.progress.emit(self.generation, permille)
+
+    def run(self):
+        try:
+            result = TJSByteCodeLoader.load_bytecode(self.file_path, lazy=True, progress=self._on_progress,
+                                                     cache=self.disk_cache)
+            if result is not None and result[1]:
+                # 默认显示第一个对象，在后台先把它解码
+                result[1][0].code
+        except LoadCancelled:
+            return
+        except ObjectDecodeError as e:
+            # 和加载时发现的损坏一样作为无效文件处理
+            print(f"Error loading bytecode: {e}")
+            result = None
+        if not self._cancelled:
+            self.signals.finished.emit(self.generation, self.file_path, result)
+
+class SearchSignals(QObject):
+    """SearchWorker 的信号"""
+    matches = pyqtSignal(int, list)  # (搜索序号, 一批匹配的对象索引)
+    finished = pyqtSignal(int, int)  # (搜索序号, 匹配总数)
+    failed = pyqtSignal(int, str)    # (搜索序号, 错误信息)
+
+class SearchWorker(QRunnable):
+    """在线程池中匹配对象，结果按批发出"""
+    BATCH_SIZE = 64
+
+    def __init__(self, generation: int, index: ObjectSearchIndex, text: str, mode: MatchMode, ignore_case: bool):
+        super().__init__()
+        self.generation = generation
+        self.index = index
+        self.text = text
+        self.mode = mode
+        self.ignore_case = ignore_case
+        self.signals = SearchSignals()
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        count = 0
+        batch = []
+        try:
+            for obj_index in self.index.iter_matches(self.text, self.mode, self.ignore_case):
+                if self._cancelled:
+                    return
+                batch.append(obj_index)
+                if len(batch) >= self.BATCH_SIZE:
+                    self.signals.matches.emit(self.generation, batch)
+                    count += len(batch)
+                    batch = []
+        except ObjectDecodeError as e:
+            # 建立索引时解码所有对象，异常不能留在线程池中
+            self.signals.failed.emit(self.generation, str(e))
+            return
+        if batch:
+            self.signals.matches.emit(self.generation, batch)
+            count += len(batch)
+        if not self._cancelled:
+            self.signals.finished.emit(self.generation, count)
+
+class GraphSignals(QObject):
+    """GraphWorker 的信号"""
+    finished = pyqtSignal(int, object)  # (布局序号, GraphLayout)
+    failed = pyqtSignal(int, str)       # (布局序号, 错误信息)
+
+class GraphWorker(QRunnable):
+    """在线程池中建立控制流图并计算布局"""
+
+    def __init__(self, generation: int, obj: TJSInterCodeContext,
+                 block_width: float, line_height: float, header_height: float):
+        super().__init__()
+        self.generation = generation
+        self.obj = obj
+        self.block_width = block_width
+        self.line_height = line_height
+        self.header_height = header_height
+        self.signals = GraphSignals()
+
+    def run(self):
+        try:
+            graph = build_cfg(self.obj)
+        except ObjectDecodeError as e:
+            self.signals.failed.emit(self.generation, str(e))
+            return
+        layout = layout_graph(graph, self.block_width, self.line_height, self.header_height)
+        self.signals.finished.emit(self.generation, layout)
 
 class DisassemblyViewer(QMainWindow):
     disassembler: TJSDisassembler
     objects: List[TJSInterCodeContext]
 
-    def __init__(self):
+    # 已解析文件和各对象反汇编结果的内存预算
+    FILE_CACHE_BYTES = 512 * 1024 * 1024
+    DISASSEMBLY_CACHE_BYTES = 128 * 1024 * 1024
+    GRAPH_CACHE_BYTES = 64 * 1024 * 1024
+    # 每个块和每条边的布局占用内存的估算值 (字节)
+    GRAPH_ITEM_SIZE = 160
+    # 对象搜索在停止输入多久之后开始 (毫秒)
+    SEARCH_DELAY_MS = 250
+
+    def __init__(self, disk_cache: Optional[DiskCache] = None):
         super().__init__()
+        self.disk_cache = disk_cache
         self.current_file = None
+        self.current_file_key = None
         self.disassembler = None
         self.top_obj = None
         self.objects = []
         self.data_area = None
         self.current_obj_index = 0
+        self.thread_pool = QThreadPool.globalInstance()
+        self._load_worker: Optional[LoadWorker] = None
+        self._load_generation = 0  # 每次加载递增，用来丢弃过期的结果
+        self._load_key = None
+        # (路径, 修改时间, 大小) -> (top_obj, objects, data_area)
+        self.file_cache = LRUCache(self.FILE_CACHE_BYTES, on_evict=self.on_file_evicted)
+        # (文件缓存键, 对象索引) -> (已取出的指令, 剩余的指令来源)
+        # 指令引用文件的对象和反汇编器，只保存文件缓存中还有的文件
+        self.disasm_cache = LRUCache(self.DISASSEMBLY_CACHE_BYTES)
+        self.search_index: Optional[ObjectSearchIndex] = None
+        self._search_worker: Optional[SearchWorker] = None
+        self._search_generation = 0  # 每次搜索递增，用来丢弃过期的结果
+        # (文件缓存键, 对象索引) -> GraphLayout
+        self.graph_cache = LRUCache(self.GRAPH_CACHE_BYTES)
+        self._graph_generation = 0  # 每次计算布局递增，用来丢弃过期的结果
+        self._graph_key = None      # 图形视图正在显示或计算的对象
         self.init_ui()
         
     def init_ui(self):
@@ -55,9 +282,12 @@ class DisassemblyViewer(QMainWindow):
         self.file_system_model.setNameFilterDisables(False)
         self.file_system_model.setFilter(QDir.Filter.AllDirs | QDir.Filter.Files | QDir.Filter.NoDotAndDotDot)
         
+        # 代理模型在 "Bytecode only" 打开时隐藏不是字节码的文件
+        self.file_proxy_model = BytecodeFilterProxyModel(self.file_system_model, self)
+        
         self.file_tree = QTreeView()
-        self.file_tree.setModel(self.file_system_model)
-        self.file_tree.setRootIndex(self.file_system_model.index(QDir.currentPath()))
+        self.file_tree.setModel(self.file_proxy_model)
+        self.file_tree.setRootIndex(self.file_proxy_model.index_of_path(QDir.currentPath()))
         self.file_tree.setColumnWidth(0, 250)  # 设置第一列宽度
         self.file_tree.doubleClicked.connect(self.on_file_double_clicked)
         self.file_tree.setSortingEnabled(True)
@@ -74,6 +304,10 @@ class DisassemblyViewer(QMainWindow):
         self.open_folder_btn = QPushButton("Open Folder")
         self.open_folder_btn.clicked.connect(self.open_folder)
         open_button_layout.addWidget(self.open_folder_btn)
+        self.bytecode_only_check = QCheckBox("Bytecode only")
+        self.bytecode_only_check.setToolTip("Only show files with a TJS2 bytecode header")
+        self.bytecode_only_check.toggled.connect(self.file_proxy_model.set_enabled)
+        open_button_layout.addWidget(self.bytecode_only_check)
         left_layout.addLayout(open_button_layout)
         
         # 右侧反汇编显示
@@ -81,9 +315,19 @@ class DisassemblyViewer(QMainWindow):
         right_layout = QVBoxLayout(right_widget)
         right_layout.setContentsMargins(0, 0, 0, 0)
         
-        # 文件信息标签
+        # 文件信息标签和加载进度
+        file_info_layout = QHBoxLayout()
         self.file_info_label = QLabel("No file loaded")
-        right_layout.addWidget(self.file_info_label)
+        file_info_layout.addWidget(self.file_info_label, 1)
+        self.load_progress = QProgressBar()
+        self.load_progress.setRange(0, 1000)
+        self.load_progress.setVisible(False)
+        file_info_layout.addWidget(self.load_progress)
+        self.cancel_load_btn = QPushButton("Cancel")
+        self.cancel_load_btn.clicked.connect(self.cancel_load)
+        self.cancel_load_btn.setVisible(False)
+        file_info_layout.addWidget(self.cancel_load_btn)
+        right_layout.addLayout(file_info_layout)
         
         # 对象选择区域
         obj_group = QGroupBox("Object Selection")
@@ -92,9 +336,29 @@ class DisassemblyViewer(QMainWindow):
         # 1️⃣ 添加搜索框
         self.obj_search_edit = QLineEdit()
         self.obj_search_edit.setPlaceholderText("Search String in objects...")
-        self.obj_search_edit.textChanged.connect(self.filter_objects)  # 搜索回调
         obj_layout.addRow("Search String:", self.obj_search_edit)
 
+        # 输入停止一段时间后才搜索
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(self.SEARCH_DELAY_MS)
+        self.search_timer.timeout.connect(self.filter_objects)  # 搜索回调
+        self.obj_search_edit.textChanged.connect(self.search_timer.start)
+
+        match_layout = QHBoxLayout()
+        self.match_mode_combo = QComboBox()
+        for mode in MatchMode:
+            self.match_mode_combo.addItem(mode.value, mode)
+        self.match_mode_combo.setCurrentIndex(self.match_mode_combo.findData(MatchMode.SUBSTRING))
+        self.match_mode_combo.currentIndexChanged.connect(self.search_timer.start)
+        match_layout.addWidget(self.match_mode_combo)
+        self.ignore_case_check = QCheckBox("Ignore case")
+        self.ignore_case_check.setChecked(True)
+        self.ignore_case_check.toggled.connect(self.search_timer.start)
+        match_layout.addWidget(self.ignore_case_check)
+        match_layout.addStretch(1)
+        obj_layout.addRow("Match:", match_layout)
+
         self.obj_combo = QComboBox()
         self.obj_combo.currentIndexChanged.connect(self.on_obj_selected)
         obj_layout.addRow("Select Object:", self.obj_combo)
@@ -104,11 +368,22 @@ class DisassemblyViewer(QMainWindow):
         
         right_layout.addWidget(obj_group)
         
-        # 反汇编树
-        self.disassembly_tree = QTreeWidget()
-        self.disassembly_tree.setHeaderLabels(['Address', 'Opcode', 'Operands', 'Comment'])
+        # 反汇编列表，行按需获取，行高统一
+        self.disassembly_model = DisassemblyModel(self)
+        self.disassembly_tree = QTreeView()
+        self.disassembly_tree.setModel(self.disassembly_model)
+        self.disassembly_tree.setRootIsDecorated(False)
+        self.disassembly_tree.setItemsExpandable(False)
+        self.disassembly_tree.setUniformRowHeights(True)
         self.disassembly_tree.header().setSectionResizeMode(QHeaderView.Interactive)
-        right_layout.addWidget(self.disassembly_tree)
+
+        # 列表和控制流图两种视图，图只在切换到图形页时计算
+        self.graph_view = GraphView()
+        self.view_tabs = QTabWidget()
+        self.view_tabs.addTab(self.disassembly_tree, "Listing")
+        self.view_tabs.addTab(self.graph_view, "Graph")
+        self.view_tabs.currentChanged.connect(self.update_graph)
+        right_layout.addWidget(self.view_tabs)
         
         # 添加分割器
         splitter = QSplitter(Qt.Horizontal)
@@ -124,7 +399,7 @@ class DisassemblyViewer(QMainWindow):
     def set_current_directory(self, directory):
         """设置当前目录并更新文件树"""
         if os.path.isdir(directory):
-            self.file_tree.setRootIndex(self.file_system_model.index(directory))
+            self.file_tree.setRootIndex(self.file_proxy_model.index_of_path(directory))
     
     def open_folder(self):
         """打开文件夹并更新文件树"""
@@ -134,7 +409,7 @@ class DisassemblyViewer(QMainWindow):
     
     def on_file_double_clicked(self, index: QModelIndex):
         """处理文件树中的双击事件"""
-        file_path = self.file_system_model.filePath(index)
+        file_path = self.file_proxy_model.filePath(index)
         if os.path.isfile(file_path):
             self.load_file(file_path)
     
@@ -150,87 +425,234 @@ class DisassemblyViewer(QMainWindow):
             self.file_system_model.setNameFilters([])
     
     def load_file(self, file_path):
-        """加载选定的文件"""
-        # 加载字节码
-        result = TJSByteCodeLoader.load_bytecode(file_path)
+        """在后台线程加载选定的文件，未完成的上一次加载会被取消，缓存中的文件直接显示"""
+        self.cancel_load()
+        self._load_generation += 1
+        
+        key = file_cache_key(file_path)
+        cached = self.file_cache.get(key) if key else None
+        if cached is not None:
+            self.show_loaded_file(file_path, key, cached)
+            return
+        self._load_key = key
+        
+        worker = LoadWorker(self._load_generation, file_path, self.disk_cache)
+        worker.signals.progress.connect(self.on_load_progress)
+        worker.signals.finished.connect(self.on_file_loaded)
+        self._load_worker = worker
+        
+        self.file_info_label.setText(f"Loading: {os.path.basename(file_path)}")
+        self.load_progress.setValue(0)
+        self.load_progress.setVisible(True)
+        self.cancel_load_btn.setVisible(True)
+        self.thread_pool.start(worker)
+    
+    def cancel_load(self):
+        """取消正在进行的加载，之后到达的结果会被忽略"""
+        if self._load_worker is None:
+            return
+        self._load_worker.cancel()
+        self._load_worker = None
+        self._load_generation += 1
+        self.load_progress.setVisible(False)
+        self.cancel_load_btn.setVisible(False)
+        self.update_file_info()
+    
+    def on_load_progress(self, generation: int, permille: int):
+        if generation == self._load_generation:
+            self.load_progress.setValue(permille)
+    
+    def update_file_info(self):
+        """显示当前已加载文件的信息"""
+        if self.current_file is None:
+            self.file_info_label.setText("No file loaded")
+            return
+        file_name = os.path.basename(self.current_file)
+        obj_count = len(self.objects) if self.objects else 0
+        self.file_info_label.setText(f"File: {file_name} | Objects: {obj_count}")
+    
+    def on_file_loaded(self, generation: int, file_path: str, result):
+        """后台加载完成，过期的结果直接丢弃"""
+        if generation != self._load_generation:
+            return
+        self._load_worker = None
+        self.load_progress.setVisible(False)
+        self.cancel_load_btn.setVisible(False)
         
         if result is None:
+            self.update_file_info()
             QMessageBox.warning(self, "Invalid File", 
                                f"The file '{os.path.basename(file_path)}' is not a valid TJS2 bytecode file.")
             return
         
+        # 先保存当前对象的列表，放入新文件时当前文件可能被淘汰
+        self.save_disassembly_state()
+        self.disassembly_model.clear()
+        if self._load_key:
+            self.file_cache.put(self._load_key, result, size=self._load_key[2] * PARSED_SIZE_FACTOR)
+        self.show_loaded_file(file_path, self._load_key, result)
+
+    def on_file_evicted(self, key, result):
+        """文件被淘汰时一起删除它的反汇编列表和图形布局，它们引用着文件的对象"""
+        self.disasm_cache.discard_if(lambda k: k[0] == key)
+        self.graph_cache.discard_if(lambda k: k[0] == key)
+    
+    def show_loaded_file(self, file_path, key, result):
+        """显示已经解析好的文件"""
+        self.save_disassembly_state()
+        self.disassembly_model.clear()
         self.top_obj, self.objects, self.data_area = result
         self.current_file = file_path
+        self.current_file_key = key
         
         # 更新文件信息
-        file_name = os.path.basename(file_path)
-        obj_count = len(self.objects) if self.objects else 0
-        self.file_info_label.setText(f"File: {file_name} | Objects: {obj_count}")
+        self.update_file_info()
+        
+        # 创建反汇编器，必须在填充下拉框之前，否则会用上一个文件的反汇编器显示对象
+        self.disassembler = TJSDisassembler(self.top_obj, self.objects, self.data_area)
+        self.cancel_search()
+        self.search_index = ObjectSearchIndex(self.disassembler)
         
-        # 更新对象选择下拉框
+        # 更新对象选择下拉框，填充时不触发选择，最后只显示一次
+        self.obj_combo.blockSignals(True)
         self.obj_combo.clear()
         for i, obj in enumerate(self.objects):
             obj_name = obj.name if hasattr(obj, 'name') and obj.name else f"Object_{i}"
             obj_type = obj.context_type.name if hasattr(obj, 'context_type') else "Unknown"
             self.obj_combo.addItem(f"{obj_name} ({obj_type})", i)
-        
-        # 创建反汇编器
-        self.disassembler = TJSDisassembler(self.top_obj, self.objects, self.data_area)
+        self.obj_combo.blockSignals(False)
         
         # 默认显示第一个对象
         if self.objects:
             self.obj_combo.setCurrentIndex(0)
-            self.on_obj_selected(0)
+        self.on_obj_selected(0)
     
     def on_obj_selected(self, index):
         """处理对象选择变化"""
-        self.disassembly_tree.clear()
+        self.save_disassembly_state()
+        self.disassembly_model.clear()
         obj_index = self.obj_combo.itemData(index)
         if obj_index is None or obj_index >= len(self.objects):
+            self.update_graph()
             return
             
         self.current_obj_index = obj_index
         obj = self.objects[obj_index]
 
-        # 更新对象信息
-        obj_info = f"Name: {obj.name if hasattr(obj, 'name') else 'Unknown'}\n"
-        obj_info += f"Type: {obj.context_type.name if hasattr(obj, 'context_type') else 'Unknown'}\n"
-        obj_info += f"Code Size: {len(obj.code) if hasattr(obj, 'code') else 0} instructions\n"
-        obj_info += f"Data Count: {len(obj.data) if hasattr(obj, 'data') else 0} items\n"
-        obj_info += f"Variables: Max {obj.max_variable_count if hasattr(obj, 'max_variable_count') else 0}, "
-        obj_info += f"Reserved {obj.variable_reserve_count if hasattr(obj, 'variable_reserve_count') else 0}"
-        
-        self.obj_info_label.setText(obj_info)
-        
-        # 显示反汇编结果
-        self.display_disassembly(obj_index)
+        try:
+            # 更新对象信息
+            obj_info = f"Name: {obj.name if hasattr(obj, 'name') else 'Unknown'}\n"
+            obj_info += f"Type: {obj.context_type.name if hasattr(obj, 'context_type') else 'Unknown'}\n"
+            obj_info += f"Code Size: {len(obj.code) if hasattr(obj, 'code') else 0} instructions\n"
+            obj_info += f"Data Count: {len(obj.data) if hasattr(obj, 'data') else 0} items\n"
+            obj_info += f"Variables: Max {obj.max_variable_count if hasattr(obj, 'max_variable_count') else 0}, "
+            obj_info += f"Reserved {obj.variable_reserve_count if hasattr(obj, 'variable_reserve_count') else 0}"
+            
+            self.obj_info_label.setText(obj_info)
+            
+            # 显示反汇编结果
+            self.display_disassembly(obj_index)
+        except ObjectDecodeError as e:
+            self.disassembly_model.clear()
+            self.obj_info_label.setText(f"Invalid object: {e}")
+            QMessageBox.warning(self, "Invalid Object", str(e))
     
     def display_disassembly(self, obj_index: int):
         """显示指定对象的反汇编结果"""
         if self.disassembler is None or obj_index >= len(self.objects):
             return
             
-        instructions = self.disassembler.disassemble(obj_index)
-        
-        for instr in instructions:
-            item = QTreeWidgetItem([
-                f"0x{instr.address:04X}",
-                instr.opcode,
-                instr.operands,
-                f"; {instr.comment}"
-            ])
-            self.disassembly_tree.addTopLevelItem(item)
-            
-        # 展开所有项
-        self.disassembly_tree.expandAll()
-        
-        # 调整列宽以适应内容
-        for i in range(self.disassembly_tree.columnCount()):
-            self.disassembly_tree.resizeColumnToContents(i)
+        cached = self.disasm_cache.get((self.current_file_key, obj_index))
+        if cached is not None:
+            instructions, source = cached
+            self.disassembly_model.set_source(source, instructions)
+        else:
+            self.disassembly_model.set_source(self.disassembler.iter_instructions(obj_index))
+            self.disassembly_model.fetchMore()
+        self.estimate_column_widths()
+        self.update_graph()
+
+    def update_graph(self):
+        """图形页可见时显示当前对象的控制流图，缓存中没有的布局在线程池中计算"""
+        if self.view_tabs.currentWidget() is not self.graph_view or self.disassembler is None:
+            return
+        if self.obj_combo.currentData() is None:
+            # 没有选中任何对象
+            self._graph_key = None
+            self._graph_generation += 1
+            self.graph_view.clear()
+            return
+        key = (self.current_file_key, self.current_obj_index)
+        if key == self._graph_key:
+            return
+        self._graph_key = key
+        self._graph_generation += 1
+
+        layout = self.graph_cache.get(key) if self.current_file_key else None
+        if layout is not None:
+            self.show_graph(layout)
+            return
+        view = self.graph_view
+        worker = GraphWorker(self._graph_generation, self.objects[self.current_obj_index],
+                             view.block_width, view.line_height, view.header_height)
+        worker.signals.finished.connect(self.on_graph_ready)
+        worker.signals.failed.connect(self.on_graph_failed)
+        view.clear("Computing layout...")
+        self.thread_pool.start(worker)
+
+    def on_graph_ready(self, generation: int, layout: GraphLayout):
+        if generation != self._graph_generation:
+            return
+        if self.current_file_key:
+            graph = layout.graph
+            self.graph_cache.put(self._graph_key, layout, size=(len(graph) + graph.edge_count) * self.GRAPH_ITEM_SIZE)
+        self.show_graph(layout)
+
+    def on_graph_failed(self, generation: int, message: str):
+        if generation != self._graph_generation:
+            return
+        self.graph_view.clear(message)
+
+    def show_graph(self, layout: GraphLayout):
+        obj_index = self.current_obj_index
+        disassembler = self.disassembler
+
+        def block_text(block: int) -> List[str]:
+            graph = layout.graph
+            lines = []
+            for instr in disassembler.iter_instructions(obj_index, graph.starts[block], graph.ends[block]):
+                comment = instr.comment
+                line = f"0x{instr.address:04X}  {instr.opcode:<10} {instr.operands}"
+                lines.append(f"{line}  ; {comment}" if comment else line)
+            return lines
+
+        self.graph_view.set_layout(layout, block_text)
+    
+    def save_disassembly_state(self):
+        """把当前对象已经取出的指令和剩余的指令来源放进缓存"""
+        instructions, source = self.disassembly_model.state()
+        if self.current_file_key not in self.file_cache or not instructions:
+            return
+        self.disasm_cache.put((self.current_file_key, self.current_obj_index), (instructions, source),
+                              size=len(instructions) * INSTRUCTION_SIZE)
+    
+    def estimate_column_widths(self, sample: int = 200):
+        """根据前 sample 行估算列宽，不遍历全部指令"""
+        model = self.disassembly_model
+        metrics = QFontMetrics(self.disassembly_tree.font())
+        rows = min(sample, model.rowCount())
+        padding = metrics.horizontalAdvance("  ") + 8
+        for column, header in enumerate(model.HEADERS):
+            width = metrics.horizontalAdvance(header)
+            for row in range(rows):
+                text = model.data(model.index(row, column))
+                width = max(width, metrics.horizontalAdvance(text))
+            self.disassembly_tree.setColumnWidth(column, width + padding)
     
     def filter_objects(self):
-        """根据搜索框内容过滤对象，下拉框只显示匹配的对象"""
-        search_text = self.obj_search_edit.text().lower()
+        """根据搜索框内容过滤对象，匹配在线程池中进行，结果分批加入下拉框"""
+        search_text = self.obj_search_edit.text()
+        self.cancel_search()
 
         if search_text == "":
             # 更新对象选择下拉框
@@ -240,29 +662,65 @@ class DisassemblyViewer(QMainWindow):
                 obj_type = obj.context_type.name if hasattr(obj, 'context_type') else "Unknown"
                 self.obj_combo.addItem(f"{obj_name} ({obj_type})", i)
             return
-        
+
+        mode = self.match_mode_combo.currentData()
+        ignore_case = self.ignore_case_check.isChecked()
+        try:
+            compile_matcher(search_text, mode, ignore_case)
+        except re.error as e:
+            self.obj_info_label.setText(f"Invalid regex: {e}")
+            return
+
         # 先清空下拉框
+        self.save_disassembly_state()
         self.obj_combo.clear()
         
-        if not self.objects:
+        if not self.objects or self.search_index is None:
             return
-        
-        for i, obj in enumerate(self.objects):
-            match = False
-            for v in obj.data:
-                if type(v) is str and v == search_text: # 目前只支持字符串
-                    match = True
-                    break
-            
-            if match:
-                obj_name = getattr(obj, 'name', f"Object_{i}")
-                obj_type = getattr(getattr(obj, 'context_type', None), 'name', 'Unknown')
-                self.obj_combo.addItem(f"{obj_name} ({obj_type})", i)
-        
-        # 如果有匹配，默认选择第一个
-        if self.obj_combo.count() > 0:
-            self.obj_combo.setCurrentIndex(0)
-            self.on_obj_selected(0)
-        else:
+
+        worker = SearchWorker(self._search_generation, self.search_index, search_text, mode, ignore_case)
+        worker.signals.matches.connect(self.on_search_matches)
+        worker.signals.finished.connect(self.on_search_finished)
+        worker.signals.failed.connect(self.on_search_failed)
+        self._search_worker = worker
+        self.obj_info_label.setText("Searching...")
+        self.thread_pool.start(worker)
+
+    def cancel_search(self):
+        """取消正在进行的搜索，已经发出的结果按序号丢弃"""
+        self._search_generation += 1
+        if self._search_worker is not None:
+            self._search_worker.cancel()
+            self._search_worker = None
+
+    def on_search_matches(self, generation: int, indices: List[int]):
+        """加入一批匹配的对象，第一项加入空下拉框时会自动选中并显示"""
+        if generation != self._search_generation:
+            return
+        for i in indices:
+            obj = self.objects[i]
+            obj_name = getattr(obj, 'name', f"Object_{i}")
+            obj_type = getattr(getattr(obj, 'context_type', None), 'name', 'Unknown')
+            self.obj_combo.addItem(f"{obj_name} ({obj_type})", i)
+
+    def on_search_finished(self, generation: int, count: int):
+        if generation != self._search_generation:
+            return
+        self._search_worker = None
+        if count == 0:
             self.obj_info_label.setText("No object selected")
-            self.disassembly_tree.clear()
+            self.disassembly_model.clear()
+
+    def on_search_failed(self, generation: int, message: str):
+        if generation != self._search_generation:
+            return
+        self._search_worker = None
+        self.obj_info_label.setText(f"Search failed: {message}")
+
+    def closeEvent(self, event):
+        self.cancel_load()
+        self.file_proxy_model.cancel_scans()
+        self.cancel_search()
+        self._graph_generation += 1
+        self.graph_view.clear()
+        super().closeEvent(event)
@@ -1,73 +1,180 @@
 import os
+import re
+import mmap
 import glob
 import argparse
 import codecs
+from contextlib import contextmanager
+from functools import lru_cache, partial
+
+from dissemble.batch import is_bytecode_file, positive_int
+from dissemble.tjs_bytecode_loader import TJSByteCodeLoader
+from dissemble.tjs_disassembler import TJSDisassembler
 
 encodings = ['utf-8', 'shift_jis', 'gbk', 'utf-16']
-    
-def detect_encoding(file_path):
+
+# 检测编码时只解码文件开头的这么多字节
+SAMPLE_SIZE = 64 * 1024
+
+_BOMS = [
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+@contextmanager
+def open_buffer(file_path):
     """
-    尝试检测文件的编码格式
+    只读映射整个文件，空文件得到 b''，检测编码和搜索共用这一个缓冲区
     """
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b''
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield data
 
+def detect_encoding(file_path, data=None):
+    """
+    尝试检测文件的编码格式，先看BOM，再用增量解码器依次尝试解码文件开头的样本
+    """
+    if data is None:
+        with open(file_path, 'rb') as f:
+            data = f.read(SAMPLE_SIZE)
+    sample = data[:SAMPLE_SIZE]
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return encoding
+    # 样本不是整个文件时，末尾被截断的多字节字符不算错误
+    final = len(sample) == len(data)
     for encoding in encodings:
         try:
-            with codecs.open(file_path, 'r', encoding=encoding) as f:
-                # 尝试读取前几行来验证编码
-                for _ in range(5):
-                    line = f.readline()
-                    if not line:
-                        break
-                return encoding
-        except (UnicodeDecodeError, UnicodeError):
-            continue
-        except Exception:
+            codecs.getincrementaldecoder(encoding)().decode(sample, final)
+            return encoding
+        except UnicodeError:
             continue
     
     return 'binary'
 
-def search_in_file(file_path, search_string, encoding=None):
+def _search_binary(data, search_string):
+    """
+    在二进制内容中按 UTF-8 和 UTF-16 编码后的字节查找，不解码整个文件
+    """
+    pos = data.find(search_string.encode('utf-8'))
+    if pos >= 0:
+        # 只解码匹配位置之前的部分来计算字符位置
+        char_pos = len(codecs.decode(data[:pos], 'utf-8', errors='ignore'))
+        return f"第{char_pos}(binrary pos: {pos})个字符匹配: {search_string}"
+    needle = search_string.encode('utf-16-le')
+    pos = data.find(needle)
+    # UTF-16 字符只从偶数位置开始
+    while pos >= 0 and pos % 2:
+        pos = data.find(needle, pos + 1)
+    if pos >= 0:
+        return f"第{pos // 2}(binrary pos: {pos})个字符匹配: {search_string}"
+    return None
+
+def search_in_file(file_path, search_strings, encoding=None):
     """
-    在文件中搜索指定字符串
+    在文件中搜索指定字符串，可以一次给出多个，文件只读取一次
     """
+    if isinstance(search_strings, str):
+        search_strings = [search_strings]
     matches = []
-    line_num = 0
     
-    if encoding is None:
-        encoding = detect_encoding(file_path)
+    try:
+        with open_buffer(file_path) as data:
+            if encoding is None:
+                encoding = detect_encoding(file_path, data)
     
-        if encoding == 'binary':
-            # 对于二进制文件，使用二进制模式读取并尝试Unicode解码
-            with open(file_path, 'rb') as f:
-                content = f.read()
-                # 尝试将二进制内容解码为字符串进行搜索
-                for c in ['utf-8', 'utf-16']:
-                    try:
-                        decoded_content = content.decode(c, errors='ignore')
-                        line_num = decoded_content.index(search_string)
-                        matches.append(f"第{line_num}(binrary pos: {line_num*2})个字符匹配: {search_string}")
-                        break
-                    except:
-                        pass
-        else:
-            try:
-                with codecs.open(file_path, 'r', encoding=encoding) as f:
-                    for line in f:
-                        line_num += 1
-                        if search_string in line:
-                            matches.append(f"第{line_num}行: {line.strip()}")
-            except:
-                pass
+            if encoding == 'binary':
+                for search_string in search_strings:
+                    match = _search_binary(data, search_string)
+                    if match:
+                        matches.append(match)
+                return matches
+
+            if not encoding.startswith('utf-16'):
+                # 无状态编码中包含字符串的文本，其字节也一定包含编码后的字符串，字节中找不到就不用解码
+                raw_encoding = 'utf-8' if encoding == 'utf-8-sig' else encoding
+                search_strings = [s for s in search_strings
+                                  if data.find(s.encode(raw_encoding, errors='ignore')) >= 0]
+                if not search_strings:
+                    return matches
+            text = codecs.decode(data, encoding, errors='replace')
+    except (OSError, ValueError):
+        return matches
+
+    for line_num, line in enumerate(text.splitlines(), 1):
+        for search_string in search_strings:
+            if search_string in line:
+                matches.append(f"第{line_num}行: {line.strip()}")
+                break
     
     return matches
 
+@lru_cache(maxsize=8)
+def compile_patterns(search_strings):
+    """
+    把所有要搜索的字符串编译成一个正则，每个字符串只扫描一遍
+    """
+    return re.compile('|'.join(map(re.escape, search_strings)))
+
+def search_bytecode(file_path, search_strings):
+    """
+    解析TJS2字节码文件，在字符串常量池中同时搜索多个字符串，
+    返回 (文件路径, 匹配列表, 错误信息)，不是字节码的文件返回 None，在工作进程中运行
+    """
+    if not is_bytecode_file(file_path):
+        return None
+    matches = []
+    try:
+        # 只有常量池中有匹配的字符串时才解码对象的代码
+        result = TJSByteCodeLoader.load_bytecode(file_path, lazy=True, strict=True)
+        if result is None:
+            return file_path, matches, "加载失败"
+        regex = compile_patterns(search_strings)
+        hits = [s for s in dict.fromkeys(result[2].string_array) if regex.search(s)]
+        if not hits:
+            return file_path, matches, None
+        objects = result[1]
+        disassembler = TJSDisassembler(*result)
+        for s in hits:
+            # 正则的分支不会报告重叠的匹配，命中后再逐个确认
+            found = ', '.join(p for p in search_strings if p in s)
+            text = disassembler.get_value_comment(s)
+            refs = disassembler.xrefs(s)
+            if not refs:
+                matches.append(f"未被指令引用: {text} ({found})")
+            for obj_index, address in refs:
+                matches.append(f"[{obj_index}] {objects[obj_index].name} 0x{address:04X}: {text} ({found})")
+    except Exception as e:
+        return file_path, matches, f"{type(e).__name__}: {e}"
+    return file_path, matches, None
+
+def search_bytecode_files(file_list, search_strings, jobs=None):
+    """
+    在进程池中搜索多个字节码文件，按 file_list 的顺序产生结果
+    """
+    search = partial(search_bytecode, search_strings=tuple(search_strings))
+    if jobs == 1 or len(file_list) < 2:
+        yield from map(search, file_list)
+        return
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        yield from executor.map(search, file_list, chunksize=16)
+
 def main():
     parser = argparse.ArgumentParser(description='在文件中搜索指定字符串')
     parser.add_argument('pattern', help='文件名匹配模式(glob规则)')
-    parser.add_argument('search_string', help='要搜索的字符串')
+    parser.add_argument('search_strings', nargs='+', metavar='search_string', help='要搜索的字符串，可以指定多个')
     parser.add_argument('-e', '--encoding', help='指定编码(默认自动检测)', 
                         choices=encodings,
                         default=None)
+    parser.add_argument('-b', '--bytecode', action='store_true',
+                        help='只搜索TJS2字节码文件的字符串常量，报告引用它的对象和指令地址')
+    parser.add_argument('-j', '--jobs', type=positive_int, default=None,
+                        help='字节码搜索的并行进程数(默认CPU核数)')
     
     args = parser.parse_args()
     
@@ -75,8 +182,10 @@ def main():
     current_dir = os.getcwd()
     print(f"在当前目录搜索: {current_dir}")
     print(f"文件模式: {args.pattern}")
-    print(f"搜索字符串: {args.search_string}")
-    if args.encoding:
+    print(f"搜索字符串: {', '.join(args.search_strings)}")
+    if args.bytecode:
+        print("模式: 字节码字符串常量")
+    elif args.encoding:
         print(f"指定编码: {args.encoding}")
     else:
         print("编码: 自动检测")
@@ -91,6 +200,24 @@ def main():
     
     found_count = 0
     
+    if args.bytecode:
+        file_list = [f for f in file_list if not os.path.isdir(f)]
+        for result in search_bytecode_files(file_list, args.search_strings, args.jobs):
+            if result is None:
+                continue
+            file_path, matches, error = result
+            rel_path = os.path.relpath(file_path, current_dir)
+            if error:
+                print(f"\n解析失败: {rel_path}: {error}")
+            if matches:
+                found_count += 1
+                print(f"\n找到匹配的文件: {rel_path}")
+                for match in matches:
+                    print(f"  -> {match}")
+        print("-" * 50)
+        print(f"搜索完成! 共找到 {found_count} 个文件包含指定字符串")
+        return
+    
     for file_path in file_list:
         # 跳过目录
         if os.path.isdir(file_path):
@@ -100,7 +227,7 @@ def main():
         rel_path = os.path.relpath(file_path, current_dir)
         
         # 在文件中搜索
-        matches = search_in_file(file_path, args.search_string, args.encoding)
+        matches = search_in_file(file_path, args.search_strings, args.encoding)
         
         if matches:
             found_count += 1
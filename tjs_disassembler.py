@@ -1,17 +1,26 @@
 import argparse
 import os
 import sys
-import PyQt5
-from PyQt5.QtWidgets import QApplication
-from PyQt5.QtCore import QCoreApplication
-from dissemble.ui import DisassemblyViewer
 
 def main():
-    
+    if len(sys.argv) > 1 and sys.argv[1] == 'batch':
+        from dissemble import batch
+        sys.exit(batch.main(sys.argv[2:]))
+
     parser = argparse.ArgumentParser(description='反汇编二进制格式tjs脚本')
     parser.add_argument('path', help='文件夹路径', nargs='?', default=None)
+    parser.add_argument('--cache-dir', help='解析结果的磁盘缓存目录', default=None)
+    parser.add_argument('--cache-size', type=int, default=1024, help='磁盘缓存上限(MB)')
     
     args = parser.parse_args()
+
+    # PyQt 只在真正启动界面时导入，命令行工具见 python -m dissemble
+    import PyQt5
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import QCoreApplication
+    from dissemble.ui import DisassemblyViewer
+    from dissemble.disk_cache import DiskCache
+
     base = os.path.dirname(PyQt5.__file__)
     plugin_path = os.path.join(base, "Qt5", "plugins")
 
@@ -19,7 +28,8 @@ def main():
 
     # 创建GUI应用
     app = QApplication(sys.argv)
-    viewer = DisassemblyViewer()
+    disk_cache = DiskCache(args.cache_dir, args.cache_size * 1024 * 1024) if args.cache_dir else None
+    viewer = DisassemblyViewer(disk_cache)
     viewer.show()
     
     # 设置默认目录为当前脚本运行目录